@@ -0,0 +1,238 @@
+# analytics.py — 리포트 열 지향 저장소 (Parquet, 일자 파티션) + 집계 도우미
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 실제 트래픽에서 어떤 증상 조합/빨간 깃발/약이 나오는지 보기.
+#   - eventlog의 writer 스레드가 "report" 이벤트를 ReportSink로 넘기면
+#     메모리에 모았다가 rows_per_file 또는 max_age마다 Parquet 파일 1개로 기록.
+#     경로: <root>/day=YYYY-MM-DD/part-<시각>.parquet  (hive 파티션)
+#   - 조회는 필요한 열만, memory_map으로 읽고 pyarrow.compute로 집계 → pandas 불필요.
+#     일자 범위는 파티션 필터라 범위 밖 파일은 열지도 않는다.
+#   - pyarrow는 실제로 파일을 쓸/읽을 때만 import (앱 첫 렌더에는 로드되지 않음).
+#     pyarrow는 파이썬 객체를 변환할 때(pa.array/from_pylist)와 pyarrow.dataset에서 pandas를 import하므로
+#     쓰기는 JSON 줄 → pyarrow.json(C++) 변환, 읽기는 ParquetFile을 직접 열어서 pandas 없이 처리.
+# 사용 예:
+#   python analytics.py top symptoms --since 2026-09-01 --limit 20
+#   python analytics.py top combos / red_flags / drugs / conditions
+#   python analytics.py import --events logs        # 기존 JSONL 로그를 Parquet로 적재
+# 환경변수:
+#   ANALYTICS_DIR (기본: ./analytics), ANALYTICS_ROWS_PER_FILE (기본 5000)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+DEFAULT_DIR = Path(os.environ.get("ANALYTICS_DIR", Path(__file__).with_name("analytics")))
+DEFAULT_ROWS_PER_FILE = int(os.environ.get("ANALYTICS_ROWS_PER_FILE", 5000))
+
+# 목록 열 — top 명령의 대상
+LIST_COLUMNS = {"symptoms": "symptoms", "red_flags": "alerts", "drugs": "drugs", "conditions": "conditions"}
+
+
+def _schema() -> Any:
+    import pyarrow as pa
+    return pa.schema([
+        ("ts", pa.timestamp("us")),
+        ("report_hash", pa.string()),
+        ("kb_version", pa.string()),  # Parquet 사전 인코딩으로 저장
+        ("combo", pa.string()),  # 정렬한 증상을 "+"로 이은 조합 키
+        ("symptoms", pa.list_(pa.string())),
+        ("tags", pa.list_(pa.string())),
+        ("conditions", pa.list_(pa.string())),
+        ("alerts", pa.list_(pa.string())),
+        ("drugs", pa.list_(pa.string())),
+    ])
+
+
+def report_row(event: Dict[str, Any]) -> Dict[str, Any]:
+    """eventlog "report" 이벤트 → 한 행 (JSON 직렬화 가능한 dict, ts는 ISO 문자열)."""
+    alerts = event.get("alerts", [])
+    return {
+        "ts": event["ts"],
+        "report_hash": event.get("report_hash", ""),
+        "kb_version": event.get("kb_version", ""),
+        "combo": "+".join(sorted(event.get("symptoms", []))),
+        "symptoms": list(event.get("symptoms", [])),
+        "tags": list(event.get("tags", [])),
+        "conditions": list(event.get("conditions", [])),
+        "alerts": list(alerts) if isinstance(alerts, list) else [],
+        "drugs": list(event.get("drugs", [])),
+    }
+
+
+# =============================
+# 1) 쓰기 (배치)
+# =============================
+
+class ReportSink:
+    """report 이벤트를 모아 일자별 Parquet 파일로. EventLog(sinks=[...])의 writer 스레드에서 호출된다."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike = DEFAULT_DIR,
+        rows_per_file: int = DEFAULT_ROWS_PER_FILE,
+        max_age: float = 300.0,
+    ) -> None:
+        self.root = Path(root)
+        self.rows_per_file = rows_per_file
+        self.max_age = max_age
+        self.files = 0
+        self.rows = 0
+        self.last_error: Exception | None = None
+        self._buffer: List[Dict[str, Any]] = []
+        self._since = time.monotonic()
+
+    def write(self, events: Sequence[Dict[str, Any]]) -> None:
+        """배치를 버퍼에 추가 (빈 배치도 호출됨 — 오래된 버퍼 비우기용)."""
+        for e in events:
+            if e.get("kind") == "report":
+                if not self._buffer:
+                    self._since = time.monotonic()
+                self._buffer.append(report_row(e))
+        if len(self._buffer) >= self.rows_per_file or (
+            self._buffer and time.monotonic() - self._since >= self.max_age
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            self._write_rows(rows)
+        except Exception as e:  # pyarrow 없음/디스크 오류 — 앱은 계속
+            self.last_error = e
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        import pyarrow.json as pj
+        import pyarrow.parquet as pq
+
+        by_day: Dict[str, List[Dict[str, Any]]] = {}
+        for r in rows:
+            by_day.setdefault(r["ts"][:10], []).append(r)
+        options = pj.ParseOptions(explicit_schema=_schema(), unexpected_field_behavior="ignore")
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        for day, day_rows in by_day.items():
+            lines = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in day_rows).encode("utf-8")
+            table = pj.read_json(io.BytesIO(lines), parse_options=options)
+            part = self.root / f"day={day}"
+            part.mkdir(parents=True, exist_ok=True)
+            tmp = part / f".part-{stamp}.parquet.tmp"
+            pq.write_table(table, tmp, compression="zstd")
+            os.replace(tmp, part / f"part-{stamp}.parquet")  # 읽는 쪽은 완성된 파일만 본다
+            self.files += 1
+            self.rows += len(day_rows)
+
+
+# =============================
+# 2) 조회 (열 선택 + memory map)
+# =============================
+
+def partitions(root: str | os.PathLike = DEFAULT_DIR, since: str | None = None, until: str | None = None) -> List[Path]:
+    """범위 안 일자 파티션 디렉터리 (YYYY-MM-DD 문자열 비교 = 날짜 비교)."""
+    out = []
+    for part in sorted(Path(root).glob("day=*")):
+        day = part.name[4:]
+        if (since is None or day >= since) and (until is None or day <= until):
+            out.append(part)
+    return out
+
+
+def scan(
+    columns: Sequence[str],
+    root: str | os.PathLike = DEFAULT_DIR,
+    since: str | None = None,
+    until: str | None = None,
+) -> Any:
+    """필요한 열만 memory map으로 읽은 pyarrow.Table. since/until(YYYY-MM-DD, 포함)은 파티션 단위로 거름.
+    pyarrow.dataset은 pandas까지 끌어오므로 쓰지 않고 파일을 직접 연다."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tables = [
+        pq.ParquetFile(path, memory_map=True).read(columns=list(columns))
+        for part in partitions(root, since, until)
+        for path in sorted(part.glob("*.parquet"))
+    ]
+    if not tables:
+        schema = _schema()
+        return pa.Table.from_batches([], schema=pa.schema([schema.field(c) for c in columns]))
+    return pa.concat_tables(tables)
+
+
+def top(
+    what: str,
+    root: str | os.PathLike = DEFAULT_DIR,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = 20,
+) -> List[Tuple[str, int]]:
+    """가장 많이 나온 값 (what: symptoms | combos | red_flags | drugs | conditions)."""
+    import pyarrow.compute as pc
+
+    if what == "combos":
+        values = scan(["combo"], root, since, until)["combo"]
+    else:
+        values = pc.list_flatten(scan([LIST_COLUMNS[what]], root, since, until)[LIST_COLUMNS[what]])
+    counts = pc.value_counts(values)
+    if not len(counts):
+        return []
+    order = pc.array_sort_indices(counts.field("counts"), order="descending")
+    counts = counts.take(order[:limit])
+    return list(zip(counts.field("values").to_pylist(), counts.field("counts").to_pylist()))
+
+
+def count(root: str | os.PathLike = DEFAULT_DIR, since: str | None = None, until: str | None = None) -> int:
+    return scan(["ts"], root, since, until).num_rows
+
+
+def import_events(events: Iterable[Dict[str, Any]], root: str | os.PathLike = DEFAULT_DIR, rows_per_file: int = 50_000) -> int:
+    """eventlog JSONL의 report 이벤트를 Parquet로 적재 (백필)."""
+    sink = ReportSink(root, rows_per_file=rows_per_file, max_age=float("inf"))
+    for e in events:
+        sink.write([e])
+    sink.close()
+    if sink.last_error:
+        raise sink.last_error
+    return sink.rows
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="리포트 열 지향 저장소 조회/적재")
+    p.add_argument("--dir", default=str(DEFAULT_DIR), help="Parquet 루트 (기본: ./analytics)")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    t = sub.add_parser("top", help="가장 많이 나온 증상/조합/빨간 깃발/약/질환")
+    t.add_argument("what", choices=("symptoms", "combos", "red_flags", "drugs", "conditions"))
+    t.add_argument("--since", help="시작일 YYYY-MM-DD (포함)")
+    t.add_argument("--until", help="종료일 YYYY-MM-DD (포함)")
+    t.add_argument("--limit", type=int, default=20)
+    i = sub.add_parser("import", help="eventlog JSONL의 report 이벤트 적재")
+    i.add_argument("--events", default=None, help="eventlog 디렉터리 (기본: EVENT_LOG_DIR)")
+    args = p.parse_args(argv)
+
+    if args.cmd == "import":
+        from eventlog import DEFAULT_DIR as EVENTS_DIR, read_events
+        n = import_events(read_events(args.events or EVENTS_DIR, kind="report"), args.dir)
+        print(f"{n} reports imported", file=sys.stderr)
+        return 0
+
+    t0 = time.perf_counter()
+    rows = top(args.what, args.dir, args.since, args.until, args.limit)
+    for value, n in rows:
+        print(f"{n:>8}  {value}")
+    print(f"({count(args.dir, args.since, args.until)} reports, {time.perf_counter() - t0:.2f}s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
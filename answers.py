@@ -0,0 +1,287 @@
+# answers.py — 증상 × 개인 상황 답 테이블 (KB 배포 시 오프라인 컴파일)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 증상은 고정된 칩 목록(symptom_to_drugs 키), 개인 상황은 플래그 7개(rules.CTX_FLAGS)라
+#     자유 입력(상세/복용 중인 약)에 의존하지 않는 답은 유한하다:
+#     추천 후보(약별 커버 증상 — 순위 계산 입력), 개인 상황 주의, 의심 질환 기본 목록(힌트 가산 전, 점수 1).
+#   - 키 = (증상 비트마스크, ctx 비트마스크). 증상 비트 순서 = KB 칩 순서, 선택 순서와 무관
+#     (UI는 칩을 가나다순으로 보낸다). 답은 칩 순서로 저장하고, 선택 순서가 다르면
+#     후보/질환 순서를 조회 시 선택 순서로 되돌린다 (약마다 증상 목록 안 위치를 저장).
+#     ctx는 그 선택의 추천 약 규칙이 실제로 보는 플래그만 남겨 키를 줄인다
+#     (예: 설사만 선택하면 어떤 체크박스 조합이든 키 1개).
+#   - 요청 시: 테이블 조회 + 순위 상위 k개(ranking.py) + 자유 입력 보정
+#     (상세 키워드 힌트 가산/빨간 깃발, 추가 키워드 avoid_if 감점, 복용 중인 약 상호작용)만.
+#     키워드 스캔 없는 기본 답은 조회만으로 끝난다.
+#   - KB 배포 시 `build`로 선택 증상 N개 이하 조합을 미리 채운 사이드카 파일(<kb>.answers.json)을 만든다.
+#     없거나 KB 버전이 다르면 빈 테이블로 시작해 조회 시 채운다(MEMO_LIMIT 상한). 카탈로그 KB도 조회 시 채움.
+#   - 중복/모르는 증상이 있으면 None → 엔진이 직접 계산.
+#   - 성별은 현재 어떤 규칙에도 쓰이지 않아 키에 없다 (리포트 캐시 키와 같음).
+# 사용 예:
+#   python answers.py build data/kb.json --max-symptoms 3     # → data/kb.answers.json
+# 배포 순서:
+#   사이드카를 먼저 교체한 뒤 kb.json을 교체 (KBStore는 kb.json 변경 시 사이드카도 다시 읽는다).
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass
+from itertools import combinations
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import KnowledgeBase
+    from ranking import Candidate
+
+ANSWERS_SCHEMA = 4
+
+# 조회 시 채우는 항목 수 상한 (rules.MEMO_LIMIT와 같은 이유)
+MEMO_LIMIT = 1 << 16
+
+# (질환명, 증상, 메모) — 상세가 없을 때의 답 (점수 1). 상세가 있으면 scoring.py가 힌트를 가산
+BaseCondition = Tuple[str, str, str]
+
+# (약명, ((커버하는 선택 증상, 그 증상 약 목록 안 위치), ...)) — 증상은 칩 순서
+StoredCandidate = Tuple[str, Tuple[Tuple[str, int], ...]]
+
+
+@dataclass(frozen=True, slots=True)
+class Selection:
+    """증상 조합 1개의 답 (ctx 무관 부분)."""
+    candidates: Tuple[StoredCandidate, ...]  # 칩 순서로 선택했을 때의 drug_candidates 순서
+    conditions: Tuple[BaseCondition, ...]    # 칩 순서대로, 정렬 전
+    flags: int                                          # 추천 약 규칙이 보는 ctx 플래그
+
+
+def answers_path(kb_path: str | os.PathLike) -> Path:
+    """KB 파일 옆 사이드카 경로 (data/kb.json → data/kb.answers.json)."""
+    path = Path(kb_path)
+    return path.with_name(f"{path.stem}.answers.json")
+
+
+class AnswerTable:
+    """(증상 마스크, ctx 마스크) → 답. compile()로 미리 채우거나 조회 시 채운다."""
+
+    def __init__(self, symptoms: Iterable[str] = (), version: str = "") -> None:
+        self.symptoms: Tuple[str, ...] = tuple(symptoms)
+        self.version = version  # 미리 채운 KB 버전 ("" = 조회 시 채움)
+        self.bits: Dict[str, int] = {s: i for i, s in enumerate(self.symptoms)}
+        self.selections: Dict[int, Selection] = {}
+        self.personal: Dict[Tuple[int, int], Dict[str, List[str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.personal)
+
+    def mask_of(self, selected: Sequence[str]) -> int | None:
+        """선택 증상 → 비트마스크 (순서 무관). 모르거나 중복된 증상이 있으면 None."""
+        mask = 0
+        for s in selected:
+            bit = self.bits.get(s)
+            if bit is None or mask >> bit & 1:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def _in_chip_order(self, selected: Sequence[str]) -> bool:
+        bits = self.bits
+        return all(bits[a] < bits[b] for a, b in zip(selected, selected[1:]))
+
+    def selection(self, kb: "KnowledgeBase", mask: int) -> Selection:
+        sel = self.selections.get(mask)
+        if sel is None:
+            if len(self.selections) >= MEMO_LIMIT:
+                self.selections.clear()
+            sel = self.selections[mask] = self._compute_selection(kb, mask)
+        return sel
+
+    def candidates(self, kb: "KnowledgeBase", mask: int, selected: Sequence[str]) -> List["Candidate"]:
+        """drug_candidates(kb, selected)와 같은 목록 — 선택 순서가 칩 순서와 다르면 순서를 되돌린다."""
+        by_name = kb.by_name
+        stored = self.selection(kb, mask).candidates
+        if self._in_chip_order(selected):
+            return [(by_name[name], tuple(s for s, _ in covered)) for name, covered in stored if name in by_name]
+        # 직접 계산은 선택 증상 순서대로 약 목록을 훑어 처음 나온 순서 → (첫 커버 증상의 선택 순위, 목록 안 위치)
+        rank = {s: i for i, s in enumerate(selected)}
+        out: List[Tuple[int, int, "Candidate"]] = []
+        for name, covered in stored:
+            if name in by_name:
+                ordered = sorted(covered, key=lambda sp: rank[sp[0]])
+                first, pos = ordered[0]
+                out.append((rank[first], pos, (by_name[name], tuple(s for s, _ in ordered))))
+        out.sort(key=lambda c: c[:2])
+        return [c for _, _, c in out]
+
+    def conditions(self, kb: "KnowledgeBase", mask: int, selected: Sequence[str]) -> List[BaseCondition]:
+        """기본 질환 목록 — 선택 순서대로 증상별 규칙 순."""
+        stored = self.selection(kb, mask).conditions
+        if self._in_chip_order(selected):
+            return list(stored)
+        by_symptom: Dict[str, List[BaseCondition]] = {}
+        for c in stored:
+            by_symptom.setdefault(c[1], []).append(c)
+        return [c for s in selected for c in by_symptom.get(s, ())]
+
+    def personal_warnings(self, kb: "KnowledgeBase", mask: int, cmask: int) -> Dict[str, List[str]]:
+        key = (mask, cmask & self.selection(kb, mask).flags)
+        warns = self.personal.get(key)
+        if warns is None:
+            if len(self.personal) >= MEMO_LIMIT:
+                self.personal.clear()
+            warns = self.personal[key] = self._compute_personal(kb, mask, key[1])
+        return warns
+
+    # --- 계산 (엔진과 같은 결과) ---
+    def _selected(self, mask: int) -> List[str]:
+        return [s for i, s in enumerate(self.symptoms) if mask >> i & 1]
+
+    def _compute_selection(self, kb: "KnowledgeBase", mask: int) -> Selection:
+        selected = self._selected(mask)
+        conditions = tuple(
+            (rule["name"], s, rule["notes"])
+            for s in selected
+            for rule in kb.condition_rules.get(s, [])
+        )
+        # engine.drug_candidates와 같은 순서 + 증상별 첫 위치 (다른 선택 순서의 순서 복원용)
+        covered: Dict[str, List[Tuple[str, int]]] = {}
+        flags = 0
+        for s in selected:
+            for pos, d in enumerate(kb.by_symptom.get(s, ())):
+                entry = covered.get(d.name)
+                if entry is None:
+                    entry = covered[d.name] = []
+                    flags |= kb.rules.flags_for(d)
+                if not entry or entry[-1][0] != s:
+                    entry.append((s, pos))
+        return Selection(tuple((name, tuple(c)) for name, c in covered.items()), conditions, flags)
+
+    def _compute_personal(self, kb: "KnowledgeBase", mask: int, cmask: int) -> Dict[str, List[str]]:
+        from engine import recommend_drugs
+
+        personal: Dict[str, List[str]] = {}
+        for d in recommend_drugs(kb, self._selected(mask)):
+            warns = kb.rules.warnings(d, cmask)
+            if warns:
+                personal[d.name] = list(warns)
+        return personal
+
+    def compile(self, kb: "KnowledgeBase", max_symptoms: int) -> "AnswerTable":
+        """선택 증상 max_symptoms개 이하 조합 × 의미 있는 ctx 조합을 전부 채운다 (MEMO_LIMIT 무관)."""
+        for k in range(1, max_symptoms + 1):
+            for combo in combinations(range(len(self.symptoms)), k):
+                mask = sum(1 << i for i in combo)
+                sel = self.selections[mask] = self._compute_selection(kb, mask)
+                sub = sel.flags
+                while True:  # flags의 모든 부분 마스크
+                    self.personal[(mask, sub)] = self._compute_personal(kb, mask, sub)
+                    if sub == 0:
+                        break
+                    sub = (sub - 1) & sel.flags
+        self.version = kb.version
+        return self
+
+    # --- 사이드카 파일 (질환/약명/문구/주의 묶음은 풀에 한 번씩, 항목은 풀 번호만) ---
+    def to_dict(self) -> Dict[str, Any]:
+        conditions: Dict[BaseCondition, int] = {}
+        names: Dict[str, int] = {}
+        messages: Dict[str, int] = {}
+        personal: Dict[Tuple[Tuple[int, Tuple[int, ...]], ...], int] = {}
+        selections = {}
+        for mask, sel in self.selections.items():
+            selections[str(mask)] = [
+                [[names.setdefault(name, len(names)), [[self.bits[s], pos] for s, pos in covered]]
+                 for name, covered in sel.candidates],
+                [conditions.setdefault(c, len(conditions)) for c in sel.conditions],
+                sel.flags,
+            ]
+        entries = {}
+        for (mask, cmask), warns in self.personal.items():
+            packed = tuple(
+                (names.setdefault(name, len(names)), tuple(messages.setdefault(m, len(messages)) for m in msgs))
+                for name, msgs in warns.items()
+            )
+            entries[f"{mask}:{cmask}"] = personal.setdefault(packed, len(personal))
+        return {
+            "schema": ANSWERS_SCHEMA,
+            "kb_version": self.version,
+            "symptoms": list(self.symptoms),
+            "conditions": [list(c) for c in conditions],
+            "names": list(names),
+            "messages": list(messages),
+            "warnings": [[[n, list(ms)] for n, ms in packed] for packed in personal],
+            "selections": selections,
+            "personal": entries,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AnswerTable":
+        if data.get("schema") != ANSWERS_SCHEMA:
+            raise ValueError(f"지원하지 않는 답 테이블 스키마: {data.get('schema')!r} (필요: {ANSWERS_SCHEMA})")
+        table = cls(data["symptoms"], data["kb_version"])
+        names, messages = data["names"], data["messages"]
+        conditions = [tuple(c) for c in data["conditions"]]
+        for mask, (candidates, cond_ids, flags) in data["selections"].items():
+            table.selections[int(mask)] = Selection(
+                tuple((names[n], tuple((table.symptoms[b], pos) for b, pos in covered)) for n, covered in candidates),
+                tuple(conditions[i] for i in cond_ids),
+                flags,
+            )
+        warnings = [{names[n]: [messages[m] for m in ms] for n, ms in packed} for packed in data["warnings"]]
+        for key, i in data["personal"].items():
+            mask, cmask = key.split(":")
+            table.personal[(int(mask), int(cmask))] = warnings[i]
+        return table
+
+
+def compile_answers(kb: "KnowledgeBase", max_symptoms: int = 3) -> AnswerTable:
+    return AnswerTable(kb.symptom_to_drugs).compile(kb, max_symptoms)
+
+
+def load_answers(path: str | os.PathLike, kb: "KnowledgeBase") -> AnswerTable | None:
+    """사이드카 로드. 없거나 깨졌거나 KB 버전/증상 목록이 다르면 None (조회 시 채우는 테이블을 쓴다)."""
+    try:
+        table = AnswerTable.from_dict(json.loads(Path(path).read_bytes()))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if table.version != kb.version or table.symptoms != tuple(kb.symptom_to_drugs):
+        return None
+    return table
+
+
+def build_answers(kb_path: str | os.PathLike, out: str | os.PathLike | None = None, max_symptoms: int = 3) -> Dict[str, Any]:
+    """KB 파일 → 사이드카 (임시 파일에 쓴 뒤 os.replace). 요약 dict 반환."""
+    from engine import load_kb_file
+
+    if Path(kb_path).suffix in (".sqlite", ".db"):
+        raise ValueError("카탈로그 KB는 조회 시 채웁니다 (사이드카 없음)")
+    table = compile_answers(load_kb_file(kb_path), max_symptoms)
+    out = Path(out) if out else answers_path(kb_path)
+    tmp = out.with_name(out.name + ".tmp")
+    tmp.write_text(json.dumps(table.to_dict(), ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, out)
+    return {
+        "path": str(out),
+        "kb_version": table.version,
+        "selections": len(table.selections),
+        "entries": len(table),
+        "bytes": out.stat().st_size,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="증상 × 개인 상황 답 테이블 컴파일")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="kb.json → <kb>.answers.json")
+    b.add_argument("kb_json")
+    b.add_argument("-o", "--out", help="출력 경로 (기본: KB 옆 <이름>.answers.json)")
+    b.add_argument("--max-symptoms", type=int, default=3, help="미리 채울 선택 증상 수 상한 (기본 3)")
+    args = p.parse_args(argv)
+
+    print(json.dumps(build_answers(args.kb_json, args.out, args.max_symptoms), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# api.py — 추천 엔진 HTTP API (ASGI: starlette + uvicorn)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 키오스크/챗봇이 Streamlit 세션(웹소켓 + 스크립트 전체 rerun) 없이 같은 리포트를 받게 한다.
+#     증상/상세/ctx JSON → engine.build_report 리포트 JSON (test.py와 같은 구조, batch.py와 같은 입력 형식).
+#   - KB는 프로세스당 1개(KBStore — 파일이 바뀌면 핫 리로드), ReportCache도 요청 간 공유.
+#   - 엔진은 동기 CPU 작업이라 스레드 풀에서 실행하고 이벤트 루프는 I/O만 맡는다.
+#   - 요청 배치: /v1/reports는 케이스 목록을 한 번에 받는다. 단건 요청도 batch_window 동안 모아
+#     max_batch개 단위로 스레드 풀 작업 하나에서 처리 (요청마다 스레드 전환하지 않음).
+#   - 동시성 제한: 동시에 실행 중인 배치 max_inflight개(세마포어 + 같은 크기의 스레드 풀),
+#     대기 케이스가 max_pending을 넘으면 즉시 503 + Retry-After (큐가 무한히 쌓이지 않게).
+#   - 멀티코어는 --workers N (프로세스마다 KB 1개).
+# 엔드포인트:
+#   POST /v1/report    {"symptoms": ["두통"], "detail": "...", "tags": [...], "ctx": {"ulcer": true, "meds": [...]}}
+#   POST /v1/reports   {"cases": [{...}, ...]}  → {"reports": [...]}  (순서 유지)
+#   GET  /healthz      {"status": "ok", "kb_version": ..., "pending": ...}
+#   GET  /metrics      Prometheus 텍스트 (METRICS=1이면 엔진 단계 시간 포함)
+# 사용 예:
+#   python api.py --port 8000 --max-inflight 4
+#   curl -s localhost:8000/v1/report -d '{"symptoms": ["두통"], "ctx": {"ulcer": true}}'
+# 환경변수:
+#   KB_PATH (engine과 동일), API_MAX_INFLIGHT (기본 4), API_MAX_PENDING (기본 1000),
+#   API_MAX_BATCH (기본 32), API_BATCH_WINDOW_MS (기본 2), API_MAX_CASES (기본 1000)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+import metrics
+from batch import normalize_case
+from engine import DEFAULT_KB_PATH, build_report, detect_symptoms
+from kbstore import KBStore
+from metrics import span
+from reportcache import ReportCache
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+class Overloaded(Exception):
+    """대기 케이스가 max_pending을 넘음 → 503."""
+
+
+class Engine:
+    """공유 KB/리포트 캐시 + 마이크로 배치 + 동시성 제한. 이벤트 루프 스레드에서만 호출."""
+
+    def __init__(
+        self,
+        store: KBStore,
+        cache: ReportCache,
+        max_inflight: int = 4,
+        max_pending: int = 1000,
+        max_batch: int = 32,
+        batch_window: float = 0.002,
+    ) -> None:
+        self.store = store
+        self.cache = cache
+        self.max_pending = max_pending
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.pending = 0
+        self.inflight = 0
+        self.batches = 0
+        self.rejected = 0
+        self._sem = asyncio.Semaphore(max_inflight)
+        self._pool = ThreadPoolExecutor(max_workers=max_inflight, thread_name_prefix="api-engine")
+        self._queue: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    # --- 스레드 풀 쪽 ---
+    def _run(self, cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        kb = self.store.current()  # 배치 전체가 같은 KB 버전을 본다
+        out = []
+        with span("api.batch"):
+            for case in cases:
+                selected = case["symptoms"]
+                if selected is None:
+                    selected = detect_symptoms(kb, case["detail"])
+                report = self.cache.get_or_build(kb, selected, case["detail"], case["tags"], case["ctx"], build_report)
+                out.append({"case_id": case["case_id"], **report} if case["case_id"] is not None else report)
+        return out
+
+    # --- 이벤트 루프 쪽 ---
+    async def submit(self, cases: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """케이스들을 큐에 넣고 결과를 기다림 (입력 순서 유지)."""
+        if self.pending + len(cases) > self.max_pending:
+            self.rejected += 1
+            raise Overloaded
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in cases]
+        self.pending += len(cases)
+        try:
+            self._queue.extend(zip(cases, futures))
+            if len(self._queue) >= self.max_batch:
+                self._flush()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.batch_window, self._flush)
+            return list(await asyncio.gather(*futures))
+        finally:
+            self.pending -= len(cases)
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        queue, self._queue = self._queue, []
+        for i in range(0, len(queue), self.max_batch):
+            asyncio.create_task(self._execute(queue[i:i + self.max_batch]))
+
+    async def _execute(self, chunk: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        async with self._sem:
+            self.inflight += 1
+            self.batches += 1
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(self._pool, self._run, [c for c, _ in chunk])
+            except Exception as e:
+                for _, fut in chunk:
+                    if not fut.done():
+                        fut.set_exception(e)
+                return
+            finally:
+                self.inflight -= 1
+        for (_, fut), report in zip(chunk, results):
+            if not fut.done():  # 클라이언트가 끊겨 취소된 경우
+                fut.set_result(report)
+
+
+# =============================
+# 1) HTTP 핸들러
+# =============================
+
+def _error(status: int, message: str, headers: Dict[str, str] | None = None) -> Any:
+    from starlette.responses import JSONResponse
+
+    return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+
+async def _cases_from(request: Any, many: bool) -> List[Dict[str, Any]]:
+    """본문 → 정규화된 케이스 목록. 형식 오류는 ValueError."""
+    try:
+        body = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise ValueError(f"JSON 파싱 실패: {e}") from e
+    raws = body.get("cases") if many and isinstance(body, dict) else [body]
+    if not isinstance(raws, list) or not all(isinstance(r, dict) for r in raws):
+        raise ValueError("케이스는 JSON 객체여야 합니다" + (' ({"cases": [...]})' if many else ""))
+    if len(raws) > request.app.state.max_cases:
+        raise ValueError(f"케이스가 너무 많습니다 (최대 {request.app.state.max_cases})")
+    try:
+        return [normalize_case(raw, raw.get("id")) for raw in raws]
+    except (TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"입력 형식 오류: {e}") from e
+
+
+async def _reports(request: Any, many: bool) -> Any:
+    from starlette.responses import JSONResponse
+
+    try:
+        cases = await _cases_from(request, many)
+    except ValueError as e:
+        return _error(400, str(e))
+    try:
+        reports = await request.app.state.engine.submit(cases)
+    except Overloaded:
+        return _error(503, "요청이 많습니다. 잠시 후 다시 시도하세요.", {"Retry-After": "1"})
+    return JSONResponse({"reports": reports} if many else reports[0])
+
+
+async def report(request: Any) -> Any:
+    return await _reports(request, many=False)
+
+
+async def reports(request: Any) -> Any:
+    return await _reports(request, many=True)
+
+
+async def healthz(request: Any) -> Any:
+    from starlette.responses import JSONResponse
+
+    engine = request.app.state.engine
+    return JSONResponse({"status": "ok", "kb_version": engine.store.version, "pending": engine.pending})
+
+
+async def prometheus(request: Any) -> Any:
+    from starlette.responses import PlainTextResponse
+
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def create_app(
+    kb_path: str | os.PathLike | None = None,
+    max_inflight: int | None = None,
+    max_pending: int | None = None,
+    max_batch: int | None = None,
+    batch_window_ms: float | None = None,
+    max_cases: int | None = None,
+) -> Any:
+    """ASGI 앱. 인자를 생략하면 환경변수(API_*) — uvicorn --factory / --workers용."""
+    from starlette.applications import Starlette
+    from starlette.routing import Route
+
+    store = KBStore(kb_path or os.environ.get("KB_PATH") or DEFAULT_KB_PATH)
+    cache = ReportCache()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Any):
+        engine = Engine(
+            store, cache,
+            max_inflight=max_inflight or _env_int("API_MAX_INFLIGHT", 4),
+            max_pending=max_pending or _env_int("API_MAX_PENDING", 1000),
+            max_batch=max_batch or _env_int("API_MAX_BATCH", 32),
+            batch_window=(batch_window_ms if batch_window_ms is not None
+                          else float(os.environ.get("API_BATCH_WINDOW_MS", 2))) / 1000,
+        )
+        app.state.engine = engine
+        app.state.max_cases = max_cases or _env_int("API_MAX_CASES", 1000)
+        metrics.register_gauge("api_pending", "API cases waiting or running.", lambda: engine.pending)
+        metrics.register_gauge("api_inflight", "API batches running in the engine pool.", lambda: engine.inflight)
+        metrics.register_gauge("api_batches", "API engine batches executed.", lambda: engine.batches)
+        metrics.register_gauge("api_rejected", "API requests rejected as overloaded.", lambda: engine.rejected)
+        metrics.register_gauge("report_cache_hits", "Report cache hits.", lambda: cache.hits)
+        metrics.register_gauge("report_cache_misses", "Report cache misses.", lambda: cache.misses)
+        try:
+            yield
+        finally:
+            engine.close()
+
+    return Starlette(
+        routes=[
+            Route("/v1/report", report, methods=["POST"]),
+            Route("/v1/reports", reports, methods=["POST"]),
+            Route("/healthz", healthz, methods=["GET"]),
+            Route("/metrics", prometheus, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="추천 엔진 HTTP API")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--kb", default=None, help="KB 경로 (기본: KB_PATH 또는 data/kb.json)")
+    p.add_argument("--workers", type=int, default=1, help="프로세스 수 (프로세스마다 KB 1개)")
+    p.add_argument("--max-inflight", type=int, help="동시에 실행할 배치 수 (기본 4)")
+    p.add_argument("--max-pending", type=int, help="대기 케이스 상한 — 넘으면 503 (기본 1000)")
+    p.add_argument("--max-batch", type=int, help="배치 1개의 최대 케이스 수 (기본 32)")
+    p.add_argument("--batch-window-ms", type=float, help="단건 요청을 모으는 시간 (기본 2ms)")
+    args = p.parse_args(argv)
+
+    import uvicorn
+
+    # --workers면 각 프로세스가 create_app()을 다시 부르므로 설정은 환경변수로 넘긴다
+    for name, value in (
+        ("KB_PATH", args.kb), ("API_MAX_INFLIGHT", args.max_inflight), ("API_MAX_PENDING", args.max_pending),
+        ("API_MAX_BATCH", args.max_batch), ("API_BATCH_WINDOW_MS", args.batch_window_ms),
+    ):
+        if value is not None:
+            os.environ[name] = str(value)
+    uvicorn.run("api:create_app", factory=True, host=args.host, port=args.port, workers=args.workers, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# assets.py — 약 사진 로컬 캐시 (내용 주소 저장 + 썸네일 선생성)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - main.py가 카드마다 원격 이미지 URL을 st.image에 넘기던 것을
+#     "한 번 받아서 로컬에 저장 → 이후엔 캐시된 바이트"로 바꿈. 오프라인에서도 표시.
+#   - 저장은 내용 해시(sha256) 기준: objects/ab/abcd... (같은 사진은 한 벌만)
+#   - 180px 썸네일은 받을 때 미리 만들어 둔다. 총 용량 상한을 넘으면 오래 안 쓴 것부터 삭제(LRU).
+#   - 받기 실패 시 회색 플레이스홀더.
+# 사용 예:
+#   python assets.py prefetch            # data/drug_data.json 이미지 미리 받기
+#   python assets.py stats
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import atexit
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+DEFAULT_CACHE_DIR = Path(os.environ.get("IMAGE_CACHE_DIR", Path(__file__).with_name(".cache") / "images"))
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+THUMB_WIDTH = 180
+FETCH_TIMEOUT = 5.0
+RETRY_AFTER = 60.0  # 실패한 URL은 이 시간 동안 다시 받지 않음
+INDEX_SAVE_INTERVAL = 30.0  # 캐시 적중의 사용 시각은 모아서 이 간격마다 index.json에 기록
+USER_AGENT = "symptom-reco/1.0 (image cache)"
+
+
+def placeholder_png(width: int = THUMB_WIDTH) -> bytes:
+    """이미지를 못 받았을 때 쓰는 회색 사각형 (Pillow는 streamlit 의존성)."""
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.new("RGB", (width, width * 3 // 4), (224, 224, 224)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def make_thumbnail(data: bytes, width: int = THUMB_WIDTH) -> bytes:
+    """가로 width 픽셀 썸네일(PNG). 디코딩 실패 시 원본 그대로."""
+    try:
+        from PIL import Image
+        img = Image.open(io.BytesIO(data))
+        img.thumbnail((width, width * 4))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+        return buf.getvalue()
+    except Exception:
+        return data
+
+
+class ImageCache:
+    """URL → 로컬 이미지. index.json에 URL별 (원본 해시, 썸네일 해시, 마지막 사용 시각)."""
+
+    def __init__(self, root: str | os.PathLike = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._failed: Dict[str, float] = {}
+        self._placeholder: bytes | None = None
+        self._dirty = False  # 적중으로 바뀐 사용 시각이 아직 index.json에 없음
+        self._saved_at = time.monotonic()
+        (self.root / "objects").mkdir(parents=True, exist_ok=True)
+        try:
+            self._index: Dict[str, Dict[str, object]] = json.loads((self.root / "index.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._index = {}
+        atexit.register(self.flush)  # 종료 전 남은 사용 시각 기록 — 재시작 후 LRU 순서 유지
+
+    # --- 저장소 ---
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _put(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        return digest
+
+    def _save_index(self) -> None:
+        tmp = self.root / "index.json.tmp"
+        tmp.write_text(json.dumps(self._index, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.root / "index.json")
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def flush(self) -> None:
+        """적중으로 갱신된 사용 시각을 index.json에 기록 (바뀐 게 없으면 아무것도 안 함)."""
+        with self._lock:
+            if self._dirty:
+                try:
+                    self._save_index()
+                except OSError:
+                    pass  # 다음 저장 때 다시 기록
+
+    def _size(self, digest: str) -> int:
+        try:
+            return self._object_path(digest).stat().st_size
+        except OSError:
+            return 0
+
+    def total_bytes(self) -> int:
+        digests = {d for e in self._index.values() for d in (e["sha"], e["thumb"])}
+        return sum(self._size(d) for d in digests)
+
+    def _evict(self) -> None:
+        """용량 상한 초과 시 마지막 사용이 오래된 URL부터 제거 (다른 URL이 쓰는 객체는 유지)."""
+        total = self.total_bytes()
+        for url in sorted(self._index, key=lambda u: self._index[u]["used"]):
+            if total <= self.max_bytes:
+                break
+            entry = self._index.pop(url)
+            still_used = {d for e in self._index.values() for d in (e["sha"], e["thumb"])}
+            for d in {entry["sha"], entry["thumb"]} - still_used:
+                total -= self._size(d)
+                self._object_path(d).unlink(missing_ok=True)
+
+    # --- 조회 ---
+    def _download(self, url: str) -> bytes:
+        import urllib.request  # 캐시 적중만 있는 실행에서는 로드하지 않음
+        req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        with urllib.request.urlopen(req, timeout=FETCH_TIMEOUT) as resp:
+            return resp.read()
+
+    def fetch(self, url: str) -> Dict[str, object] | None:
+        """URL을 캐시에 올리고 index 항목 반환. 실패 시 None (RETRY_AFTER 동안 재시도 안 함)."""
+        with self._lock:
+            entry = self._index.get(url)
+            if entry and self._object_path(entry["thumb"]).exists():
+                entry["used"] = time.time()
+                self._dirty = True
+                if time.monotonic() - self._saved_at >= INDEX_SAVE_INTERVAL:
+                    try:
+                        self._save_index()
+                    except OSError:
+                        pass  # 표시는 계속 — 다음 저장 때 다시 기록
+                return entry
+            if time.monotonic() - self._failed.get(url, -RETRY_AFTER) < RETRY_AFTER:
+                return None
+        try:
+            data = self._download(url)
+        except (OSError, ValueError):
+            with self._lock:
+                self._failed[url] = time.monotonic()
+            return None
+        thumb = make_thumbnail(data)
+        with self._lock:
+            entry = {"sha": self._put(data), "thumb": self._put(thumb), "used": time.time()}
+            self._index[url] = entry
+            self._evict()
+            self._save_index()
+        return entry
+
+    def resolve(self, image: str, thumbnail: bool = True) -> Path | None:
+        """`이미지` 필드 값 → 로컬 파일 경로. 로컬 경로면 그대로, URL이면 캐시 경로."""
+        if not image.startswith(("http://", "https://")):
+            path = Path(image)
+            return path if path.exists() else None
+        entry = self.fetch(image)
+        if entry is None:
+            return None
+        return self._object_path(entry["thumb" if thumbnail else "sha"])
+
+    def image_bytes(self, image: str, thumbnail: bool = True) -> bytes:
+        """st.image에 바로 넘길 바이트 — 실패하면 플레이스홀더."""
+        path = self.resolve(image, thumbnail)
+        if path is not None:
+            try:
+                return path.read_bytes()
+            except OSError:
+                pass
+        if self._placeholder is None:
+            self._placeholder = placeholder_png()
+        return self._placeholder
+
+    def prefetch(self, urls: Iterable[str]) -> List[str]:
+        """미리 받아 두기. 실패한 URL 목록 반환."""
+        return [u for u in urls if self.resolve(u) is None]
+
+
+def _drug_data_images() -> List[str]:
+    data = json.loads(Path(__file__).with_name("data").joinpath("drug_data.json").read_text(encoding="utf-8"))
+    return [info["이미지"] for info in data["symptoms"].values()]
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="약 사진 로컬 캐시")
+    p.add_argument("cmd", choices=("prefetch", "stats"))
+    p.add_argument("--dir", default=str(DEFAULT_CACHE_DIR))
+    p.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    args = p.parse_args(argv)
+    cache = ImageCache(args.dir, args.max_bytes)
+    if args.cmd == "prefetch":
+        failed = cache.prefetch(_drug_data_images())
+        for u in failed:
+            print(f"실패: {u}", file=sys.stderr)
+        return 1 if failed else 0
+    print(f"{len(cache._index)} images, {cache.total_bytes()} bytes (max {cache.max_bytes})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,183 @@
+# batch.py — 과거 케이스 일괄 재평가 (헤드리스, 프로세스 풀)
+# -----------------------------------------------------------------------------
+# 사용 예:
+#   python batch.py cases.jsonl -o reports.jsonl --workers 8 --chunksize 256
+#   python batch.py cases.csv --unordered > reports.jsonl
+#   python batch.py cases.jsonl -o recs.parquet --output-format parquet
+#
+# 입력 케이스 형식:
+#   - JSONL: {"id": ..., "symptoms": ["두통", ...], "detail": "...", "tags": [...],
+#             "ctx": {"pregnant": true, ..., "meds": ["와파린"]}}   (ctx 키는 최상위에 써도 됨)
+#   - CSV  : id, symptoms, detail, tags, meds, pregnant, liver, ... 열.
+#            symptoms/tags/meds는 "/" 또는 "," 구분, 플래그는 1/true/y/예.
+#   - symptoms가 비어 있으면 detail에서 KB 증상 키를 찾아 사용.
+# 출력:
+#   - 케이스마다 engine.build_report 리포트 1줄(JSONL) + "case_id".
+#   - --output-format csv/parquet: 추천 약 행만 평탄화 (case_id, timestamp, kb_version + 추천 열).
+#     어느 형식이든 결과가 나오는 대로 흘려 쓰므로 전체를 메모리에 모으지 않음.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import csv
+import json
+import sys
+from itertools import islice
+from multiprocessing import Pool
+from typing import Any, Dict, Iterable, Iterator, List
+
+import export
+from engine import DEFAULT_KB_PATH, KnowledgeBase, build_report, detect_symptoms, load_kb_file
+from rules import CTX_FLAGS
+
+TRUE_VALUES = {"1", "true", "t", "y", "yes", "예", "o"}
+
+
+# =============================
+# 1) 입력 파싱
+# =============================
+
+def _split_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [t.strip() for t in str(value).replace("/", ",").split(",") if t.strip()]
+
+
+def _flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in TRUE_VALUES
+    return bool(value)
+
+
+def normalize_case(raw: Dict[str, Any], case_id: Any) -> Dict[str, Any]:
+    """JSONL/CSV 한 행을 엔진 입력 형태로 정규화."""
+    ctx_src = raw.get("ctx") or raw
+    ctx: Dict[str, Any] = {k: _flag(ctx_src.get(k)) for k in CTX_FLAGS}
+    if ctx_src.get("age") not in (None, ""):
+        ctx["age"] = int(ctx_src["age"])
+    if ctx_src.get("sex"):
+        ctx["sex"] = ctx_src["sex"]
+    if ctx_src.get("meds"):
+        ctx["meds"] = _split_list(ctx_src["meds"])
+    return {
+        "case_id": raw.get("id", case_id),
+        "symptoms": _split_list(raw.get("symptoms")) or None,
+        "detail": str(raw.get("detail") or ""),
+        "tags": _split_list(raw.get("tags")),
+        "ctx": ctx,
+    }
+
+
+def read_cases(path: str, fmt: str | None = None) -> Iterator[Dict[str, Any]]:
+    """케이스를 한 줄씩 스트리밍으로 읽는다 ("-"는 표준입력)."""
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    fh = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            for i, row in enumerate(csv.DictReader(fh)):
+                yield normalize_case(row, i)
+        else:
+            for i, line in enumerate(fh):
+                if line.strip():
+                    yield normalize_case(json.loads(line), i)
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+# =============================
+# 2) 워커 (프로세스당 KB 1회 로드)
+# =============================
+
+_KB: KnowledgeBase | None = None
+
+
+def _init_worker(kb_path: str = str(DEFAULT_KB_PATH)) -> None:
+    global _KB
+    _KB = load_kb_file(kb_path)
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    if _KB is None:
+        _init_worker()
+    kb = _KB
+    selected = case["symptoms"]
+    if selected is None:
+        selected = detect_symptoms(kb, case["detail"])
+    report = build_report(kb, selected, case["detail"], case["tags"], case["ctx"])
+    return {"case_id": case["case_id"], **report}
+
+
+def _windows(it: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    it = iter(it)
+    while True:
+        window = list(islice(it, size))
+        if not window:
+            return
+        yield window
+
+
+def run_batch(
+    cases: Iterable[Dict[str, Any]],
+    workers: int = 0,
+    chunksize: int = 256,
+    ordered: bool = True,
+    kb_path: str = str(DEFAULT_KB_PATH),
+) -> Iterator[Dict[str, Any]]:
+    """케이스 스트림 → 리포트 스트림.
+    workers=0이면 현재 프로세스에서 실행. 입력은 창(window) 단위로만 읽어 메모리 상한 유지."""
+    if workers <= 0:
+        _init_worker(kb_path)
+        for case in cases:
+            yield run_case(case)
+        return
+    window = chunksize * workers * 4
+    with Pool(processes=workers, initializer=_init_worker, initargs=(kb_path,)) as pool:
+        for chunk in _windows(cases, window):
+            mapper = pool.imap if ordered else pool.imap_unordered
+            yield from mapper(run_case, chunk, chunksize=chunksize)
+
+
+# =============================
+# 3) CLI
+# =============================
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="증상 케이스 일괄 재평가 (JSONL/CSV → JSONL 리포트)")
+    p.add_argument("input", help="케이스 파일 경로 (.jsonl/.csv, '-'는 표준입력)")
+    p.add_argument("-o", "--output", default="-", help="출력 경로 (기본: 표준출력)")
+    p.add_argument("--output-format", choices=("ndjson", "csv", "parquet"), default="ndjson",
+                   help="출력 형식 (기본: ndjson = JSONL 리포트)")
+    p.add_argument("--kb", default=str(DEFAULT_KB_PATH), help="KB 파일 경로 (기본: data/kb.json)")
+    p.add_argument("--format", choices=("jsonl", "csv"), help="입력 형식 (기본: 확장자로 판단)")
+    p.add_argument("-w", "--workers", type=int, default=0, help="프로세스 수 (0: 단일 프로세스)")
+    p.add_argument("--chunksize", type=int, default=256, help="워커에 한 번에 넘길 케이스 수")
+    p.add_argument("--unordered", action="store_true", help="완료 순서대로 출력 (더 빠름)")
+    return p.parse_args(argv)
+
+
+def main(argv: List[str] | None = None) -> int:
+    args = parse_args(argv)
+    cases = read_cases(args.input, args.format)
+    records = run_batch(cases, args.workers, args.chunksize, ordered=not args.unordered, kb_path=args.kb)
+    if args.output_format == "parquet":
+        if args.output == "-":
+            print("parquet 출력에는 -o 경로가 필요합니다", file=sys.stderr)
+            return 2
+        n = export.write_parquet(records, args.output)
+    else:
+        write = export.write_csv if args.output_format == "csv" else export.write_ndjson
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+        try:
+            n = write(records, out)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+    print(f"{n} cases processed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,624 @@
+# bench.py — 추천 엔진 벤치마크 (합성 KB 10 ~ 100k)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - KB/코드 변경이 match_conditions, collect_red_flags, recommend_drugs,
+#     personalize_warnings를 느리게 만들었는지 숫자로 확인.
+#   - 약/규칙 수를 10 → 100k로 키운 합성 KB + 한국어 상세 문장으로 함수별 시간 측정,
+#     선택적으로 Streamlit AppTest로 test.py 전체 실행 시간도 측정.
+#   - startup: 새 인터프리터에서 import 시간 + 첫 렌더 시간 측정 (콜드 스타트).
+#     무거운 선택 의존성(pandas/pyarrow/numpy/PIL)이 첫 렌더까지 로드되면 실패.
+#   - kbshare: 공유 KB(KBStore, 프로세스당 1개 참조) vs rerun마다 cache_data처럼
+#     pickle 복사본을 만드는 방식 — rerun당 시간과 할당 바이트(tracemalloc) 비교.
+#   - drugmem: 약 1개당 메모리 — 이전 표현(리스트 dataclass) vs Drug(slots+intern),
+#     카탈로그에서 렌더할 약만 Drug로 만드는 경우.
+#   - answers: 자유 입력과 무관한 단계(추천/질환 기본 점수/개인 주의) — 직접 계산 vs 답 테이블 조회,
+#     사이드카 컴파일 시간/크기. 상세 없음(조회만)과 상세 있음(힌트 가산) 둘 다.
+#   - conditions: 규칙이 많은 증상에서 의심 질환 점수 — 이전 중첩 루프 vs 희소 행렬(파이썬/NumPy), top-k.
+#   - 결과는 JSON. compare 모드는 기준 대비 임계값 이상 느려지면 종료코드 1.
+# 사용 예:
+#   python bench.py run -o bench.json                       # 10,100,1k,10k,100k
+#   python bench.py run --sizes 10,1000 --apptest -o new.json
+#   python bench.py compare bench.json new.json --threshold 0.25
+#   python bench.py startup -o start.json --max-render-ms 150
+#   python bench.py compare start_base.json start.json --min-us 20000
+#   python bench.py kbshare --sizes 100,10000 -o share.json
+#   python bench.py drugmem --sizes 1000,100000
+#   python bench.py answers --sizes 100,10000
+#   python bench.py conditions --sizes 1000,100000
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import gc
+import json
+import pickle
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from itertools import islice
+from math import comb
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import engine
+from engine import (
+    Drug,
+    KnowledgeBase,
+    build_report,
+    collect_red_flags,
+    kb_from_dict,
+    match_conditions,
+    personalize_warnings,
+    recommend_drugs,
+)
+from rules import CTX_FLAGS
+
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000)
+SYLLABLES = "두통열기침가래콧물재채속쓰림소화불량설사생리복부허리목어지럼오한몸살구역빛소리민감야간악화신흉답답맑은혈변탈수"
+FILLERS = ["어제부터", "아침에", "며칠째", "밤마다", "계속", "조금", "심하게", "가끔", "식후에", "자고 나면"]
+CLASSES = ["해열진통제", "해열진통·소염제(NSAID)", "진해제", "거담제", "항히스타민제(2세대)", "위산분비억제제(H2RA)", "지사제"]
+ACTIVES = ["Acetaminophen", "Ibuprofen", "Naproxen", "Dextromethorphan", "Guaifenesin", "Cetirizine", "Famotidine", "Loperamide"]
+# 첫 렌더까지 로드되면 안 되는 무거운 선택 의존성 (기능을 실제로 쓸 때만 import)
+HEAVY_MODULES = ("pandas", "pyarrow", "numpy", "PIL")
+# answers 벤치에서 미리 채울 증상 조합 수 상한
+COMPILE_LIMIT = 50_000
+AVAILABILITY = ["약국 구매", "약국 + 일부 편의점 소포장", "처방전 필요"]
+
+
+# =============================
+# 1) 합성 KB / 입력
+# =============================
+
+def _word(rng: random.Random, lo: int = 2, hi: int = 3) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(lo, hi)))
+
+
+def synthetic_kb_dict(n: int, seed: int = 0) -> Dict[str, Any]:
+    """약 n개, 의심 질환 규칙 n개 규모의 kb.json 형식 dict."""
+    rng = random.Random(seed)
+    n_symptoms = max(4, n // 10)
+    symptoms: List[str] = []
+    seen = set()
+    while len(symptoms) < n_symptoms:
+        w = _word(rng, 2, 4)
+        if w not in seen:
+            seen.add(w)
+            symptoms.append(w)
+    drugs = [
+        Drug(
+            name=f"{_word(rng)}정{i}",
+            dclass=rng.choice(CLASSES),
+            actives=rng.sample(ACTIVES, rng.randint(1, 2)),
+            indications=rng.sample(symptoms, min(3, len(symptoms))),
+            avoid_if=[_word(rng) + " 환자"],
+            cautions=[f"{_word(rng)} 주의", f"{_word(rng)} 병용 시 상담"],
+            dose_note="성인 1정 1일 3회.",
+            availability=rng.choice(AVAILABILITY),
+        )
+        for i in range(n)
+    ]
+    symptom_to_drugs = {s: [] for s in symptoms}
+    for d in drugs:
+        for s in d.indications:
+            if len(symptom_to_drugs[s]) < 8:
+                symptom_to_drugs[s].append(d.name)
+    condition_rules: Dict[str, List[Dict[str, str]]] = {s: [] for s in symptoms}
+    for i in range(n):
+        s = symptoms[i % n_symptoms]
+        condition_rules[s].append({
+            "name": f"{_word(rng)}증후군{i}",
+            "hints": "/".join(_word(rng) for _ in range(3)),
+            "notes": f"{_word(rng)} 권장",
+        })
+    red_flags = [
+        [s, "/".join(_word(rng, 2, 4) for _ in range(3)), "진료 권장"]
+        for s in symptoms
+    ]
+    return {
+        "schema": engine.KB_SCHEMA,
+        "version": f"synthetic-{n}",
+        "drugs": [asdict(d) for d in drugs],
+        "symptom_to_drugs": symptom_to_drugs,
+        "condition_rules": condition_rules,
+        "red_flags": red_flags,
+    }
+
+
+def detail_texts(kb: KnowledgeBase, count: int, seed: int = 1) -> List[str]:
+    """KB 힌트/빨간 깃발 문구를 섞은 한국어 상세 문장."""
+    rng = random.Random(seed)
+    hints = [h for rules in kb.condition_rules.values() for r in rules for h in r["hints"].split("/")]
+    flags = [tok for _, rf, _ in kb.red_flags for tok in rf.split("/")]
+    texts = []
+    for _ in range(count):
+        parts = [rng.choice(FILLERS)]
+        parts += rng.sample(hints, min(3, len(hints)))
+        if rng.random() < 0.3:
+            parts.append(rng.choice(flags))
+        parts += [rng.choice(FILLERS), "그리고", _word(rng)]
+        rng.shuffle(parts)
+        texts.append(" ".join(parts))
+    return texts
+
+
+# =============================
+# 2) 측정
+# =============================
+
+def _timeit(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    samples.sort()
+    return {
+        "median_us": statistics.median(samples),
+        "p95_us": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "repeat": repeat,
+    }
+
+
+def bench_engine(n: int, repeat: int = 200, seed: int = 0) -> List[Dict[str, Any]]:
+    data = synthetic_kb_dict(n, seed)
+    t0 = time.perf_counter()
+    kb = kb_from_dict(data)
+    results = [{"name": "build_kb", "size": n, "median_us": (time.perf_counter() - t0) * 1e6, "p95_us": 0.0, "repeat": 1}]
+
+    rng = random.Random(seed + 1)
+    symptoms = list(kb.symptom_to_drugs)
+    cases = [
+        (rng.sample(symptoms, min(3, len(symptoms))), text, {f: rng.random() < 0.3 for f in CTX_FLAGS})
+        for text in detail_texts(kb, repeat, seed + 2)
+    ]
+    it = iter(range(10**9))
+
+    def case() -> Tuple[List[str], str, Dict[str, Any]]:
+        return cases[next(it) % len(cases)]
+
+    def run_report() -> None:
+        selected, detail, ctx = case()
+        build_report(kb, selected, detail, [], ctx)
+
+    def run_personalize() -> None:
+        selected, _, ctx = case()
+        for d in recommend_drugs(kb, selected):
+            personalize_warnings(kb, d, ctx)
+
+    funcs: Dict[str, Callable[[], Any]] = {
+        "match_conditions": lambda: match_conditions(kb, *case()[:2]),
+        "collect_red_flags": lambda: collect_red_flags(kb, *case()[:2]),
+        "recommend_drugs": lambda: recommend_drugs(kb, case()[0]),
+        "personalize_warnings": run_personalize,
+        "build_report": run_report,
+    }
+    for name, fn in funcs.items():
+        results.append({"name": name, "size": n, **_timeit(fn, repeat)})
+    return results
+
+
+def bench_apptest(n: int, repeat: int = 5, seed: int = 0) -> Dict[str, Any]:
+    """test.py 전체 실행(AppTest) — 증상 3개 선택 + 상세 입력 후 rerun 시간."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    app = str(Path(__file__).with_name("test.py"))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "kb.json"
+        path.write_text(json.dumps(synthetic_kb_dict(n, seed), ensure_ascii=False), encoding="utf-8")
+        old_path = engine.DEFAULT_KB_PATH
+        engine.DEFAULT_KB_PATH = path  # test.py가 실행 시점에 engine에서 읽어 간다
+        try:
+            st.cache_resource.clear()
+            st.cache_data.clear()
+            at = AppTest.from_file(app, default_timeout=600)
+            at.run()
+            for t in at.toggle[:3]:
+                t.set_value(True)
+            texts = detail_texts(engine.load_kb_file(path), repeat, seed + 2)
+            samples = []
+            for text in texts:
+                at.text_area[0].input(text)
+                t0 = time.perf_counter()
+                at.run()
+                samples.append((time.perf_counter() - t0) * 1e6)
+                if at.exception:
+                    raise RuntimeError(at.exception[0].message)
+        finally:
+            engine.DEFAULT_KB_PATH = old_path
+            st.cache_resource.clear()
+    samples.sort()
+    return {"name": "apptest_rerun", "size": n, "median_us": statistics.median(samples), "p95_us": samples[-1], "repeat": repeat}
+
+
+# 새 인터프리터에서 실행 — argv[1] = 앱 경로. 결과 JSON 1줄 출력.
+STARTUP_PROBE = """
+import json, os, sys, time
+os.environ["METRICS"] = "1"
+t0 = time.perf_counter()
+import streamlit
+t1 = time.perf_counter()
+import engine, export, kbstore, metrics, render, reportcache
+t2 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=120)
+at.run()
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+stages = metrics.STAGES.snapshot()
+print(json.dumps({
+    "import_streamlit": t1 - t0,
+    "import_app": t2 - t1,
+    "first_render": stages["page.total"][-2],
+    "kb_load": stages["page.load_kb"][-2],
+    "modules": [m for m in sys.argv[2:] if m in sys.modules],
+}))
+"""
+
+
+def bench_startup(repeat: int = 5) -> Dict[str, Any]:
+    """콜드 스타트: 매번 새 프로세스에서 streamlit/앱 모듈 import + 첫 rerun(page.total) 시간."""
+    app = Path(__file__).with_name("test.py")
+    samples: Dict[str, List[float]] = {}
+    heavy: set = set()
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE, str(app), *HEAVY_MODULES],
+            cwd=app.parent, capture_output=True, text=True, check=True,
+        )
+        probe = json.loads(proc.stdout.strip().splitlines()[-1])
+        heavy.update(probe.pop("modules"))
+        for name, seconds in probe.items():
+            samples.setdefault(name, []).append(seconds * 1e6)
+    results = []
+    for name, values in samples.items():
+        values.sort()
+        results.append({
+            "name": f"startup.{name}", "size": 0,
+            "median_us": statistics.median(values), "p95_us": values[-1], "repeat": repeat,
+        })
+    return {"results": results, "heavy_modules": sorted(heavy)}
+
+
+def _retained(fn: Callable[[], Any]) -> Tuple[Any, int]:
+    """fn() 결과와, 호출 후에도 남아 있는 새 할당 바이트 (tracemalloc)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = fn()
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, retained
+
+
+@dataclass
+class _ListDrug:
+    """슬롯/튜플/intern 없는 Drug 표현 (목록 필드는 가변 리스트, 인스턴스마다 __dict__) — drugmem 비교 기준."""
+    name: str
+    dclass: str
+    actives: List[str]
+    indications: List[str]
+    avoid_if: List[str] = field(default_factory=list)
+    cautions: List[str] = field(default_factory=list)
+    dose_note: str = ""
+    availability: str = "약국 구매"
+
+
+def bench_drugmem(n: int, page: int = 20, seed: int = 0) -> List[Dict[str, Any]]:
+    """약 n개를 JSON에서 올릴 때 약 1개당 메모리: 이전 표현 vs Drug(slots+intern),
+    그리고 카탈로그(CatalogKB)에서 렌더할 page개만 Drug로 만들 때의 비용."""
+    from catalog import build_catalog, open_catalog
+
+    data = synthetic_kb_dict(n, seed)
+    text = json.dumps(data["drugs"], ensure_ascii=False)
+    results = []
+    for name, cls in (("drug.list_dataclass", _ListDrug), ("drug.compact", Drug)):
+        t0 = time.perf_counter()
+        drugs, size = _retained(lambda: [cls(**raw) for raw in json.loads(text)])
+        elapsed = (time.perf_counter() - t0) * 1e6
+        results.append({"name": name, "size": n, "median_us": elapsed, "p95_us": elapsed, "repeat": 1,
+                        "bytes": size, "bytes_per_drug": size / len(drugs)})
+        del drugs
+
+    with tempfile.TemporaryDirectory() as tmp:
+        kb_path, db_path = Path(tmp) / "kb.json", Path(tmp) / "kb.sqlite"
+        kb_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        build_catalog(kb_path, db_path)
+        kb = open_catalog(db_path)
+        names = list(islice(kb.by_name, page))  # 이름만 — Drug는 아래에서 처음 만들어진다
+        t0 = time.perf_counter()
+        shown, size = _retained(lambda: [kb.by_name[name] for name in names])
+        elapsed = (time.perf_counter() - t0) * 1e6
+        results.append({"name": "drug.catalog_page", "size": n, "median_us": elapsed, "p95_us": elapsed, "repeat": 1,
+                        "bytes": size, "bytes_per_drug": size / max(len(shown), 1)})
+    return results
+
+
+def bench_kbshare(n: int, repeat: int = 20, seed: int = 0) -> List[Dict[str, Any]]:
+    """rerun 1회가 KB를 얻는 비용: cache_data식 복사(pickle 왕복) vs 공유 참조(KBStore.current).
+    bytes = 1회 호출 동안 새로 할당되어 남는 메모리 (세션마다 복사본을 쥐면 세션 수만큼 곱해진다)."""
+    from kbstore import KBStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "kb.json"
+        path.write_text(json.dumps(synthetic_kb_dict(n, seed), ensure_ascii=False), encoding="utf-8")
+        store = KBStore(path)
+        kb = store.current()
+        blob = pickle.dumps(kb, protocol=pickle.HIGHEST_PROTOCOL)
+        funcs: Dict[str, Callable[[], Any]] = {
+            "kb.copy_per_rerun": lambda: pickle.loads(pickle.dumps(kb, protocol=pickle.HIGHEST_PROTOCOL)),
+            "kb.shared": store.current,
+        }
+        results = [
+            {"name": name, "size": n, **_timeit(fn, repeat), "bytes": _retained(fn)[1]}
+            for name, fn in funcs.items()
+        ]
+    results.append({"name": "kb.pickled", "size": n, "median_us": 0.0, "p95_us": 0.0, "repeat": 1, "bytes": len(blob)})
+    return results
+
+
+def bench_answers(n: int, repeat: int = 200, max_symptoms: int = 3, seed: int = 0) -> List[Dict[str, Any]]:
+    """증상(UI처럼 가나다순) + ctx 케이스에서 추천 순위/질환/개인 주의 3단계: 직접 계산 vs 답 테이블 조회.
+    직접 계산 = 빈 답 테이블(증상 목록이 없어 어떤 선택도 조회하지 않음)로 같은 단계 함수를 실행.
+    answers.compile = 선택 증상 max_symptoms개 이하를 미리 채우는 시간, bytes = 사이드카 크기."""
+    from dataclasses import replace
+
+    from answers import AnswerTable, compile_answers
+    from engine import answer_conditions, answer_personal_warnings, ranked_rows
+
+    kb = kb_from_dict(synthetic_kb_dict(n, seed))
+    symptoms = list(kb.symptom_to_drugs)
+    # 칩이 많으면 조합 수가 폭발 — 미리 채우는 건 조합 COMPILE_LIMIT개까지, 나머지는 조회 시 채움
+    k = 0
+    while k < max_symptoms and sum(comb(len(symptoms), i) for i in range(1, k + 2)) <= COMPILE_LIMIT:
+        k += 1
+    t0 = time.perf_counter()
+    table = compile_answers(kb, k)
+    elapsed = (time.perf_counter() - t0) * 1e6
+    blob = json.dumps(table.to_dict(), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    results = [{"name": "answers.compile", "size": n, "median_us": elapsed, "p95_us": elapsed, "repeat": 1,
+                "bytes": len(blob), "entries": len(table), "max_symptoms": k}]
+    direct_kb, kb = replace(kb, answers=AnswerTable()), replace(kb, answers=table)
+
+    rng = random.Random(seed + 1)
+    texts = detail_texts(kb, repeat, seed + 2)
+    cases = []
+    for text in texts:
+        picked = set(rng.sample(symptoms, min(rng.randint(1, max_symptoms), len(symptoms))))
+        cases.append((sorted(picked), text, {f: rng.random() < 0.3 for f in CTX_FLAGS}))
+    it = iter(range(10**9))
+
+    def stages(target: KnowledgeBase, with_detail: bool) -> Callable[[], None]:
+        def fn() -> None:
+            selected, detail, ctx = cases[next(it) % len(cases)]
+            rows = ranked_rows(target, selected, ctx, [])
+            answer_conditions(target, selected, detail if with_detail else "")
+            answer_personal_warnings(target, selected, ctx, rows)
+        return fn
+
+    funcs: Dict[str, Callable[[], Any]] = {
+        "answers.direct": stages(direct_kb, False),
+        "answers.table": stages(kb, False),
+        "answers.direct_detail": stages(direct_kb, True),
+        "answers.table_detail": stages(kb, True),
+    }
+    # 미리 채우지 못한 조합은 첫 조회에 채워진다 — 측정은 채워진 뒤. 키워드 스캔 메모도 양쪽 공평하게 미리 데움
+    for _ in cases:
+        funcs["answers.table_detail"]()
+    for name, fn in funcs.items():
+        results.append({"name": name, "size": n, **_timeit(fn, repeat)})
+    return results
+
+
+def _nested_conditions(kb: KnowledgeBase, selected: List[str], detail: str) -> List[Dict[str, Any]]:
+    """이전 match_conditions (증상 → 규칙 → 힌트 중첩 루프) — 비교 기준."""
+    results: List[Dict[str, Any]] = []
+    hits = engine.keyword_hits(kb, detail)
+    for s in selected:
+        for rule in kb.condition_rules.get(s, []):
+            hints = [h.strip() for h in rule["hints"].split("/")]
+            score = 1 + sum(1 for h in hints if ("hint", h) in hits)
+            results.append({"name": rule["name"], "symptom": s, "score": score, "notes": rule["notes"]})
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results
+
+
+def bench_conditions(n: int, repeat: int = 20, k: int = 6, seed: int = 0) -> List[Dict[str, Any]]:
+    """의심 질환 규칙 n개를 증상 3개에 몰아 둔 KB에서 3개 모두 선택 — 규칙 n개 점수 계산.
+    conditions.top_k = 화면에 보이는 k개만 (argpartition). 결과가 이전 루프와 다르면 AssertionError."""
+    import scoring
+
+    data = synthetic_kb_dict(max(n // 10, 40), seed)
+    rules = [r for rs in synthetic_kb_dict(n, seed)["condition_rules"].values() for r in rs]
+    selected = list(data["symptom_to_drugs"])[:3]
+    data["condition_rules"] = {s: rules[i::3] for i, s in enumerate(selected)}
+    kb = kb_from_dict(data)
+    texts = [" ".join(r["hints"].split("/")[:2]) for r in rules[:: max(len(rules) // repeat, 1)]][:repeat]
+    for text in texts:  # 키워드 스캔 메모를 미리 데움 — 점수 계산만 비교
+        assert match_conditions(kb, selected, text) == _nested_conditions(kb, selected, text)
+    it = iter(range(10**9))
+
+    def text() -> str:
+        return texts[next(it) % len(texts)]
+
+    def with_min(vmin: int, fn: Callable[[], Any]) -> Callable[[], Any]:
+        def run_() -> Any:
+            scoring.VECTOR_MIN_RULES = vmin
+            return fn()
+        return run_
+
+    old_min = scoring.VECTOR_MIN_RULES
+    funcs: Dict[str, Callable[[], Any]] = {
+        "conditions.nested": lambda: _nested_conditions(kb, selected, text()),
+        "conditions.sparse_py": with_min(1 << 62, lambda: match_conditions(kb, selected, text())),
+        "conditions.sparse_np": with_min(1, lambda: match_conditions(kb, selected, text())),
+        "conditions.top_k": with_min(1, lambda: match_conditions(kb, selected, text(), limit=k)),
+    }
+    try:
+        return [{"name": name, "size": n, **_timeit(fn, repeat)} for name, fn in funcs.items()]
+    finally:
+        scoring.VECTOR_MIN_RULES = old_min
+
+
+def run(sizes: List[int], repeat: int, apptest: bool) -> Dict[str, Any]:
+    results: List[Dict[str, Any]] = []
+    for n in sizes:
+        results.extend(bench_engine(n, repeat))
+        if apptest:
+            results.append(bench_apptest(n))
+        print(f"size {n}: done", file=sys.stderr)
+    return {"meta": _meta(sizes=sizes), "results": results}
+
+
+# =============================
+# 3) 비교
+# =============================
+
+def compare(
+    base: Dict[str, Any],
+    new: Dict[str, Any],
+    threshold: float,
+    metric: str = "median_us",
+    min_us: float = 5.0,
+) -> List[str]:
+    """(name, size)별로 new가 base보다 threshold 비율 이상 느리면 회귀 목록에 추가.
+    min_us보다 작은 절대 차이는 측정 잡음으로 보고 무시."""
+    old = {(r["name"], r["size"]): r for r in base["results"]}
+    regressions = []
+    for r in new["results"]:
+        b = old.get((r["name"], r["size"]))
+        if not b or not b[metric]:
+            continue
+        ratio = r[metric] / b[metric]
+        line = f"{r['name']:<22} n={r['size']:<7} {b[metric]:>12.1f} → {r[metric]:>12.1f} us  ({ratio:.2f}x)"
+        print(line)
+        if ratio > 1 + threshold and r[metric] - b[metric] > min_us:
+            regressions.append(line)
+    return regressions
+
+
+def _meta(**extra: Any) -> Dict[str, Any]:
+    return {"timestamp": datetime.now().isoformat(), "python": platform.python_version(),
+            "platform": platform.platform(), **extra}
+
+
+def _write(result: Dict[str, Any], output: str) -> None:
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if output == "-":
+        print(text)
+    else:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+
+
+def _report(results: List[Dict[str, Any]], output: str, line: Callable[[Dict[str, Any]], str]) -> None:
+    """결과 JSON 기록 + 항목별 요약 한 줄씩 stderr로."""
+    _write({"meta": _meta(), "results": results}, output)
+    for r in results:
+        print(line(r), file=sys.stderr)
+
+
+def _sizes(text: str) -> List[int]:
+    return [int(s) for s in text.split(",")]
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="추천 엔진 벤치마크")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="벤치마크 실행")
+    r.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="약/규칙 수 목록 (쉼표)")
+    r.add_argument("--repeat", type=int, default=200, help="함수별 반복 횟수")
+    r.add_argument("--apptest", action="store_true", help="Streamlit AppTest 전체 실행도 측정")
+    r.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    c = sub.add_parser("compare", help="기준 결과와 비교 — 회귀 시 종료코드 1")
+    c.add_argument("baseline")
+    c.add_argument("current")
+    c.add_argument("--threshold", type=float, default=0.25, help="허용 느려짐 비율 (0.25 = 25%%)")
+    c.add_argument("--metric", choices=("median_us", "p95_us"), default="median_us")
+    c.add_argument("--min-us", type=float, default=5.0, help="이보다 작은 절대 차이(us)는 무시")
+    st_ = sub.add_parser("startup", help="콜드 스타트 측정 — 예산 초과/무거운 import 시 종료코드 1")
+    st_.add_argument("--repeat", type=int, default=5, help="새 프로세스 실행 횟수")
+    st_.add_argument("--max-import-ms", type=float, help="streamlit 제외 앱 모듈 import 예산 (중앙값)")
+    st_.add_argument("--max-render-ms", type=float, help="첫 렌더(page.total) 예산 (중앙값)")
+    st_.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    k = sub.add_parser("kbshare", help="공유 KB vs rerun마다 복사 — 시간/메모리")
+    k.add_argument("--sizes", default="100,1000,10000", help="약/규칙 수 목록 (쉼표)")
+    k.add_argument("--repeat", type=int, default=20)
+    k.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    m = sub.add_parser("drugmem", help="약 1개당 메모리 — 이전 표현 vs 압축 표현 vs 카탈로그")
+    m.add_argument("--sizes", default="1000,10000", help="약 수 목록 (쉼표)")
+    m.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    a = sub.add_parser("answers", help="추천/질환/개인 주의 — 직접 계산 vs 답 테이블 조회")
+    a.add_argument("--sizes", default="100,10000", help="약/규칙 수 목록 (쉼표)")
+    a.add_argument("--repeat", type=int, default=200)
+    a.add_argument("--max-symptoms", type=int, default=3, help="미리 채울 선택 증상 수 상한")
+    a.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    cd = sub.add_parser("conditions", help="의심 질환 점수 — 이전 중첩 루프 vs 희소 행렬/NumPy/top-k")
+    cd.add_argument("--sizes", default="1000,10000,100000", help="규칙 수 목록 (쉼표)")
+    cd.add_argument("--repeat", type=int, default=20)
+    cd.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    args = p.parse_args(argv)
+
+    if args.cmd == "conditions":
+        _report([r for n in _sizes(args.sizes) for r in bench_conditions(n, args.repeat)], args.output,
+                lambda r: f"{r['name']:<22} n={r['size']:<7} {r['median_us']:>12.1f} us")
+        return 0
+
+    if args.cmd == "answers":
+        def answers_line(r: Dict[str, Any]) -> str:
+            extra = (f"  {r['bytes'] / 1024:.1f} KiB, {r['entries']} entries, 증상 {r['max_symptoms']}개까지"
+                     if "bytes" in r else "")
+            return f"{r['name']:<22} n={r['size']:<7} {r['median_us']:>12.1f} us{extra}"
+
+        _report([r for n in _sizes(args.sizes) for r in bench_answers(n, args.repeat, args.max_symptoms)],
+                args.output, answers_line)
+        return 0
+
+    if args.cmd == "drugmem":
+        _report([r for n in _sizes(args.sizes) for r in bench_drugmem(n)], args.output,
+                lambda r: f"{r['name']:<20} n={r['size']:<7} {r['bytes_per_drug']:>10.0f} B/drug")
+        return 0
+
+    if args.cmd == "kbshare":
+        _report([r for n in _sizes(args.sizes) for r in bench_kbshare(n, args.repeat)], args.output,
+                lambda r: f"{r['name']:<18} n={r['size']:<7} {r['median_us']:>12.1f} us  {r['bytes'] / 1024:>10.1f} KiB")
+        return 0
+
+    if args.cmd == "startup":
+        startup = bench_startup(args.repeat)
+        _write({"meta": _meta(heavy_modules=startup["heavy_modules"]), "results": startup["results"]}, args.output)
+        by_name = {r["name"]: r["median_us"] / 1000 for r in startup["results"]}
+        failures = []
+        if startup["heavy_modules"]:
+            failures.append(f"첫 렌더까지 무거운 모듈 로드됨: {', '.join(startup['heavy_modules'])}")
+        for key, budget in (("startup.import_app", args.max_import_ms), ("startup.first_render", args.max_render_ms)):
+            if budget is not None and by_name[key] > budget:
+                failures.append(f"{key} {by_name[key]:.1f} ms > 예산 {budget:.1f} ms")
+        for line in failures:
+            print(line, file=sys.stderr)
+        return 1 if failures else 0
+
+    if args.cmd == "run":
+        _write(run(_sizes(args.sizes), args.repeat, args.apptest), args.output)
+        return 0
+
+    base = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+    new = json.loads(Path(args.current).read_text(encoding="utf-8"))
+    regressions = compare(base, new, args.threshold, args.metric, args.min_us)
+    if regressions:
+        print(f"\n{len(regressions)}개 회귀 (>{args.threshold:.0%}):", file=sys.stderr)
+        for line in regressions:
+            print("  " + line, file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,443 @@
+# catalog.py — 전체 OTC 제품 카탈로그용 SQLite(FTS5) 지식 베이스
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 수만 개 제품을 파이썬 리스트로 들고 있지 않고 SQLite에 두고 필요한 만큼만 조회.
+#   - 약/성분/적응증/주의사항은 FTS5 색인 → 적응증·전문(全文) 검색을 bm25 순위로.
+#     토크나이저는 trigram — 한글은 띄어쓰기 단위 토큰이 아니라 부분 문자열로 찾아야 한다
+#     ("두통"이 "편두통"/"두통약" 안에서도 걸림).
+#   - trigram은 3글자 미만을 못 찾는데 두통/기침/설사/발열처럼 2글자 증상이 가장 흔하다 →
+#     약명/분류/성분/적응증의 2글자 조각(bigram) 색인 drug_grams로 찾고 조각 등장 횟수로 순위.
+#     (주의사항 열의 짧은 검색어만 LIKE 전체 스캔)
+#   - CatalogKB는 KnowledgeBase와 같은 속성(by_name, by_symptom, ...)을 제공하므로
+#     engine의 recommend_drugs / match_conditions 등을 그대로 쓴다. 조회 결과는 LRU로 상한 유지.
+# 사용 예:
+#   python catalog.py build data/kb.json data/catalog.sqlite --products products.jsonl
+#   python catalog.py search data/catalog.sqlite "두통"
+#   KB_PATH=data/catalog.sqlite streamlit run test.py
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from answers import AnswerTable
+from engine import KB_SCHEMA, Drug, compile_fuzzy, compile_matcher
+from interactions import compile_interactions
+from rules import compile_rules
+from scoring import ConditionScorer
+
+SCHEMA_SQL = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE drugs (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    dclass TEXT NOT NULL,
+    dose_note TEXT NOT NULL,
+    availability TEXT NOT NULL,
+    body TEXT NOT NULL              -- actives/indications/avoid_if/cautions (JSON)
+);
+CREATE TABLE drug_actives (active TEXT NOT NULL, drug_id INTEGER NOT NULL, PRIMARY KEY (active, drug_id)) WITHOUT ROWID;
+CREATE TABLE symptom_drugs (symptom TEXT NOT NULL, pos INTEGER NOT NULL, drug_id INTEGER NOT NULL, PRIMARY KEY (symptom, pos)) WITHOUT ROWID;
+CREATE TABLE condition_rules (symptom TEXT NOT NULL, pos INTEGER NOT NULL, name TEXT NOT NULL, hints TEXT NOT NULL, notes TEXT NOT NULL, PRIMARY KEY (symptom, pos)) WITHOUT ROWID;
+CREATE TABLE red_flags (pos INTEGER PRIMARY KEY, symptom TEXT NOT NULL, phrase TEXT NOT NULL, action TEXT NOT NULL);
+CREATE TABLE drug_grams (
+    gram TEXT NOT NULL, col INTEGER NOT NULL, drug_id INTEGER NOT NULL,
+    n INTEGER NOT NULL,             -- 열 안 등장 횟수
+    len INTEGER NOT NULL,           -- 열 글자 수 (같은 횟수면 짧은 쪽이 더 구체적)
+    PRIMARY KEY (gram, col, n DESC, len, drug_id)  -- 조각별 상위 k개를 정렬 없이 앞에서 읽음
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE drug_fts USING fts5(name, dclass, actives, indications, cautions, content='', tokenize='trigram');
+"""
+
+LIST_FIELDS = ("actives", "indications", "avoid_if", "cautions")
+
+# trigram 색인이 찾을 수 있는 최소 검색어 길이 — 더 짧으면 drug_grams 색인
+FTS_MIN_CHARS = 3
+
+# drug_grams에 색인하는 열 (col 번호 = 순서). 열 끝 글자도 1글자 검색에 걸리도록 GRAM_END를 붙여 자른다
+GRAM_COLUMNS: Tuple[str, ...] = ("name", "dclass", "actives", "indications")
+GRAM_END = "\x1f"
+
+# drug_grams에 없는 열의 짧은 검색어(LIKE) — FTS 열 → drugs 테이블 식
+LIKE_COLUMNS = {
+    "name": "d.name",
+    "dclass": "d.dclass",
+    "actives": "json_extract(d.body, '$.actives')",
+    "indications": "json_extract(d.body, '$.indications')",
+    "cautions": "json_extract(d.body, '$.cautions')",
+}
+
+
+# =============================
+# 1) 빌드 (kb.json + 제품 목록 → SQLite)
+# =============================
+
+def _fts_phrase(text: str) -> str:
+    """FTS5 MATCH용 구문 인용 (따옴표 이스케이프)."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _grams(text: str) -> Dict[str, int]:
+    """소문자 2글자 조각 → 등장 횟수 (끝 글자는 GRAM_END와 짝)."""
+    text = text.lower() + GRAM_END
+    counts: Dict[str, int] = {}
+    for i in range(len(text) - 1):
+        g = text[i:i + 2]
+        counts[g] = counts.get(g, 0) + 1
+    return counts
+
+
+def _like_pattern(text: str) -> str:
+    """LIKE ... ESCAPE '\\'용 부분 문자열 패턴."""
+    return "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def build_catalog(
+    kb_json: str | os.PathLike,
+    db_path: str | os.PathLike,
+    products: Iterable[Dict[str, Any]] = (),
+) -> str:
+    """카탈로그 DB 생성. 임시 파일에 쓴 뒤 os.replace로 교체(핫 리로드 중에도 안전). 버전 문자열 반환."""
+    raw = Path(kb_json).read_bytes()
+    data = json.loads(raw)
+    if data.get("schema") != KB_SCHEMA:
+        raise ValueError(f"지원하지 않는 KB 스키마: {data.get('schema')!r} (필요: {KB_SCHEMA})")
+    digest = hashlib.sha256(raw)
+
+    tmp = Path(f"{db_path}.tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp)
+    try:
+        con.executescript(SCHEMA_SQL)
+        ids: Dict[str, int] = {}
+
+        def add_drug(d: Dict[str, Any]) -> None:
+            drug = Drug(**d)  # 스키마 검증(알 수 없는 필드 → TypeError)
+            if drug.name in ids:
+                return  # 이름 중복 시 먼저 나온 항목 우선
+            body = json.dumps({f: getattr(drug, f) for f in LIST_FIELDS}, ensure_ascii=False)
+            cur = con.execute(
+                "INSERT INTO drugs (name, dclass, dose_note, availability, body) VALUES (?, ?, ?, ?, ?)",
+                (drug.name, drug.dclass, drug.dose_note, drug.availability, body),
+            )
+            ids[drug.name] = cur.lastrowid
+            con.executemany(
+                "INSERT OR IGNORE INTO drug_actives VALUES (?, ?)",
+                [(a, cur.lastrowid) for a in drug.actives],
+            )
+            actives, indications = " ".join(drug.actives), " / ".join(drug.indications)
+            con.execute(
+                "INSERT INTO drug_fts (rowid, name, dclass, actives, indications, cautions) VALUES (?, ?, ?, ?, ?, ?)",
+                (cur.lastrowid, drug.name, drug.dclass, actives, indications, " / ".join(drug.cautions)),
+            )
+            con.executemany(
+                "INSERT INTO drug_grams VALUES (?, ?, ?, ?, ?)",
+                [(g, col, cur.lastrowid, n, len(text))
+                 for col, text in enumerate((drug.name, drug.dclass, actives, indications))
+                 for g, n in _grams(text).items()],
+            )
+
+        for d in data["drugs"]:
+            add_drug(d)
+        for d in products:
+            digest.update(json.dumps(d, ensure_ascii=False, sort_keys=True).encode())
+            add_drug(d)
+
+        for s, names in data["symptom_to_drugs"].items():
+            con.executemany(
+                "INSERT INTO symptom_drugs VALUES (?, ?, ?)",
+                [(s, i, ids[n]) for i, n in enumerate(names) if n in ids],
+            )
+        for s, rules in data["condition_rules"].items():
+            con.executemany(
+                "INSERT INTO condition_rules VALUES (?, ?, ?, ?, ?)",
+                [(s, i, r["name"], r["hints"], r["notes"]) for i, r in enumerate(rules)],
+            )
+        con.executemany(
+            "INSERT INTO red_flags (symptom, phrase, action) VALUES (?, ?, ?)",
+            [tuple(rf) for rf in data["red_flags"]],
+        )
+        version = f"{data.get('version', '')}+{digest.hexdigest()[:12]}"
+        con.executemany("INSERT INTO meta VALUES (?, ?)", [("schema", str(KB_SCHEMA)), ("version", version)])
+        con.execute("INSERT INTO drug_fts (drug_fts) VALUES ('optimize')")
+        con.commit()
+    finally:
+        con.close()
+    os.replace(tmp, db_path)
+    return version
+
+
+# =============================
+# 2) 조회 (KnowledgeBase 호환)
+# =============================
+
+class _Lookup(Mapping):
+    """키 → 값 조회를 SQL로 하고 최근 결과만 LRU로 들고 있는 읽기 전용 매핑."""
+
+    def __init__(self, fetch: Callable[[str], Any], keys: Callable[[], Iterator[str]], size: int = 4096) -> None:
+        self._fetch = fetch
+        self._keys = keys
+        self._size = size
+        self._lru: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                return self._lru[key]
+        value = self._fetch(key)
+        if value is None:
+            raise KeyError(key)
+        with self._lock:
+            self._lru[key] = value
+            if len(self._lru) > self._size:
+                self._lru.popitem(last=False)
+        return value
+
+    def __iter__(self) -> Iterator[str]:
+        return self._keys()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._keys())
+
+
+class _DrugList(Sequence):
+    """전체 약 목록을 한꺼번에 올리지 않고 id 순서로 훑는 시퀀스."""
+
+    def __init__(self, kb: "CatalogKB") -> None:
+        self._kb = kb
+
+    def __len__(self) -> int:
+        return self._kb._query("SELECT count(*) FROM drugs")[0][0]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        rows = self._kb._query("SELECT name FROM drugs ORDER BY id LIMIT 1 OFFSET ?", (i if i >= 0 else len(self) + i,))
+        if not rows:
+            raise IndexError(i)
+        return self._kb.by_name[rows[0][0]]
+
+    def __iter__(self) -> Iterator[Drug]:
+        for (name,) in self._kb._conn().execute("SELECT name FROM drugs ORDER BY id"):
+            yield self._kb.by_name[name]
+
+
+def _close_all(conns: List[sqlite3.Connection]) -> None:
+    for con in conns:
+        con.close()
+
+
+class CatalogKB:
+    """SQLite 카탈로그를 KnowledgeBase처럼 쓰는 어댑터 (스레드별 읽기 전용 연결)."""
+
+    def __init__(self, path: str | os.PathLike, symptom_limit: int = 20, cache_size: int = 4096) -> None:
+        self.path = Path(path)
+        self.symptom_limit = symptom_limit
+        self._local = threading.local()
+        self._conns: List[sqlite3.Connection] = []  # close()에서 닫을 스레드별 연결
+        self._conns_lock = threading.Lock()
+        # 리로드로 교체된 KB는 마지막 사용자가 놓아 GC될 때 연결을 닫는다 (self를 잡지 않도록 리스트만 넘김)
+        weakref.finalize(self, _close_all, self._conns)
+        meta = dict(self._query("SELECT key, value FROM meta"))
+        if meta.get("schema") != str(KB_SCHEMA):
+            raise ValueError(f"지원하지 않는 KB 스키마: {meta.get('schema')!r} (필요: {KB_SCHEMA})")
+        self.version = meta["version"]
+        # drug_grams 이전에 만든 카탈로그 — 짧은 검색어는 LIKE로 (다시 빌드하면 색인 사용)
+        self._has_grams = bool(self._query("SELECT 1 FROM sqlite_master WHERE name = 'drug_grams'"))
+
+        # 증상 칩/빨간 깃발/매처 — 어휘 크기만큼만 메모리에 둔다 (약 본문은 올리지 않음)
+        symptom_to_drugs: Dict[str, List[str]] = {}
+        for s, name in self._query(
+            "SELECT s.symptom, d.name FROM symptom_drugs s JOIN drugs d ON d.id = s.drug_id ORDER BY s.symptom, s.pos"
+        ):
+            symptom_to_drugs.setdefault(s, []).append(name)
+        # 세션 간 공유되므로 KnowledgeBase와 같이 튜플로 고정
+        self.symptom_to_drugs: Dict[str, Tuple[str, ...]] = {s: tuple(v) for s, v in symptom_to_drugs.items()}
+        self.red_flags: Tuple[Tuple[str, str, str], ...] = tuple(
+            tuple(r) for r in self._query("SELECT symptom, phrase, action FROM red_flags ORDER BY pos")
+        )
+        self.drugs = _DrugList(self)
+        self.by_name = _Lookup(self._fetch_drug, self._iter_names, cache_size)
+        self.by_symptom = _Lookup(self._fetch_symptom, lambda: iter(self.symptom_to_drugs), cache_size)
+        self.by_ingredient = _Lookup(self._fetch_ingredient, self._iter_actives, cache_size)
+        self.condition_rules = _Lookup(self._fetch_rules, self._iter_rule_symptoms, cache_size)
+        rule_rows: Dict[str, List[Dict[str, str]]] = {}
+        for s, hints in self._query("SELECT symptom, hints FROM condition_rules"):
+            rule_rows.setdefault(s, []).append({"hints": hints})
+        self.matcher = compile_matcher(self.symptom_to_drugs, rule_rows, self.red_flags)
+        self.fuzzy = compile_fuzzy(self.symptom_to_drugs, rule_rows, self.red_flags)
+        self.rules = compile_rules([])  # 약 마스크는 첫 조회 시 계산 후 메모
+        self.condition_scorer = ConditionScorer(self.condition_rules, precompile=False)  # 증상 블록은 첫 조회 시
+        # 약 키는 첫 조회 시 계산, 복용 중인 약 이름은 약명 전문 검색으로 해석
+        self.interactions = compile_interactions([], lookup=self._find_by_name)
+        self.answers = AnswerTable(self.symptom_to_drugs)  # 사이드카 없음 — 조회 시 채움
+
+    # --- SQL ---
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            self._local.con = con
+            with self._conns_lock:
+                self._conns.append(con)
+        return con
+
+    def close(self) -> None:
+        """모든 스레드의 연결을 닫는다 (KB 리로드로 교체될 때). 이후 조회는 연결을 새로 연다."""
+        with self._conns_lock:
+            conns = self._conns[:]
+            self._conns.clear()  # 같은 리스트를 finalize가 들고 있다
+            self._local = threading.local()
+        _close_all(conns)
+
+    def _query(self, sql: str, args: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        return self._conn().execute(sql, args).fetchall()
+
+    def _fetch_drug(self, name: str) -> Drug | None:
+        rows = self._query("SELECT name, dclass, dose_note, availability, body FROM drugs WHERE name = ?", (name,))
+        if not rows:
+            return None
+        name, dclass, dose_note, availability, body = rows[0]
+        return Drug(name=name, dclass=dclass, dose_note=dose_note, availability=availability, **json.loads(body))
+
+    def _drugs_by_ids(self, sql: str, args: Sequence[Any]) -> Tuple[Drug, ...]:
+        return tuple(self.by_name[name] for (name,) in self._query(sql, args))
+
+    def _fetch_symptom(self, symptom: str) -> Tuple[Drug, ...]:
+        """명시 매핑 먼저, 남는 자리는 적응증 검색(bm25 / 2글자 증상은 drug_grams 순위)으로 채운다."""
+        explicit = self._drugs_by_ids(
+            "SELECT d.name FROM symptom_drugs s JOIN drugs d ON d.id = s.drug_id WHERE s.symptom = ? ORDER BY s.pos",
+            (symptom,),
+        )
+        seen = {d.name for d in explicit}
+        ranked = [d for d in self.search(symptom, column="indications", limit=self.symptom_limit) if d.name not in seen]
+        return explicit + tuple(ranked[: max(0, self.symptom_limit - len(explicit))])
+
+    def _fetch_ingredient(self, active: str) -> Tuple[Drug, ...] | None:
+        found = self._drugs_by_ids(
+            "SELECT d.name FROM drug_actives a JOIN drugs d ON d.id = a.drug_id WHERE a.active = ? ORDER BY d.id",
+            (active,),
+        )
+        return found or None
+
+    def _fetch_rules(self, symptom: str) -> Tuple[Dict[str, str], ...] | None:
+        rows = self._query("SELECT name, hints, notes FROM condition_rules WHERE symptom = ? ORDER BY pos", (symptom,))
+        return tuple({"name": n, "hints": h, "notes": t} for n, h, t in rows) or None
+
+    def _iter_names(self) -> Iterator[str]:
+        return (name for (name,) in self._conn().execute("SELECT name FROM drugs ORDER BY id"))
+
+    def _iter_actives(self) -> Iterator[str]:
+        return (a for (a,) in self._query("SELECT DISTINCT active FROM drug_actives"))
+
+    def _iter_rule_symptoms(self) -> Iterator[str]:
+        return (s for (s,) in self._query("SELECT DISTINCT symptom FROM condition_rules"))
+
+    def _find_by_name(self, text: str) -> Drug | None:
+        """복용 중인 약 입력 → 약명 검색, 없으면 성분명 검색 ("ibuprofen")."""
+        found = self.search(text, column="name", limit=1) or self.search(text, column="actives", limit=1)
+        return found[0] if found else None
+
+    # --- 검색 ---
+    def search(self, text: str, column: str | None = None, limit: int = 20) -> List[Drug]:
+        """전문 검색 — column 지정 시 해당 열(indications 등)만. bm25 순위.
+        FTS_MIN_CHARS 미만 검색어는 drug_grams 색인 (조각 등장 횟수 → 짧은 열 순),
+        column=None이면 색인 열만 본다. 색인 없는 열/옛 카탈로그는 LIKE (순위 없이 id 순)."""
+        text = text.strip()
+        if not text:
+            return []
+        if len(text) < FTS_MIN_CHARS and self._has_grams and (column is None or column in GRAM_COLUMNS):
+            return self._search_grams(text.lower(), column, limit)
+        if len(text) < FTS_MIN_CHARS:
+            cols = [LIKE_COLUMNS[column]] if column is not None else list(LIKE_COLUMNS.values())
+            where = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in cols)
+            return list(self._drugs_by_ids(
+                f"SELECT d.name FROM drugs d WHERE {where} ORDER BY d.id LIMIT ?",
+                (*[_like_pattern(text)] * len(cols), limit),
+            ))
+        query = _fts_phrase(text) if column is None else f"{column} : {_fts_phrase(text)}"
+        return list(self._drugs_by_ids(
+            "SELECT d.name FROM drug_fts f JOIN drugs d ON d.id = f.rowid "
+            "WHERE drug_fts MATCH ? ORDER BY bm25(drug_fts) LIMIT ?",
+            (query, limit),
+        ))
+
+    def _search_grams(self, text: str, column: str | None, limit: int) -> List[Drug]:
+        if len(text) == 1:  # 그 글자로 시작하는 조각 전부 (기본 키 범위) — 드문 검색어라 모아서 정렬
+            where, args = "g.gram >= ? AND g.gram < ?", [text, text + "\U0010ffff"]
+            if column is not None:
+                where += " AND g.col = ?"
+                args.append(GRAM_COLUMNS.index(column))
+            return list(self._drugs_by_ids(
+                "SELECT d.name FROM (SELECT drug_id, sum(n) AS hits, min(len) AS len FROM drug_grams g "
+                f"WHERE {where} GROUP BY drug_id ORDER BY hits DESC, len, drug_id LIMIT ?) g "
+                "JOIN drugs d ON d.id = g.drug_id ORDER BY g.hits DESC, g.len, g.drug_id",
+                (*args, limit),
+            ))
+        # 2글자: 기본 키 (조각, 열, 횟수 DESC, 길이, id) 순서 그대로 열마다 앞에서 limit개만 읽는다.
+        # column=None이면 열별 상위를 합쳐 약마다 가장 잘 맞는 열 기준으로 다시 정렬 (열별 상위 limit개면 충분)
+        cols = range(len(GRAM_COLUMNS)) if column is None else (GRAM_COLUMNS.index(column),)
+        rows: List[Tuple[int, int, int, str]] = []
+        for col in cols:
+            rows += self._query(
+                "SELECT g.n, g.len, g.drug_id, d.name FROM drug_grams g JOIN drugs d ON d.id = g.drug_id "
+                "WHERE g.gram = ? AND g.col = ? ORDER BY g.n DESC, g.len, g.drug_id LIMIT ?",
+                (text, col, limit),
+            )
+        rows.sort(key=lambda r: (-r[0], r[1], r[2]))
+        names = list(dict.fromkeys(name for _, _, _, name in rows))[:limit]
+        return [self.by_name[name] for name in names]
+
+
+def open_catalog(path: str | os.PathLike) -> CatalogKB:
+    return CatalogKB(path)
+
+
+# =============================
+# 3) CLI
+# =============================
+
+def _read_products(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="SQLite(FTS5) 의약품 카탈로그 빌드/검색")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="kb.json (+ 제품 JSONL) → 카탈로그 DB")
+    b.add_argument("kb_json")
+    b.add_argument("db")
+    b.add_argument("--products", help="Drug 필드 형식의 제품 목록 JSONL")
+    s = sub.add_parser("search", help="전문 검색")
+    s.add_argument("db")
+    s.add_argument("query")
+    s.add_argument("--column", choices=("name", "dclass", "actives", "indications", "cautions"))
+    s.add_argument("-n", "--limit", type=int, default=10)
+    args = p.parse_args(argv)
+
+    if args.cmd == "build":
+        products = _read_products(args.products) if args.products else ()
+        print(build_catalog(args.kb_json, args.db, products))
+    else:
+        for d in open_catalog(args.db).search(args.query, column=args.column, limit=args.limit):
+            print(f"{d.name}\t{d.dclass}\t{', '.join(d.indications)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,459 @@
+# engine.py — 증상 기반 의약품 추천 엔진 (UI 비의존)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 지식 베이스 모델/컴파일과 추천 파이프라인
+#     (match_conditions → collect_red_flags → recommend_drugs → personalize_warnings → 리포트)을
+#     Streamlit 없이 import해서 쓸 수 있게 분리.
+#   - test.py(UI)와 batch.py(일괄 처리 CLI)가 같은 엔진을 공유한다.
+#   - Drug/KnowledgeBase는 frozen dataclass + 튜플 — 프로세스당 1개를 모든 세션/스레드가
+#     복사 없이 공유해도 안전하다 (test.py는 cache_resource/KBStore로 참조만 넘김).
+#   - Drug는 __slots__ + 문자열 intern으로 약 1개당 메모리를 줄인다 (측정: bench.py drugmem).
+#     수만 개 카탈로그는 catalog.CatalogKB — 렌더할 약만 Drug로 만든다.
+#   - 추천 약은 ranking.py 순위(증상 커버리지 − 금기/avoid_if 감점) 상위 k개만 — 카드/CSV 크기 상한.
+#   - 의심 질환 점수는 scoring.ConditionScorer — 규칙 × 힌트 희소 행렬 (규칙이 많으면 NumPy).
+#   - 자유 입력과 무관한 답(추천/개인 주의/질환 기본 점수)은 answers.AnswerTable 조회 —
+#     KB 배포 시 `python answers.py build`로 미리 채운 사이드카, 없으면 조회 시 채움.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field, fields, replace
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Callable, FrozenSet, Mapping, Sequence, Set, Tuple
+
+from answers import AnswerTable, answers_path, load_answers
+from fuzzy import FuzzyIndex
+from interactions import InteractionIndex, compile_interactions
+from matcher import KeywordMatcher
+from metrics import timed
+from ranking import DEFAULT_TOP_K, Candidate, RankWeights, avoid_terms, rank
+from rules import CompiledRules, compile_rules, ctx_mask
+from scoring import ConditionScorer, compile_conditions
+
+# KB 파일 — 환경변수 KB_PATH로 교체 가능
+DEFAULT_KB_PATH = Path(os.environ.get("KB_PATH", Path(__file__).with_name("data") / "kb.json"))
+KB_SCHEMA = 1
+
+
+# =============================
+# 1) 데이터 모델/지식 베이스
+# =============================
+
+@dataclass(frozen=True, slots=True)
+class Drug:
+    """약 1개 (불변, __slots__ — 인스턴스 __dict__ 없음).
+    목록 필드는 리스트로 넘겨도 튜플로 저장되고, 문자열은 sys.intern으로 공유된다
+    (분류/가용성/성분/주의 문구는 약마다 같은 값이 반복되므로 객체 하나만 남는다)."""
+    name: str
+    dclass: str
+    actives: Tuple[str, ...]
+    indications: Tuple[str, ...]
+    avoid_if: Tuple[str, ...] = ()
+    cautions: Tuple[str, ...] = ()
+    dose_note: str = ""
+    availability: str = "약국 구매"  # "약국 구매" | "약국 + 일부 편의점 소포장" | "처방전 필요"
+
+    def __post_init__(self) -> None:
+        for name in ("name", "dclass", "dose_note", "availability"):
+            object.__setattr__(self, name, sys.intern(getattr(self, name)))
+        for name in ("actives", "indications", "avoid_if", "cautions"):
+            object.__setattr__(self, name, tuple(sys.intern(v) for v in getattr(self, name)))
+
+
+@dataclass(frozen=True)
+class KnowledgeBase:
+    """컴파일된 지식 베이스 (불변 — 속성 재할당 불가, 목록은 튜플).
+    원본 테이블과 함께 이름/증상/성분 인덱스를 보관해 조회를 dict 한 번으로 끝낸다.
+    dict 인덱스는 build_kb 이후 아무도 고치지 않는다는 약속 하에 공유한다."""
+    drugs: Tuple[Drug, ...]
+    symptom_to_drugs: Mapping[str, Tuple[str, ...]]
+    condition_rules: Mapping[str, Tuple[Dict[str, str], ...]]
+    red_flags: Tuple[Tuple[str, str, str], ...]
+    by_name: Mapping[str, Drug] = field(default_factory=dict)
+    by_symptom: Mapping[str, Tuple[Drug, ...]] = field(default_factory=dict)
+    by_ingredient: Mapping[str, Tuple[Drug, ...]] = field(default_factory=dict)
+    matcher: KeywordMatcher = field(default_factory=KeywordMatcher)
+    fuzzy: FuzzyIndex = field(default_factory=FuzzyIndex)
+    rules: CompiledRules | None = None
+    condition_scorer: ConditionScorer = field(default_factory=lambda: ConditionScorer({}))
+    interactions: InteractionIndex = field(default_factory=InteractionIndex)
+    answers: AnswerTable = field(default_factory=AnswerTable)
+    version: str = ""
+
+
+def compile_matcher(
+    symptom_to_drugs: Mapping[str, Sequence[str]],
+    condition_rules: Mapping[str, Sequence[Dict[str, str]]],
+    red_flags: Sequence[Tuple[str, str, str]],
+) -> KeywordMatcher:
+    """증상 키/질환 힌트/빨간 깃발 문구를 하나의 오토마톤으로 컴파일.
+    payload는 (종류, 키워드) 튜플: "symptom" | "hint" | "red_flag"."""
+    m = KeywordMatcher()
+    for s in symptom_to_drugs:
+        m.add(s, ("symptom", s))
+    for rules in condition_rules.values():
+        for rule in rules:
+            for h in rule["hints"].split("/"):
+                h = h.strip()
+                # 힌트는 공백 단위 토큰 안에서 비교하므로 공백이 들어간 힌트는 원래도 매칭되지 않음
+                if h and not any(c.isspace() for c in h):
+                    m.add(h, ("hint", h))
+    for _, rf, _ in red_flags:
+        for tok in rf.split("/"):
+            m.add(tok, ("red_flag", tok))
+    m.build()
+    return m
+
+
+def compile_fuzzy(
+    symptom_to_drugs: Mapping[str, Sequence[str]],
+    condition_rules: Mapping[str, Sequence[Dict[str, str]]],
+    red_flags: Sequence[Tuple[str, str, str]],
+) -> FuzzyIndex:
+    """compile_matcher와 같은 payload로 오타/띄어쓰기 허용 색인 구축.
+    공백이 든 힌트("가슴 답답")는 공백을 무시하고 매칭된다. 빨간 깃발은 오타 허용 없이 정확 일치만."""
+    idx = FuzzyIndex()
+    for s in symptom_to_drugs:
+        idx.add(s, ("symptom", s))
+    for rules in condition_rules.values():
+        for rule in rules:
+            for h in rule["hints"].split("/"):
+                h = h.strip()
+                if h:
+                    idx.add(h, ("hint", h))
+    for _, rf, _ in red_flags:
+        for tok in rf.split("/"):
+            idx.add(tok, ("red_flag", tok), exact=True)
+    idx.build()
+    return idx
+
+
+def build_kb(
+    drugs: Sequence[Drug],
+    symptom_to_drugs: Mapping[str, Sequence[str]],
+    condition_rules: Mapping[str, Sequence[Dict[str, str]]],
+    red_flags: Sequence[Tuple[str, str, str]],
+    version: str = "",
+) -> KnowledgeBase:
+    """원본 테이블로부터 인덱스를 구축. 이름 참조는 여기서 한 번만 해석한다.
+    목록은 전부 튜플로 바꿔 넣는다 (호출자가 넘긴 리스트를 나중에 고쳐도 KB는 그대로)."""
+    drugs = tuple(drugs)
+    symptom_to_drugs = {s: tuple(sys.intern(n) for n in names) for s, names in symptom_to_drugs.items()}
+    condition_rules = {s: tuple(dict(r) for r in rules) for s, rules in condition_rules.items()}
+    red_flags = tuple(tuple(rf) for rf in red_flags)
+    by_name: Dict[str, Drug] = {}
+    ingredients: Dict[str, List[Drug]] = {}
+    for d in drugs:
+        by_name.setdefault(d.name, d)  # 이름 중복 시 먼저 나온 항목 우선(기존 find_drug와 동일)
+        for a in d.actives:
+            ingredients.setdefault(a, []).append(d)
+
+    # 증상 → Drug 튜플 (KB에 없는 이름은 건너뜀)
+    by_symptom: Dict[str, Tuple[Drug, ...]] = {
+        s: tuple(by_name[n] for n in names if n in by_name)
+        for s, names in symptom_to_drugs.items()
+    }
+
+    return KnowledgeBase(
+        drugs=drugs,
+        symptom_to_drugs=symptom_to_drugs,
+        condition_rules=condition_rules,
+        red_flags=red_flags,
+        by_name=by_name,
+        by_symptom=by_symptom,
+        by_ingredient={a: tuple(ds) for a, ds in ingredients.items()},
+        matcher=compile_matcher(symptom_to_drugs, condition_rules, red_flags),
+        fuzzy=compile_fuzzy(symptom_to_drugs, condition_rules, red_flags),
+        rules=compile_rules(drugs),
+        condition_scorer=compile_conditions(condition_rules),
+        interactions=compile_interactions(drugs),
+        answers=AnswerTable(symptom_to_drugs),  # 비어 있음 — 조회 시 채움 (사이드카는 load_kb_file)
+        version=version,
+    )
+
+
+def kb_from_dict(data: Dict[str, Any], version: str = "") -> KnowledgeBase:
+    """KB 파일(JSON) 구조 → 컴파일된 KnowledgeBase. 스키마가 다르면 ValueError."""
+    if data.get("schema") != KB_SCHEMA:
+        raise ValueError(f"지원하지 않는 KB 스키마: {data.get('schema')!r} (필요: {KB_SCHEMA})")
+    drug_fields = {f.name for f in fields(Drug)}
+    drugs: List[Drug] = []
+    for raw in data["drugs"]:
+        unknown = set(raw) - drug_fields
+        if unknown:
+            raise ValueError(f"Drug에 없는 필드: {sorted(unknown)} ({raw.get('name')})")
+        drugs.append(Drug(**raw))
+    return build_kb(
+        drugs,
+        data["symptom_to_drugs"],
+        data["condition_rules"],
+        [tuple(rf) for rf in data["red_flags"]],
+        version=version or str(data.get("version", "")),
+    )
+
+
+@timed("engine.load_kb_file")
+def load_kb_file(path: str | os.PathLike) -> KnowledgeBase:
+    """KB 파일 로드. version은 "선언 버전+내용 해시" — 버전을 안 올려도 내용이 바뀌면 달라진다.
+    .sqlite/.db는 전체 카탈로그(catalog.CatalogKB, 같은 속성으로 조회)로 연다.
+    옆에 같은 버전의 답 테이블(<이름>.answers.json, answers.py build)이 있으면 함께 싣는다."""
+    if Path(path).suffix in (".sqlite", ".db"):
+        from catalog import open_catalog  # 순환 import 방지
+        return open_catalog(path)
+    raw = Path(path).read_bytes()
+    data = json.loads(raw)
+    digest = hashlib.sha256(raw).hexdigest()[:12]
+    kb = kb_from_dict(data, version=f"{data.get('version', '')}+{digest}")
+    answers = load_answers(answers_path(path), kb)
+    return replace(kb, answers=answers) if answers else kb
+
+
+def default_kb() -> KnowledgeBase:
+    """기본 지식 베이스(data/kb.json)를 컴파일해 반환."""
+    return load_kb_file(DEFAULT_KB_PATH)
+
+
+# =============================
+# 2) 추천 로직
+# =============================
+
+def find_drug(kb: KnowledgeBase, name: str) -> Drug | None:
+    return kb.by_name.get(name)
+
+
+def keyword_hits(kb: KnowledgeBase, text: str) -> Set[Tuple[str, str]]:
+    """입력에서 찾은 (종류, 키워드) 집합 — 정확 매칭 + 오타/띄어쓰기 허용 매칭."""
+    return kb.matcher.scan(text) | kb.fuzzy.scan(text)
+
+
+@timed("engine.match_conditions")
+def match_conditions(kb: KnowledgeBase, selected: List[str], detail: str, limit: int | None = None) -> List[Dict[str, Any]]:
+    """증상/상세 키워드로 의심 질환 스코어링 (점수 = 1 + 찾은 힌트 수, 내림차순).
+    규칙 × 힌트 희소 행렬은 KB 로드 시 컴파일 (scoring.py). limit이면 상위 limit개만."""
+    return kb.condition_scorer.score(selected, keyword_hits(kb, detail), limit)  # 입력을 한 번만 훑음
+
+
+@timed("engine.collect_red_flags")
+def collect_red_flags(kb: KnowledgeBase, selected: List[str], detail: str) -> List[str]:
+    alerts: List[str] = []
+    hits = keyword_hits(kb, detail)
+    for key, rf, action in kb.red_flags:
+        if key in selected and any(("red_flag", tok) in hits for tok in rf.split("/")):
+            alerts.append(f"{key}: {rf} → {action}")
+    return alerts
+
+
+def detect_symptoms(kb: KnowledgeBase, text: str) -> List[str]:
+    """자유 입력에서 KB 증상 키를 찾아 KB 순서대로 반환."""
+    hits = {key for kind, key in keyword_hits(kb, text) if kind == "symptom"}
+    return [s for s in kb.symptom_to_drugs if s in hits]
+
+
+@timed("engine.personalize_warnings")
+def personalize_warnings(kb: KnowledgeBase, drug: Drug, ctx: Dict[str, Any]) -> List[str]:
+    """개인 상황(임신, 간/신장, 위궤양, 항응고제 등)에 따른 주의 메시지.
+    규칙은 rules.py 테이블 — KB 로드 시 비트마스크로 컴파일돼 있다."""
+    return list(kb.rules.warnings(drug, ctx_mask(ctx)))
+
+
+def current_med_keys(kb: KnowledgeBase, med: str) -> FrozenSet[Tuple[str, str]]:
+    """복용 중인 약 입력 1개 → 상호작용 키 집합 (별칭 표 → KB 약명 → 성분명 → 약명 조각 순). 모르면 빈 집합."""
+    keys = kb.interactions.alias_keys(med)
+    if keys:
+        return keys
+    drug = kb.by_name.get(med)
+    if drug is None:
+        keys = kb.interactions.active_keys(med)
+        if keys:
+            return keys
+        drug = kb.interactions.lookup_token(med)
+    return kb.interactions.drug_keys(drug) if drug else keys
+
+
+@timed("engine.check_interactions")
+def check_interactions(kb: KnowledgeBase, drugs: Sequence[Drug], meds: Sequence[str] = ()) -> List[str]:
+    """추천 약 ↔ 복용 중인 약의 성분 중복/병용 주의 (interactions.py 희소 행렬).
+    추천 약끼리는 경고하지 않는다 (함께 먹을 약이 아니라 고를 선택지) — combine_notes."""
+    items = [(d.name, kb.interactions.drug_keys(d)) for d in drugs]
+    current = [(f"{m}(복용 중)", current_med_keys(kb, m)) for m in meds]
+    return kb.interactions.check(items, current)
+
+
+def combine_notes(kb: KnowledgeBase, drugs: Sequence[Drug]) -> List[str]:
+    """추천 약끼리 성분/같은 계열이 겹치면 "하나만 고르세요" 안내 (경고보다 낮은 단계)."""
+    return kb.interactions.combine_notes([(d.name, kb.interactions.drug_keys(d)) for d in drugs])
+
+
+@timed("engine.recommend_drugs")
+def recommend_drugs(kb: KnowledgeBase, selected: List[str]) -> List[Drug]:
+    seen = set()
+    rec: List[Drug] = []
+    for s in selected:
+        for d in kb.by_symptom.get(s, ()):
+            if d.name not in seen:
+                rec.append(d)
+                seen.add(d.name)
+    return rec
+
+
+def _row(s: str, d: Drug) -> Dict[str, Any]:
+    return {
+        "증상": s,
+        "약명": d.name,
+        "분류": d.dclass,
+        "성분": ", ".join(d.actives),
+        "가용성": d.availability,
+    }
+
+
+def drug_candidates(kb: KnowledgeBase, selected: List[str]) -> List[Candidate]:
+    """추천 후보 (약, 커버하는 선택 증상) — recommend_drugs와 같은 순서."""
+    covered: Dict[str, Tuple[Drug, List[str]]] = {}
+    for s in dict.fromkeys(selected):
+        for d in kb.by_symptom.get(s, ()):
+            symptoms = covered.setdefault(d.name, (d, []))[1]
+            if s not in symptoms:
+                symptoms.append(s)
+    return [(d, tuple(symptoms)) for d, symptoms in covered.values()]
+
+
+@timed("engine.rank_drugs")
+def rank_drugs(
+    kb: KnowledgeBase,
+    selected: List[str],
+    ctx: Dict[str, Any],
+    tags: Sequence[str] = (),
+    k: int | None = None,
+    weights: RankWeights | None = None,
+) -> List[Candidate]:
+    """후보를 커버리지 − 개인 상황 금기/avoid_if 감점으로 매겨 상위 k개 (ranking.py, 기본 RECOMMEND_TOP_K).
+    후보는 답 테이블에서 (중복/모르는 증상이 있으면 직접)."""
+    mask = kb.answers.mask_of(selected)
+    candidates = kb.answers.candidates(kb, mask, selected) if mask is not None else drug_candidates(kb, selected)
+    cmask = ctx_mask(ctx)
+    return rank(
+        candidates,
+        lambda d: len(kb.rules.warnings(d, cmask)),
+        avoid_terms(ctx, tags),
+        DEFAULT_TOP_K if k is None else k,
+        weights or RankWeights(),
+    )
+
+
+def ranked_rows(kb: KnowledgeBase, selected: List[str], ctx: Dict[str, Any], tags: Sequence[str]) -> List[Dict[str, Any]]:
+    """리포트 추천 행 — 순위 상위 k개 약만, 약 순위 → 커버하는 증상 순. 카드/CSV 크기는 KB 크기와 무관."""
+    return [_row(s, d) for d, covered in rank_drugs(kb, selected, ctx, tags) for s in covered]
+
+
+def row_drugs(kb: KnowledgeBase, rows: Sequence[Dict[str, Any]]) -> List[Drug]:
+    """추천 행 → 중복 제거된 Drug 목록 (행 순서 = 순위)."""
+    seen = set()
+    rec: List[Drug] = []
+    for row in rows:
+        name = row["약명"]
+        if name not in seen:
+            seen.add(name)
+            d = kb.by_name.get(name)
+            if d:
+                rec.append(d)
+    return rec
+
+
+def report_drugs(kb: KnowledgeBase, report: Dict[str, Any]) -> List[Drug]:
+    """리포트의 추천 행 → 중복 제거된 Drug 목록 (순위 순서)."""
+    return row_drugs(kb, report["recommendations"])
+
+
+def personal_warning_map(kb: KnowledgeBase, drugs: Sequence[Drug], ctx: Dict[str, Any]) -> Dict[str, List[str]]:
+    """약별 개인 상황 주의 (주의가 없는 약은 생략)."""
+    personal: Dict[str, List[str]] = {}
+    for d in drugs:
+        warns = personalize_warnings(kb, d, ctx)
+        if warns:
+            personal[d.name] = warns
+    return personal
+
+
+def interactions_for(kb: KnowledgeBase, rows: Sequence[Dict[str, Any]], meds: Sequence[str]) -> List[str]:
+    return check_interactions(kb, row_drugs(kb, rows), meds)
+
+
+def combine_notes_for(kb: KnowledgeBase, rows: Sequence[Dict[str, Any]]) -> List[str]:
+    return combine_notes(kb, row_drugs(kb, rows))
+
+
+# 답 테이블(answers.py) 경유 단계 — 테이블 조회(선택 순서 무관) + 자유 입력 보정,
+# 중복/모르는 증상이 있으면 직접 계산. 결과는 직접 계산과 같다.
+
+def answer_conditions(kb: KnowledgeBase, selected: List[str], detail: str) -> List[Dict[str, Any]]:
+    mask = kb.answers.mask_of(selected)
+    if mask is None or detail:  # 상세가 있으면 힌트 가산 — 희소 행렬 점수
+        return match_conditions(kb, selected, detail)
+    # 상세가 비면 모두 기본 점수 1, 순서 = 선택/규칙 순서 — 키워드 스캔 없이 조회만
+    return [
+        {"name": name, "symptom": s, "score": 1, "notes": notes}
+        for name, s, notes in kb.answers.conditions(kb, mask, selected)
+    ]
+
+
+def answer_personal_warnings(
+    kb: KnowledgeBase,
+    selected: List[str],
+    ctx: Dict[str, Any],
+    rows: Sequence[Dict[str, Any]],
+) -> Dict[str, List[str]]:
+    """추천 행(상위 k개) 약의 개인 상황 주의 — 테이블의 선택 전체 주의에서 추천된 약만 (순위 순)."""
+    mask = kb.answers.mask_of(selected)
+    if mask is None:
+        return personal_warning_map(kb, row_drugs(kb, rows), ctx)
+    full = kb.answers.personal_warnings(kb, mask, ctx_mask(ctx))
+    return {name: full[name] for name in dict.fromkeys(r["약명"] for r in rows) if name in full}
+
+
+# 리포트 단계: (리포트 키, 입력 이름, 함수(kb, *입력)). 출력 순서 = 리포트 키 순서.
+# 입력 이름은 report_inputs()의 키 또는 앞 단계의 리포트 키 — KB 버전은 모든 단계의 암묵적 입력.
+# 개인 주의/상호작용/함께 복용 안내는 순위 상위 k개 추천(recommendations)에 대해서만 계산한다.
+# pipeline.IncrementalReport는 이 선언을 보고 입력이 바뀐 단계만 다시 계산한다.
+REPORT_STAGES: Tuple[Tuple[str, Tuple[str, ...], Callable[..., Any]], ...] = (
+    ("recommendations", ("selected", "ctx", "tags"), ranked_rows),
+    ("alerts", ("selected", "detail"), collect_red_flags),
+    ("conditions", ("selected", "detail"), answer_conditions),
+    ("personal_warnings", ("selected", "ctx", "recommendations"), answer_personal_warnings),
+    ("interactions", ("recommendations", "meds"), interactions_for),
+    ("combine_notes", ("recommendations",), combine_notes_for),
+)
+
+
+def report_inputs(selected: List[str], detail: str, tags: List[str], ctx: Dict[str, Any]) -> Dict[str, Any]:
+    return {"selected": selected, "detail": detail, "tags": tags, "ctx": ctx, "meds": list(ctx.get("meds", ()))}
+
+
+def assemble_report(kb: KnowledgeBase, inputs: Dict[str, Any], stages: Dict[str, Any]) -> Dict[str, Any]:
+    """단계 결과 → 리포트 dict (키 순서는 기존 build_report와 같음)."""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "selected_symptoms": inputs["selected"],
+        "detail": inputs["detail"],
+        "tags": inputs["tags"],
+        **{key: stages[key] for key, _, _ in REPORT_STAGES},
+        "kb_version": kb.version,
+    }
+
+
+@timed("engine.build_report")
+def build_report(
+    kb: KnowledgeBase,
+    selected: List[str],
+    detail: str,
+    tags: List[str],
+    ctx: Dict[str, Any],
+) -> Dict[str, Any]:
+    """전체 파이프라인(REPORT_STAGES 전부)을 실행해 내보내기용 리포트 dict를 만든다."""
+    values = report_inputs(selected, detail, tags, ctx)
+    for key, deps, fn in REPORT_STAGES:
+        values[key] = fn(kb, *(values[n] for n in deps))
+    return assemble_report(kb, values, values)
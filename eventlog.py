@@ -0,0 +1,238 @@
+# eventlog.py — 피드백/리포트 이벤트 로그 (추가 전용, 백그라운드 기록)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 피드백 제출과 생성된 리포트를 로컬 JSONL 파일에 남긴다 (지금까진 아무것도 저장 안 됨).
+#   - UI rerun은 디스크를 기다리지 않는다: log()는 제한된 메모리 큐에 넣고 바로 반환,
+#     큐가 가득 차면 이벤트를 버리고 dropped만 센다.
+#   - 백그라운드 스레드가 큐를 모아 한 번에 쓰고 배치마다 fsync 1번.
+#     파일이 max_bytes를 넘으면 events-<시각>.jsonl로 이름을 바꾸고 새 파일 시작.
+#   - summary 명령: 증상별/약별 "도움됨/안 됨" 비율 집계 (로테이트된 파일 포함).
+#   - sinks: 같은 배치를 받는 추가 저장소 (예: analytics.ReportSink → Parquet).
+#     sink.write(batch)는 writer 스레드에서 매 주기 호출(빈 배치 포함), 종료 시 sink.close().
+# 사용 예:
+#   log = EventLog("logs"); log.log("feedback", {"helpful": True, "symptoms": [...], "drugs": [...]})
+#   python eventlog.py summary --dir logs
+#   python eventlog.py summary --dir logs --json
+# 환경변수:
+#   EVENT_LOG_DIR (기본: ./logs), EVENT_LOG_MAX_BYTES (기본 16MB)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+DEFAULT_DIR = Path(os.environ.get("EVENT_LOG_DIR", Path(__file__).with_name("logs")))
+DEFAULT_MAX_BYTES = int(os.environ.get("EVENT_LOG_MAX_BYTES", 16 * 1024 * 1024))
+CURRENT = "events.jsonl"
+
+logger = logging.getLogger(__name__)
+
+
+class EventLog:
+    """제한된 큐 + 단일 writer 스레드. 프로세스 종료 시 남은 이벤트를 비우고 fsync."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike = DEFAULT_DIR,
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        sinks: Sequence[Any] = (),
+    ) -> None:
+        self.root = Path(root)
+        self.sinks = list(sinks)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.last_error: Exception | None = None
+        self._queue: queue.Queue[Dict[str, Any] | None] = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="eventlog-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def log(self, kind: str, payload: Dict[str, Any]) -> bool:
+        """이벤트 1건을 큐에 넣음 — 절대 블록하지 않는다. 버려졌으면 False."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait({"ts": datetime.now().isoformat(), "kind": kind, **payload})
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        """남은 이벤트를 기록하고 writer 종료."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    # --- writer 스레드 ---
+    def _run(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        fh = open(self.root / CURRENT, "a", encoding="utf-8")
+        try:
+            while True:
+                batch, stop = self._collect()
+                if batch:
+                    try:
+                        fh = self._write(fh, batch)
+                    except Exception as e:  # 디스크 오류 등 — 이번 배치는 버리고 계속 (writer가 죽으면 큐만 쌓임)
+                        logger.exception("이벤트 배치 기록 실패 (%d건 버림)", len(batch))
+                        self.last_error = e
+                        self.dropped += len(batch)
+                for sink in self.sinks:
+                    try:
+                        sink.write(batch)
+                    except Exception as e:
+                        logger.exception("이벤트 sink 기록 실패: %r", sink)
+                        self.last_error = e
+                if stop:
+                    return
+        finally:
+            fh.close()
+            for sink in self.sinks:
+                sink.close()
+
+    def _collect(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """첫 이벤트를 기다린 뒤 batch_size 또는 flush_interval까지 모음. (배치, 종료 여부)"""
+        batch: List[Dict[str, Any]] = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+            if deadline is None:
+                deadline = time.monotonic() + self.flush_interval
+        return batch, False
+
+    def _write(self, fh: Any, batch: List[Dict[str, Any]]) -> Any:
+        lines: List[str] = []
+        for e in batch:
+            try:
+                lines.append(json.dumps(e, ensure_ascii=False) + "\n")
+            except (TypeError, ValueError) as err:  # 직렬화할 수 없는 값 — 그 이벤트만 버림
+                logger.warning("이벤트 직렬화 실패 (%s): %s", e.get("kind"), err)
+                self.last_error = err
+                self.dropped += 1
+        fh.write("".join(lines))
+        fh.flush()
+        os.fsync(fh.fileno())
+        self.written += len(lines)
+        self.batches += 1
+        if fh.tell() >= self.max_bytes:
+            fh.close()
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            os.replace(self.root / CURRENT, self.root / f"events-{stamp}.jsonl")
+            fh = open(self.root / CURRENT, "a", encoding="utf-8")
+        return fh
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": len(self), "written": self.written, "dropped": self.dropped, "batches": self.batches}
+
+
+# =============================
+# 집계 (오프라인)
+# =============================
+
+def log_files(root: str | os.PathLike = DEFAULT_DIR) -> List[Path]:
+    """로테이트된 파일(시간순) + 현재 파일."""
+    root = Path(root)
+    files = sorted(root.glob("events-*.jsonl"))
+    if (root / CURRENT).exists():
+        files.append(root / CURRENT)
+    return files
+
+
+def read_events(root: str | os.PathLike = DEFAULT_DIR, kind: str | None = None) -> Iterator[Dict[str, Any]]:
+    for path in log_files(root):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:  # 비정상 종료로 잘린 마지막 줄
+                    continue
+                if kind is None or event.get("kind") == kind:
+                    yield event
+
+
+def summarize(events: Iterator[Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """feedback 이벤트 → {"symptom": {키: {helpful, unhelpful, rate}}, "drug": {...}}."""
+    out: Dict[str, Dict[str, Dict[str, Any]]] = {"symptom": {}, "drug": {}}
+    for e in events:
+        if e.get("kind") != "feedback":
+            continue
+        field = "helpful" if e.get("helpful") else "unhelpful"
+        for group, keys in (("symptom", e.get("symptoms", [])), ("drug", e.get("drugs", []))):
+            for key in set(keys):
+                row = out[group].setdefault(key, {"helpful": 0, "unhelpful": 0})
+                row[field] += 1
+    for rows in out.values():
+        for row in rows.values():
+            total = row["helpful"] + row["unhelpful"]
+            row["total"] = total
+            row["rate"] = row["helpful"] / total if total else 0.0
+    return out
+
+
+def _print_table(summary: Dict[str, Dict[str, Dict[str, Any]]], min_total: int) -> None:
+    for group, title in (("symptom", "증상"), ("drug", "약")):
+        rows = sorted(
+            ((k, r) for k, r in summary[group].items() if r["total"] >= min_total),
+            key=lambda kr: (kr[1]["rate"], -kr[1]["total"]),
+        )
+        print(f"\n[{title}별] (도움됨 비율 낮은 순)")
+        print(f"{'이름':<28} {'도움됨':>6} {'안 됨':>6} {'비율':>7}")
+        for key, r in rows:
+            print(f"{key:<28} {r['helpful']:>6} {r['unhelpful']:>6} {r['rate']:>7.1%}")
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="피드백/리포트 이벤트 로그 도구")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    s = sub.add_parser("summary", help="증상별/약별 도움됨 비율")
+    s.add_argument("--dir", default=str(DEFAULT_DIR), help="로그 디렉터리 (기본: ./logs)")
+    s.add_argument("--min-total", type=int, default=1, help="피드백 수가 이보다 적은 항목은 생략")
+    s.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = p.parse_args(argv)
+
+    summary = summarize(read_events(args.dir))
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+    else:
+        _print_table(summary, args.min_total)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
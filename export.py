@@ -0,0 +1,133 @@
+# export.py — 리포트 내보내기 (지연 생성 + 스트리밍 대량 포맷)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 다운로드 버튼을 누를 때만 JSON/CSV를 만든다 (st.download_button에 callable 전달).
+#     만든 결과는 리포트 해시별로 캐시 — 같은 리포트를 또 받으면 재생성하지 않음.
+#   - CSV는 pandas DataFrame 없이 csv 모듈로 (열/따옴표 규칙은 기존 to_csv(index=False)와 같음).
+#   - 여러 리포트 대량 내보내기: ndjson / csv / parquet(선택, pyarrow)을 한 건씩 흘려 쓰기.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import csv
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, IO, Iterable, List, Tuple
+
+# 추천 약 CSV 열 (engine.ranked_rows 행과 동일)
+RECOMMENDATION_FIELDS = ["증상", "약명", "분류", "성분", "가용성"]
+# 대량 CSV: 리포트 식별 열 + 추천 행
+BULK_CSV_FIELDS = ["case_id", "timestamp", "kb_version"] + RECOMMENDATION_FIELDS
+FORMATS = ("json", "csv", "ndjson", "parquet")
+
+
+def report_hash(report: Dict[str, Any]) -> str:
+    """timestamp를 뺀 리포트 내용 해시 — 같은 입력/KB면 같은 값."""
+    body = {k: v for k, v in report.items() if k != "timestamp"}
+    return hashlib.sha256(json.dumps(body, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+# =============================
+# 1) 단건 (다운로드 버튼)
+# =============================
+
+def report_json(report: Dict[str, Any]) -> str:
+    return json.dumps(report, ensure_ascii=False, indent=2)
+
+
+def recommendations_csv(report: Dict[str, Any]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=RECOMMENDATION_FIELDS, lineterminator="\n", extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(report.get("recommendations", []))
+    return buf.getvalue()
+
+
+SINGLE: Dict[str, Callable[[Dict[str, Any]], str]] = {"json": report_json, "csv": recommendations_csv}
+
+
+class ExportCache:
+    """(리포트 해시, 포맷) → 생성된 내용. 작은 LRU."""
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = max_entries
+        self._data: OrderedDict[Tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, report: Dict[str, Any], fmt: str, key: str | None = None) -> str:
+        key = (key or report_hash(report), fmt)
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                return self._data[key]
+        out = SINGLE[fmt](report)
+        with self._lock:
+            self._data[key] = out
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+        return out
+
+    def lazy(self, report: Dict[str, Any], fmt: str) -> Callable[[], str]:
+        """st.download_button(data=...)에 넘길 인자 없는 callable — 클릭 시에만 생성."""
+        key = report_hash(report)
+        return lambda: self.get(report, fmt, key)
+
+
+# =============================
+# 2) 대량 (스트리밍)
+# =============================
+
+def _bulk_rows(report: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    head = {k: report.get(k, "") for k in ("case_id", "timestamp", "kb_version")}
+    for row in report.get("recommendations", []):
+        yield {**head, **row}
+
+
+def write_ndjson(reports: Iterable[Dict[str, Any]], fh: IO[str]) -> int:
+    n = 0
+    for r in reports:
+        fh.write(json.dumps(r, ensure_ascii=False) + "\n")
+        n += 1
+    return n
+
+
+def write_csv(reports: Iterable[Dict[str, Any]], fh: IO[str]) -> int:
+    """리포트마다 추천 행을 바로 써 나감 — 전체를 메모리에 올리지 않음."""
+    writer = csv.DictWriter(fh, fieldnames=BULK_CSV_FIELDS, lineterminator="\n", extrasaction="ignore")
+    writer.writeheader()
+    n = 0
+    for r in reports:
+        writer.writerows(_bulk_rows(r))
+        n += 1
+    return n
+
+
+def write_parquet(reports: Iterable[Dict[str, Any]], path: str, batch_size: int = 10_000) -> int:
+    """추천 행을 batch_size 단위 row group으로 Parquet에 기록 (pyarrow 필요)."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("parquet 내보내기에는 pyarrow가 필요합니다 (pip install pyarrow)") from e
+
+    schema = pa.schema([(f, pa.string()) for f in BULK_CSV_FIELDS])
+    n = 0
+    batch: Dict[str, List[str]] = {f: [] for f in BULK_CSV_FIELDS}
+    with pq.ParquetWriter(path, schema) as writer:
+        def flush() -> None:
+            if batch["약명"]:
+                writer.write_table(pa.table(batch, schema=schema))
+                for col in batch.values():
+                    col.clear()
+
+        for r in reports:
+            for row in _bulk_rows(r):
+                for f in BULK_CSV_FIELDS:
+                    batch[f].append(str(row.get(f, "")))
+            n += 1
+            if len(batch["약명"]) >= batch_size:
+                flush()
+        flush()
+    return n
@@ -0,0 +1,223 @@
+# fuzzy.py — 오타/띄어쓰기에 강한 한국어 키워드 매칭 (자모 n-gram 색인)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - "목통증" ↔ "목 통증", "편두퉁" ↔ "편두통"처럼 띄어쓰기·오타가 있으면
+#     정확 매칭(matcher.KeywordMatcher)은 조용히 놓친다.
+#   - 한글을 초/중/종성 자모로 풀고 편집 거리 k 이내 부분문자열을 찾는다.
+#     입력은 공백/기호에서 낱말로 나눠 낱말마다 찾는다 — "미열, 담배"의 "열담"이 "혈담"에 걸리지 않게.
+#     공백이 든 키워드("목 통증")만 공백을 지운 입력 전체에서 찾아 "목통증"도 잡는다.
+#   - 2음절 이하 키워드("복통" ↔ "보통")와 exact=True로 등록한 키워드(빨간 깃발)는 정확 일치만.
+#   - 후보: 키워드를 k+1 조각으로 나누면 k번 이하 편집된 등장에는 조각 하나가 그대로 남는다
+#     (비둘기집). 조각들을 Aho–Corasick 하나로 묶어 입력을 한 번 훑고,
+#     걸린 조각 위치 주변 창에서만 편집 거리를 검증 → 어휘 크기와 무관하게 입력 길이 + 후보 수.
+#   - 색인은 KB 로드 시 한 번 구축 (engine.compile_fuzzy), 요청마다 다시 만들지 않음.
+# 사용 예:
+#   idx = FuzzyIndex.from_patterns(["편두통", "목 통증"])
+#   idx.search("편두퉁이 심해요")   # → [("편두통", 1)]  (payload, 편집 거리)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+from matcher import KeywordMatcher
+
+# 한글 음절 → 첫가끝 자모 (U+1100 블록). 초성과 종성이 다른 코드라
+# "열"(ㅇㅕ+종성ㄹ)이 "여름"(ㅇㅕ+초성ㄹ…) 안에서 잘못 걸리지 않는다.
+CHOSEONG_BASE, JUNGSEONG_BASE, JONGSEONG_BASE = 0x1100, 0x1161, 0x11A7
+HANGUL_FIRST, HANGUL_LAST = 0xAC00, 0xD7A3
+
+# 입력 문장별 검색 결과 메모 상한
+MEMO_LIMIT = 1 << 12
+
+
+def decompose_words(text: str) -> List[str]:
+    """낱말(공백/기호로 나뉜 조각)별로 음절을 자모로 푼 목록. 라틴 문자는 소문자로."""
+    words: List[str] = []
+    out: List[str] = []
+    for ch in text:
+        code = ord(ch)
+        if HANGUL_FIRST <= code <= HANGUL_LAST:
+            code -= HANGUL_FIRST
+            out.append(chr(CHOSEONG_BASE + code // 588))
+            out.append(chr(JUNGSEONG_BASE + (code // 28) % 21))
+            if code % 28:
+                out.append(chr(JONGSEONG_BASE + code % 28))
+        elif ch.isalnum():
+            out.append(ch.lower())
+        elif out:
+            words.append("".join(out))
+            out = []
+    if out:
+        words.append("".join(out))
+    return words
+
+
+def decompose(text: str) -> str:
+    """음절을 자모로 풀고 공백/기호는 버림 (낱말 경계 없이 이어 붙임)."""
+    return "".join(decompose_words(text))
+
+
+def max_distance(length: int, syllables: int) -> int:
+    """허용 편집 거리 — 2음절 이하(두통/복통)나 자모 5개 이하 키워드는 정확히 일치해야 함."""
+    if syllables <= 2 or length <= 5:
+        return 0
+    return 1 if length < 12 else 2
+
+
+def _pieces(length: int, k: int) -> List[Tuple[int, int]]:
+    """길이를 k+1개 조각 (시작, 끝)으로 고르게 나눔."""
+    bounds = [length * i // (k + 1) for i in range(k + 2)]
+    return [(bounds[i], bounds[i + 1]) for i in range(k + 1)]
+
+
+def _one_edit(a: str, b: str) -> bool:
+    """편집 거리 1 이하인지 (공통 접두사 뒤를 슬라이스 비교)."""
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i, n = 0, min(la, lb)
+    while i < n and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:]
+    return a[i + 1:] == b[i:] if la > lb else a[i:] == b[i + 1:]
+
+
+def _substring_distance(pattern: str, text: str, bound: int) -> int:
+    """text 안 어딘가와 pattern의 최소 편집 거리 (시작 위치 자유, Sellers). bound 초과면 bound+1."""
+    m = len(pattern)
+    prev = list(range(m + 1))
+    best = prev[m]
+    for ch in text:
+        cur = [0] * (m + 1)
+        for i in range(1, m + 1):
+            cost = 0 if pattern[i - 1] == ch else 1
+            cur[i] = min(prev[i - 1] + cost, prev[i] + 1, cur[i - 1] + 1)
+        best = min(best, cur[m])
+        if best == 0:
+            return 0
+        prev = cur
+    return best if best <= bound else bound + 1
+
+
+class FuzzyIndex:
+    """조각 오토마톤 + 창 안 편집 거리 검증. add()로 모은 뒤 build() 후 search()/scan()."""
+
+    def __init__(self) -> None:
+        self._terms: List[str] = []                       # 자모 문자열
+        self._syllables: List[int] = []                   # 키워드 음절(글자) 수
+        self._phrase: List[bool] = []                     # 공백이 든 키워드 — 낱말 경계를 넘어 찾음
+        self._payloads: List[List[Tuple[Hashable, bool]]] = []  # (payload, 정확 일치만)
+        self._ids: Dict[Tuple[str, bool], int] = {}
+        self._pieces = KeywordMatcher()                   # 낱말 키워드 조각 — 입력 낱말마다
+        self._phrase_pieces = KeywordMatcher()            # 공백 든 키워드 조각 — 공백 지운 입력 전체
+        self._memo: Dict[str, List[Tuple[Hashable, int]]] = {}
+        self._built = False
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str]) -> "FuzzyIndex":
+        idx = cls()
+        for p in patterns:
+            idx.add(p)
+        idx.build()
+        return idx
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, pattern: str, payload: Hashable | None = None, exact: bool = False) -> None:
+        """패턴 등록. payload 생략 시 패턴 문자열 자체가 결과로 나온다.
+        exact=True면 오타 허용 없이 (자모/띄어쓰기 정규화만 한) 정확 일치일 때만 결과에 넣는다."""
+        words = decompose_words(pattern)
+        if not words:
+            return
+        jamo, phrase = "".join(words), len(words) > 1
+        tid = self._ids.get((jamo, phrase))
+        if tid is None:
+            tid = self._ids[jamo, phrase] = len(self._terms)
+            self._terms.append(jamo)
+            self._syllables.append(sum(1 for ch in pattern if ch.isalnum()))
+            self._phrase.append(phrase)
+            self._payloads.append([])
+        payload = pattern if payload is None else payload
+        entries = self._payloads[tid]
+        for i, (p, only_exact) in enumerate(entries):
+            if p == payload:
+                entries[i] = (p, only_exact and exact)
+                break
+        else:
+            entries.append((payload, exact))
+        self._built = False
+
+    def build(self) -> None:
+        self._pieces = KeywordMatcher()
+        self._phrase_pieces = KeywordMatcher()
+        for tid, jamo in enumerate(self._terms):
+            k = 0
+            if not all(only_exact for _, only_exact in self._payloads[tid]):
+                k = max_distance(len(jamo), self._syllables[tid])
+            pieces = self._phrase_pieces if self._phrase[tid] else self._pieces
+            for start, end in _pieces(len(jamo), k):
+                pieces.add(jamo[start:end], (tid, start, end - start, k))
+        self._pieces.build()
+        self._phrase_pieces.build()
+        self._memo = {}
+        self._built = True
+
+    def _distances(self, pieces: KeywordMatcher, query: str, best: Dict[int, int]) -> Dict[int, int]:
+        """tid → 입력 안 최소 편집 거리 (상한 이내인 것만)를 best에 합친다."""
+        terms = self._terms
+        for end, (tid, offset, size, k) in pieces.iter_matches(query):
+            if best.get(tid) == 0:
+                continue
+            jamo = terms[tid]
+            m = len(jamo)
+            start = end - size + 1 - offset  # 조각이 제자리라면 키워드가 시작할 위치
+            if k == 0 or (start >= 0 and query.startswith(jamo, start)):
+                best[tid] = 0
+            elif k == 1:
+                # 조각 2개: 앞 조각이 맞았으면 시작, 뒤 조각이 맞았으면 끝이 고정된다.
+                # 나머지 조각의 맞닿은 두 글자 중 하나는 입력의 맞닿은 두 글자 중 하나와 같아야 함
+                if offset == 0:
+                    rest, near = jamo[size:size + 2], query[start + size:start + size + 2]
+                else:
+                    rest, near = jamo[offset - 2:offset][::-1], query[max(start + offset - 2, 0):start + offset][::-1]
+                if len(rest) == 2 and not (set(rest) & set(near)):
+                    continue
+                if offset == 0:
+                    spans = [query[start:start + n] for n in (m - 1, m, m + 1)]
+                else:
+                    stop = end + 1
+                    spans = [query[max(stop - n, 0):stop] for n in (m - 1, m, m + 1)]
+                if any(_one_edit(jamo, span) for span in spans):
+                    best[tid] = 1
+            else:
+                window = query[max(start - k, 0):start + m + k]
+                dist = _substring_distance(jamo, window, k)
+                if dist < best.get(tid, k + 1):
+                    best[tid] = dist
+        return best
+
+    def search(self, text: str, limit: int | None = None) -> List[Tuple[Hashable, int]]:
+        """text에 (근사적으로) 들어 있는 키워드의 (payload, 편집 거리). 거리 → 긴 키워드 순."""
+        if not self._built:
+            self.build()
+        found = self._memo.get(text)
+        if found is None:
+            words = decompose_words(text)
+            best: Dict[int, int] = {}
+            for word in words:
+                self._distances(self._pieces, word, best)
+            if len(self._phrase_pieces) > 1:  # 상태가 루트뿐이면 공백 든 키워드 없음
+                self._distances(self._phrase_pieces, "".join(words), best)
+            ranked = sorted((dist, -len(self._terms[tid]), tid) for tid, dist in best.items())
+            found = [(p, dist) for dist, _, tid in ranked for p, only_exact in self._payloads[tid]
+                     if not (dist and only_exact)]
+            if len(self._memo) >= MEMO_LIMIT:
+                self._memo.clear()
+            self._memo[text] = found
+        return found[:limit] if limit is not None else list(found)
+
+    def scan(self, text: str) -> Set[Hashable]:
+        """search 결과의 payload 집합 (KeywordMatcher.scan과 같은 모양)."""
+        return {p for p, _ in self.search(text)}
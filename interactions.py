@@ -0,0 +1,207 @@
+# interactions.py — 약물 상호작용 / 성분 중복 (희소 성분·분류 행렬)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 추천 약 ↔ 사용자가 이미 복용 중인 약 (그리고 복용 중인 약끼리) 사이의
+#     병용 주의(예: NSAID + 항응고제)와 성분 중복(예: 타이레놀 + 종합감기약)을 잡는다.
+#     KB의 "성분 중복 주의" 문구를 실제로 검사하는 곳.
+#     추천 약끼리는 경고하지 않는다 — 함께 먹을 약이 아니라 그중 하나를 고르는 선택지다.
+#     대신 성분/같은 계열이 겹치는 추천 약은 combine_notes()로 "하나만 고르세요" 안내 (경고보다 낮은 단계).
+#   - 약 1개 → 키 집합: ("active", 성분) + ("class", 분류 그룹). 상호작용은 키×키 희소 행렬
+#     (dict of dict, 대칭)로 KB 로드 시 한 번 컴파일.
+#   - 검사는 "키 → 가진 약" dict를 한 번 채운 뒤, 있는 키마다 행렬 행을 훑어 상대 키가 있는지 확인
+#     → 약 쌍 이중 루프 없이 (전체 키 수 × 행의 이웃 수)번의 집합 조회.
+#   - 복용 중인 약은 자유 입력: 별칭 표(와파린, 아스피린, SSRI 성분명 등) → KB 약명 → 성분명(대소문자 무관,
+#     "ibuprofen") → 이름 조각 순으로 해석.
+#   - 개인 상황 체크박스(항응고제/SSRI/MAOI)는 rules.py가 약별로 이미 경고하므로 여기선 쓰지 않는다.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, List, Sequence, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Drug
+
+# ("active", 소문자 성분명) | ("class", 분류 그룹)
+Key = Tuple[str, str]
+
+# (Drug.dclass 부분문자열, 분류 그룹) — 그룹이 같으면 같은 계열로 본다
+CLASS_GROUPS: Tuple[Tuple[str, str], ...] = (
+    ("NSAID", "NSAID"),
+    ("항히스타민", "항히스타민제"),
+    ("지사제", "지사제"),
+    ("항응고", "항응고제"),
+    ("SSRI", "SSRI"),
+    ("MAOI", "MAOI"),
+)
+
+# 같은 그룹 약 2개를 함께 먹으면 중복으로 경고할 분류 (성분이 같으면 분류와 무관하게 항상 경고)
+DUPLICATE_CLASSES: Tuple[str, ...] = ("NSAID", "항히스타민제")
+
+# (키, 키, 메시지) — 순서 무관(대칭)
+INTERACTION_RULES: Tuple[Tuple[Key, Key, str], ...] = (
+    (("class", "NSAID"), ("class", "항응고제"), "NSAID + 항응고제: 위장출혈 위험 증가"),
+    (("active", "dextromethorphan"), ("class", "MAOI"), "덱스트로메토르판 + MAOI: 병용 금기"),
+    (("active", "dextromethorphan"), ("class", "SSRI"), "덱스트로메토르판 + SSRI: 세로토닌 증후군 위험"),
+    (("class", "NSAID"), ("class", "SSRI"), "NSAID + SSRI: 위장출혈 위험 증가"),
+    (("active", "loperamide"), ("active", "diosmectite"), "디오스멕타이트는 함께 먹은 약의 흡수를 줄임 — 2시간 간격"),
+)
+
+# 복용 중인 약 자유 입력 → 키 (KB에 없는 처방약/복합제용)
+CURRENT_MED_ALIASES: Dict[str, Tuple[Key, ...]] = {
+    "와파린": (("class", "항응고제"),),
+    "warfarin": (("class", "항응고제"),),
+    "아픽사반": (("class", "항응고제"),),
+    "리바록사반": (("class", "항응고제"),),
+    "에독사반": (("class", "항응고제"),),
+    "다비가트란": (("class", "항응고제"),),
+    "항응고제": (("class", "항응고제"),),
+    "아스피린": (("active", "aspirin"), ("class", "NSAID")),
+    "aspirin": (("active", "aspirin"), ("class", "NSAID")),
+    "플루옥세틴": (("class", "SSRI"),),
+    "에스시탈로프람": (("class", "SSRI"),),
+    "세르트랄린": (("class", "SSRI"),),
+    "파록세틴": (("class", "SSRI"),),
+    "ssri": (("class", "SSRI"),),
+    "셀레길린": (("class", "MAOI"),),
+    "maoi": (("class", "MAOI"),),
+    # 영문 제품명 (성분명 자체는 KB 성분 색인으로 해석)
+    "tylenol": (("active", "acetaminophen"),),
+    "advil": (("active", "ibuprofen"), ("class", "NSAID")),
+    "motrin": (("active", "ibuprofen"), ("class", "NSAID")),
+    "aleve": (("active", "naproxen"), ("class", "NSAID")),
+    # 종합감기약 대부분에 들어 있는 성분
+    "종합감기약": (("active", "acetaminophen"), ("active", "dextromethorphan"), ("class", "항히스타민제")),
+    "감기약": (("active", "acetaminophen"),),
+}
+
+# 약/입력별 키 메모 상한 (rules.MEMO_LIMIT와 같은 이유)
+MEMO_LIMIT = 1 << 16
+
+_NAME_SPLIT = re.compile(r"[()\s,·]+")
+
+
+class InteractionIndex:
+    """희소 상호작용 행렬 + 약 키/이름 조각 색인. compile_interactions()로 만든다."""
+
+    def __init__(
+        self,
+        rules: Sequence[Tuple[Key, Key, str]] = (),
+        drugs: Iterable["Drug"] = (),
+        lookup: Callable[[str], "Drug | None"] | None = None,
+    ) -> None:
+        self.matrix: Dict[Key, Dict[Key, str]] = {}
+        for a, b, msg in rules:
+            a, b = self._norm(a), self._norm(b)
+            self.matrix.setdefault(a, {})[b] = msg
+            self.matrix.setdefault(b, {})[a] = msg
+        self.duplicate_classes: FrozenSet[Key] = frozenset(("class", c) for c in DUPLICATE_CLASSES)
+        self._display: Dict[Key, str] = {}  # 소문자 성분 키 → KB 표기 (메시지용)
+        self._drug_keys: Dict[str, FrozenSet[Key]] = {}
+        self._active_keys: Dict[Key, FrozenSet[Key]] = {}  # 성분 키 → 그 성분 + 단일제의 분류 키
+        self._tokens: Dict[str, "Drug"] = {}  # 약명 조각(타이레놀, 아세트아미노펜 …) → 약
+        self._lookup = lookup  # 조각 색인에 없을 때 (카탈로그: 약명 전문 검색)
+        for d in drugs:
+            self._drug_keys[d.name] = self._keys_of(d)
+            for token in _NAME_SPLIT.split(d.name):
+                if len(token) > 1 and token != "등":
+                    self._tokens.setdefault(token.lower(), d)
+
+    @staticmethod
+    def _norm(key: Key) -> Key:
+        kind, value = key
+        return (kind, value.lower()) if kind == "active" else (kind, value)
+
+    def _keys_of(self, drug: "Drug") -> FrozenSet[Key]:
+        keys: Set[Key] = set()
+        for a in drug.actives:
+            key = ("active", a.lower())
+            self._display.setdefault(key, a)
+            keys.add(key)
+        classes = {("class", group) for sub, group in CLASS_GROUPS if sub in drug.dclass}
+        for key in list(keys):
+            # 복합제의 분류는 성분 하나에 붙이지 않는다 (감기약 분류가 아세트아미노펜에 붙지 않게)
+            extra = classes if len(drug.actives) == 1 else set()
+            self._active_keys[key] = self._active_keys.get(key, frozenset((key,))) | extra
+        keys |= classes
+        return frozenset(keys)
+
+    def drug_keys(self, drug: "Drug") -> FrozenSet[Key]:
+        keys = self._drug_keys.get(drug.name)
+        if keys is None:  # 카탈로그처럼 로드 시 약 목록이 없을 때 — 첫 조회에 계산
+            if len(self._drug_keys) >= MEMO_LIMIT:
+                self._drug_keys.clear()
+            keys = self._drug_keys[drug.name] = self._keys_of(drug)
+        return keys
+
+    def lookup_token(self, text: str) -> "Drug | None":
+        drug = self._tokens.get(text.lower())
+        if drug is None and self._lookup is not None:
+            drug = self._lookup(text)
+        return drug
+
+    def alias_keys(self, text: str) -> FrozenSet[Key]:
+        return frozenset(self._norm(k) for k in CURRENT_MED_ALIASES.get(text.lower(), ()))
+
+    def active_keys(self, text: str) -> FrozenSet[Key]:
+        """성분명(대소문자 무관, "ibuprofen") → 성분 키 + 그 성분 단일제의 분류 키. 모르는 성분이면 빈 집합."""
+        return self._active_keys.get(("active", text.strip().lower()), frozenset())
+
+    @staticmethod
+    def _holders(items: Iterable[Tuple[str, FrozenSet[Key]]]) -> Dict[Key, List[str]]:
+        holders: Dict[Key, List[str]] = {}
+        for label, keys in items:
+            for key in keys:
+                names = holders.setdefault(key, [])
+                if label not in names:
+                    names.append(label)
+        return holders
+
+    def _duplicates(self, holders: Dict[Key, List[str]], taking: Set[str] | None) -> List[Tuple[str, str, List[str]]]:
+        """(종류 이름, 표시 이름, 약 목록) — 성분 중복 먼저, 같은 약 묶음의 분류 중복은 생략.
+        taking이 있으면 복용 중인 약이 낀 묶음만."""
+        out: List[Tuple[str, str, List[str]]] = []
+        reported: Set[FrozenSet[str]] = set()
+        for kind in ("active", "class"):
+            for key, names in holders.items():
+                if key[0] != kind or len(names) < 2 or (taking is not None and taking.isdisjoint(names)):
+                    continue
+                if kind == "class" and (key not in self.duplicate_classes or frozenset(names) in reported):
+                    continue
+                reported.add(frozenset(names))
+                out.append(("성분" if kind == "active" else "같은 계열", self._display.get(key, key[1]), names))
+        return out
+
+    def check(
+        self,
+        items: Sequence[Tuple[str, FrozenSet[Key]]],
+        current: Sequence[Tuple[str, FrozenSet[Key]]] = (),
+    ) -> List[str]:
+        """추천 약/복용 중인 약 (표시 이름, 키 집합) 목록 → 중복/상호작용 메시지 (같은 약 쌍은 한 번만).
+        한쪽 이상이 복용 중인 약인 쌍만 본다 — 추천 약끼리는 combine_notes()."""
+        holders = self._holders((*items, *current))
+        taking: Set[str] = {label for label, _ in current}
+        # 1) 성분 중복 먼저
+        out = [f"{what} 중복({display}): {', '.join(names)} — 함께 복용하지 마세요"
+               for what, display, names in self._duplicates(holders, taking)]
+        # 2) 상호작용 — 있는 키마다 행렬 행에서 상대 키가 있는지만 확인
+        for key, names in holders.items():
+            for other, msg in self.matrix.get(key, {}).items():
+                if key < other and other in holders:
+                    pairs = [(a, b) for a in names for b in holders[other]
+                             if a != b and (a in taking or b in taking)]
+                    if pairs:
+                        out.append(f"{msg} ({', '.join(f'{a} + {b}' for a, b in pairs)})")
+        return out
+
+    def combine_notes(self, items: Sequence[Tuple[str, FrozenSet[Key]]]) -> List[str]:
+        """추천 약끼리 성분/같은 계열이 겹치는 묶음 → "하나만 고르세요" 안내 (선택지라 경고는 아님)."""
+        return [f"{what} 겹침({display}): {', '.join(names)} — 하나만 고르세요 (함께 복용하지 마세요)"
+                for what, display, names in self._duplicates(self._holders(items), None)]
+
+def compile_interactions(
+    drugs: Iterable["Drug"],
+    rules=INTERACTION_RULES,
+    lookup: Callable[[str], "Drug | None"] | None = None,
+) -> InteractionIndex:
+    return InteractionIndex(rules, drugs, lookup)
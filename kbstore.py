@@ -0,0 +1,90 @@
+# kbstore.py — 파일 기반 지식 베이스 핫 리로드
+# -----------------------------------------------------------------------------
+# 목적:
+#   - KB 파일(data/kb.json)이 바뀌면 재배포/재시작 없이 새 KB로 교체.
+#   - 요청 경로에서는 os.stat 한 번(주기 제한)만 하고, 변경이 보이면
+#     백그라운드 스레드에서 로드/컴파일 후 참조를 통째로 바꿔 끼운다.
+#     진행 중인 세션은 교체 전 KB를 그대로 쓰므로 막히지 않는다.
+# 배포 방법:
+#   - 새 파일을 임시 경로에 쓴 뒤 os.replace(임시, kb.json) — 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Tuple
+
+from engine import KnowledgeBase, load_kb_file
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+class KBStore:
+    """KB 파일 1개를 감시하며 최신 KnowledgeBase를 제공."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        check_interval: float = 1.0,
+        on_reload: Callable[[KnowledgeBase], None] | None = None,
+    ) -> None:
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self.on_reload = on_reload
+        self.last_error: Exception | None = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._stamp = _stamp(self.path)
+        self._kb = load_kb_file(self.path)  # 최초 로드는 동기(실패 시 그대로 예외)
+        self._checked = time.monotonic()
+
+    @property
+    def version(self) -> str:
+        return self._kb.version
+
+    def current(self) -> KnowledgeBase:
+        """현재 KB. 주기마다 파일 변경을 확인하고, 바뀌었으면 백그라운드 리로드를 건다."""
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            self.check()
+        return self._kb
+
+    def check(self, wait: bool = False) -> bool:
+        """mtime/크기가 바뀌었으면 리로드 시작. wait=True면 끝날 때까지 기다림(테스트/CLI용)."""
+        try:
+            stamp = _stamp(self.path)
+        except OSError as e:  # 교체 중 잠깐 파일이 없을 수 있음 — 기존 KB 유지
+            self.last_error = e
+            return False
+        if stamp == self._stamp or not self._lock.acquire(blocking=False):
+            return False
+        worker = threading.Thread(target=self._reload, args=(stamp,), daemon=True)
+        worker.start()
+        if wait:
+            worker.join()
+        return True
+
+    def _reload(self, stamp: Tuple[int, int]) -> None:
+        try:
+            kb = load_kb_file(self.path)
+            if kb.version != self._kb.version:  # version에 내용 해시 포함 — touch만 된 경우는 그대로
+                # 참조 교체 한 번 = 원자적 스왑. 이전 KB는 닫지 않는다 — 다른 스레드에서 진행 중인
+                # 조회가 끝까지 쓰고, 마지막 참조가 사라지면 GC가 정리(카탈로그 KB는 그때 연결을 닫음)
+                self._kb = kb
+                self.reloads += 1
+                if self.on_reload:
+                    self.on_reload(kb)
+            self._stamp = stamp
+            self.last_error = None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            # 깨진 파일은 건너뛰고 이전 KB 유지. 다음 변경 시 다시 시도.
+            self._stamp = stamp
+            self.last_error = e
+        finally:
+            self._lock.release()
@@ -0,0 +1,321 @@
+# loadtest.py — 동시 세션 부하 테스트 (로컬 Streamlit 서버 + 웹소켓 가상 세션)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 프로세스 1개 / 호스트 1대가 rerun 지연이 나빠지기 전까지 동시 세션을 몇 개 버티는지 보기.
+#   - test.py를 streamlit 서버로 띄우고(--procs개, 포트 연속), 브라우저 대신 웹소켓 세션 N개가
+#     실제 프로토콜(BackMsg rerun_script + 위젯 상태)로 상호작용 스크립트를 돌린다:
+#     증상 칩 켜기/끄기, 상세 입력, 사이드바 체크박스 뒤집기 — 단계 사이 생각 시간(think).
+#     AppTest는 프로세스 전역 Runtime을 바꿔 끼우므로 스레드 여러 개에서 동시에 못 돌린다.
+#   - 단계(--sessions 1,5,10,...)마다: 처리량(rerun/s), rerun 지연 p50/p95/p99, 오류 수,
+#     (실행 중 서버 RSS 최댓값 - 시작 전) ÷ 세션 수 = 세션당 메모리 (Linux /proc, --url로 외부 서버에 붙으면 생략).
+#   - --max-p95-ms를 주면 예산 안에서 버틴 최대 세션 수를 capacity로 보고, 첫 단계부터 넘으면 종료코드 1.
+#   - 결과는 bench.py와 같은 JSON 형식 → bench.py compare로 비교 가능.
+# 사용 예:
+#   python loadtest.py --sessions 1,10,25,50 --steps 8 -o load.json
+#   python loadtest.py --procs 4 --sessions 40,80,160 --max-p95-ms 500      # 호스트 단위
+#   python loadtest.py --url ws://127.0.0.1:8501 --sessions 10             # 이미 떠 있는 앱
+# 환경변수:
+#   띄운 서버는 EVENT_LOG_DIR/ANALYTICS_DIR를 임시 디렉터리로 돌려 ./logs를 오염시키지 않는다.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Tuple
+
+APP = Path(__file__).with_name("test.py")
+SIDEBAR_FLAGS = ("간질환이 있다", "신장질환이 있다", "위궤양/위장출혈 병력", "항응고제", "SSRI/세로토닌계 항우울제", "MAOI")
+DETAILS = (
+    "어제부터 한쪽 두통이 있고 빛에 민감해요",
+    "39도 고열이 이틀째 계속돼요",
+    "밤마다 기침이 심하고 가래가 나와요",
+    "식후에 속쓰림이 있고 소화가 잘 안 돼요",
+    "아침에 콧물과 재채기가 계속 나요",
+    "생리통이 심하고 허리도 아파요",
+    "설사가 며칠째이고 혈변은 없어요",
+    "목이 따갑고 침 삼킬 때 아파요",
+)
+
+
+# =============================
+# 1) 상호작용 스크립트
+# =============================
+
+def session_script(rng: random.Random, chips: Sequence[str], steps: int) -> List[Tuple[str, str, Any]]:
+    """(종류, 위젯 라벨, 값) 목록 — 종류: chip(토글) | detail(상세 입력) | flag(사이드바 체크박스).
+    칩 1~3개를 켜고, 상세를 입력하고, 이후 칩/플래그를 뒤집거나 상세를 고친다."""
+    script: List[Tuple[str, str, Any]] = []
+    on: set = set()
+    flags: set = set()
+    for chip in rng.sample(list(chips), min(len(chips), rng.randint(1, 3))):
+        script.append(("chip", chip, True))
+        on.add(chip)
+    script.append(("detail", "", rng.choice(DETAILS)))
+    while len(script) < steps:
+        roll = rng.random()
+        if roll < 0.4:
+            chip = rng.choice(list(chips))
+            script.append(("chip", chip, chip not in on))
+            on ^= {chip}
+        elif roll < 0.7:
+            flag = rng.choice(SIDEBAR_FLAGS)
+            script.append(("flag", flag, flag not in flags))
+            flags ^= {flag}
+        else:
+            script.append(("detail", "", rng.choice(DETAILS)))
+    return script[:steps]
+
+
+# =============================
+# 2) 가상 세션 (웹소켓)
+# =============================
+
+class Session:
+    """브라우저 탭 1개 흉내: 위젯 라벨 → id를 렌더 결과에서 익히고, 바뀐 상태를 모두 실어 rerun 요청."""
+
+    def __init__(self, url: str) -> None:
+        self.url = url.rstrip("/") + "/_stcore/stream"
+        self.widgets: Dict[str, Tuple[str, str]] = {}  # 라벨 → (id, 요소 종류)
+        self.state: Dict[str, Tuple[str, Any]] = {}    # id → (값 필드, 값)
+        self.errors = 0
+        self._ws: Any = None
+
+    async def connect(self) -> None:
+        import websockets
+
+        self._ws = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self) -> None:
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def rerun(self) -> float:
+        """rerun 요청 → script_finished까지 걸린 시간(초)."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = ""
+        for wid, (field, value) in self.state.items():
+            widget = msg.rerun_script.widget_states.widgets.add()
+            widget.id = wid
+            setattr(widget, field, value)
+        t0 = time.perf_counter()
+        await self._ws.send(msg.SerializeToString())
+        while True:
+            fm = ForwardMsg()
+            fm.ParseFromString(await self._ws.recv())
+            kind = fm.WhichOneof("type")
+            if kind == "script_finished":
+                if fm.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+                    self.errors += 1
+                return time.perf_counter() - t0
+            if kind == "delta" and fm.delta.WhichOneof("type") == "new_element":
+                self._learn(fm.delta.new_element)
+
+    def _learn(self, element: Any) -> None:
+        etype = element.WhichOneof("type")
+        if etype == "exception":
+            self.errors += 1
+        elif etype in ("checkbox", "text_area"):
+            el = getattr(element, etype)
+            self.widgets[el.label] = (el.id, etype)
+
+    def chips(self) -> List[str]:
+        return [label for label, (wid, _) in self.widgets.items() if "-chip_" in wid]
+
+    def apply(self, kind: str, label: str, value: Any) -> None:
+        if kind == "detail":
+            label = next((lb for lb, (_, t) in self.widgets.items() if t == "text_area"), "")
+        if label not in self.widgets:  # 렌더되지 않은 위젯(예: 조건부) — 건너뜀
+            return
+        wid, etype = self.widgets[label]
+        self.state[wid] = ("bool_value" if etype == "checkbox" else "string_value", value)
+
+
+async def _drive(session: Session, steps: int, think: float, rng: random.Random, out: List[float]) -> None:
+    await asyncio.sleep(rng.random() * think)  # 세션 시작 시각 분산
+    await session.connect()
+    try:
+        await session.rerun()  # 첫 페이지 로드 — 위젯 id 수집 (지연 통계에는 넣지 않음)
+        for kind, label, value in session_script(rng, session.chips(), steps):
+            await asyncio.sleep(think * rng.uniform(0.5, 1.5))
+            session.apply(kind, label, value)
+            out.append(await session.rerun())
+    finally:
+        await session.close()
+
+
+# =============================
+# 3) 서버 / 메모리
+# =============================
+
+def _rss(pid: int) -> int | None:
+    """프로세스 RSS(바이트). /proc가 없으면 None."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def start_servers(procs: int, port: int, workdir: str) -> List[subprocess.Popen]:
+    env = {**os.environ, "EVENT_LOG_DIR": str(Path(workdir) / "logs"), "ANALYTICS_DIR": str(Path(workdir) / "analytics")}
+    servers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", str(APP), "--server.headless", "true",
+             "--server.port", str(port + i), "--browser.gatherUsageStats", "false"],
+            cwd=APP.parent, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        for i in range(procs)
+    ]
+    deadline = time.monotonic() + 60
+    for i, proc in enumerate(servers):
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port + i}/_stcore/health", timeout=1) as r:
+                    if r.status == 200:
+                        break
+            except OSError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                stop_servers(servers)
+                raise RuntimeError(f"streamlit 서버 시작 실패 (포트 {port + i})")
+            time.sleep(0.2)
+    return servers
+
+
+def stop_servers(servers: Sequence[subprocess.Popen]) -> None:
+    for proc in servers:
+        proc.terminate()
+    for proc in servers:
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+# =============================
+# 4) 단계 실행 / 보고
+# =============================
+
+def _percentile(samples: List[float], q: float) -> float:
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def _total_rss(pids: Sequence[int]) -> int | None:
+    values = [_rss(pid) for pid in pids]
+    return None if not pids or None in values else sum(values)
+
+
+async def _sample_rss(pids: Sequence[int], peak: List[int], interval: float = 0.1) -> None:
+    """세션이 붙어 있는 동안 서버 RSS 합계의 최댓값을 peak[0]에 기록."""
+    while True:
+        total = _total_rss(pids)
+        if total is not None:
+            peak[0] = max(peak[0], total)
+        await asyncio.sleep(interval)
+
+
+async def run_level(
+    urls: Sequence[str], sessions: int, steps: int, think: float, seed: int, pids: Sequence[int] = (),
+) -> Dict[str, Any]:
+    """세션 n개를 서버들에 고르게 나눠 동시에 실행. 지연은 마이크로초.
+    pids(서버 프로세스)가 있으면 실행 중 RSS 최댓값 - 시작 전 RSS를 세션 수로 나눠 세션당 메모리로."""
+    latencies: List[float] = []
+    pool = [Session(urls[i % len(urls)]) for i in range(sessions)]
+    before = _total_rss(pids)
+    peak = [before or 0]
+    sampler = asyncio.create_task(_sample_rss(pids, peak)) if before is not None else None
+    t0 = time.perf_counter()
+    results = await asyncio.gather(
+        *(_drive(s, steps, think, random.Random(seed * 100_003 + i), latencies) for i, s in enumerate(pool)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - t0
+    if sampler is not None:
+        sampler.cancel()
+    failed = [r for r in results if isinstance(r, BaseException)]
+    samples = sorted(x * 1e6 for x in latencies) or [0.0]
+    memory = {} if before is None else {"rss_bytes": peak[0], "bytes_per_session": (peak[0] - before) / sessions}
+    return {
+        "name": "load.rerun", "size": sessions,
+        "median_us": statistics.median(samples),
+        "p95_us": _percentile(samples, 0.95),
+        "p99_us": _percentile(samples, 0.99),
+        "repeat": len(latencies),
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "errors": sum(s.errors for s in pool) + len(failed),
+        **memory,
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="동시 세션 부하 테스트")
+    p.add_argument("--sessions", default="1,5,10,25", help="동시 세션 수 단계 (쉼표)")
+    p.add_argument("--steps", type=int, default=6, help="세션당 상호작용 수 (각각 rerun 1회)")
+    p.add_argument("--think", type=float, default=1.0, help="상호작용 사이 평균 생각 시간(초), 0이면 쉬지 않음")
+    p.add_argument("--procs", type=int, default=1, help="띄울 서버 프로세스 수 (호스트 단위 측정)")
+    p.add_argument("--port", type=int, default=8601, help="첫 서버 포트")
+    p.add_argument("--url", action="append", help="이미 떠 있는 앱 주소 (여러 번 가능) — 서버를 띄우지 않음")
+    p.add_argument("--max-p95-ms", type=float, help="p95 예산 — 넘기 전 최대 세션 수를 capacity로 보고")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("-o", "--output", default="-", help="결과 JSON 경로 (기본: 표준출력)")
+    args = p.parse_args(argv)
+
+    levels = [int(s) for s in args.sessions.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        servers = [] if args.url else start_servers(args.procs, args.port, tmp)
+        urls = args.url or [f"ws://127.0.0.1:{args.port + i}" for i in range(args.procs)]
+        try:
+            asyncio.run(run_level(urls, len(urls), 1, 0.0, args.seed))  # 워밍업: KB 로드/캐시 채우기
+            results = []
+            for n in levels:
+                r = asyncio.run(run_level(urls, n, args.steps, args.think, args.seed + n, [s.pid for s in servers]))
+                results.append(r)
+                mem = f"{r['bytes_per_session'] / 1024:>8.0f} KiB/session" if "bytes_per_session" in r else ""
+                print(f"sessions={n:<5} {r['throughput_rps']:>7.1f} rerun/s  p50 {r['median_us'] / 1000:>7.1f}"
+                      f"  p95 {r['p95_us'] / 1000:>7.1f}  p99 {r['p99_us'] / 1000:>7.1f} ms  errors {r['errors']}  {mem}",
+                      file=sys.stderr)
+        finally:
+            stop_servers(servers)
+
+    capacity = None
+    if args.max_p95_ms is not None:
+        within = [r["size"] for r in results if r["p95_us"] / 1000 <= args.max_p95_ms and not r["errors"]]
+        capacity = max(within) if within else 0
+    text = json.dumps({
+        "meta": {
+            "timestamp": datetime.now().isoformat(), "python": platform.python_version(), "platform": platform.platform(),
+            "procs": len(urls), "steps": args.steps, "think": args.think, "capacity": capacity,
+        },
+        "results": results,
+    }, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    if capacity is not None:
+        print(f"capacity (p95 ≤ {args.max_p95_ms:.0f} ms): {capacity} sessions / {len(urls)} procs", file=sys.stderr)
+        return 1 if capacity == 0 else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,10 @@
+import json
+import os
+from pathlib import Path
+
 import streamlit as st
+from assets import ImageCache
+from fuzzy import FuzzyIndex
 
 # CSS 스타일 (무채색 위주, 심플하고 세련되게, 제목 글씨 잘림 방지 포함)
 st.markdown("""
@@ -125,41 +131,26 @@ h1 {
 </style>
 """, unsafe_allow_html=True)
 
-# 데이터 (무채색과 잘 어울리게 이모지 없이 심플하게)
-drug_data = {
-    "두통": {
-        "질병": "긴장성 두통",
-        "약물": "아세트아미노펜",
-        "구입경로": "일반의약품 (약국에서 구매 가능)",
-        "체질주의": "간 질환 환자는 주의 필요",
-        "복용법": "4~6시간 간격으로 복용",
-        "이미지": "https://upload.wikimedia.org/wikipedia/commons/3/3b/Paracetamol_200mg_tablets.jpg"
-    },
-    "기침": {
-        "질병": "감기",
-        "약물": "덱스트로메토르판",
-        "구입경로": "일반의약품 (약국에서 구매 가능)",
-        "체질주의": "천식 환자 주의",
-        "복용법": "하루 3회 복용",
-        "이미지": "https://upload.wikimedia.org/wikipedia/commons/0/0f/Dextromethorphan.png"
-    },
-    "열": {
-        "질병": "감염성 질환",
-        "약물": "이부프로펜",
-        "구입경로": "일반의약품 (약국에서 구매 가능)",
-        "체질주의": "위장 장애 환자 주의",
-        "복용법": "식후 복용",
-        "이미지": "https://upload.wikimedia.org/wikipedia/commons/8/88/Ibuprofen_200mg_tablets.jpg"
-    },
-    "목 통증": {
-        "질병": "편도염",
-        "약물": "아목시실린",
-        "구입경로": "병원 처방 필요",
-        "체질주의": "페니실린 알레르기 환자 주의",
-        "복용법": "하루 3회 7일간 복용",
-        "이미지": "https://upload.wikimedia.org/wikipedia/commons/e/e9/Amoxicillin_capsules.jpg"
-    }
-}
+# 데이터 (무채색과 잘 어울리게 이모지 없이 심플하게) — data/drug_data.json
+DRUG_DATA_PATH = Path(__file__).with_name("data") / "drug_data.json"
+
+
+@st.cache_resource(show_spinner=False)
+def load_drug_data(mtime_ns: int):
+    """파일 수정 시각별로 1번만 로드 — 파일이 바뀌면 재시작 없이 다음 실행부터 반영.
+    증상 키 전체를 자모 색인으로 컴파일 — 정확히 같은 키뿐 아니라 띄어쓰기/오타 변형도 찾는다."""
+    data = json.loads(DRUG_DATA_PATH.read_text(encoding="utf-8"))["symptoms"]
+    order = {key: i for i, key in enumerate(data)}
+    return data, FuzzyIndex.from_patterns(data.keys()), order
+
+
+drug_data, symptom_index, symptom_order = load_drug_data(os.stat(DRUG_DATA_PATH).st_mtime_ns)
+
+
+@st.cache_resource(show_spinner=False)
+def image_cache() -> ImageCache:
+    """약 사진 로컬 캐시 (프로세스당 1개) — 원격 URL은 처음 한 번만 받는다."""
+    return ImageCache()
 
 # 제목
 st.markdown("<h1>증상 기반 약 추천 & 구입 경로 안내</h1>", unsafe_allow_html=True)
@@ -172,18 +163,17 @@ symptom = st.text_input("증상을 입력하세요 (예: 두통, 기침, 열, 
 
 if st.button("분석하기"):
     matched = False
-    for key in drug_data.keys():
-        if key in symptom:
-            info = drug_data[key]
-            st.markdown('<div class="card">', unsafe_allow_html=True)
-            st.markdown(f'<div class="card-title">예상 질병: {info["질병"]}</div>', unsafe_allow_html=True)
-            st.image(info["이미지"], width=180, output_format="auto", caption=info["약물"], use_column_width=False)
-            st.markdown(f'<div class="highlight">추천 약물: {info["약물"]}</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="highlight">구입 경로: {info["구입경로"]}</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="highlight">체질/건강 상태 주의: {info["체질주의"]}</div>', unsafe_allow_html=True)
-            st.markdown(f'<div class="highlight">복용법: {info["복용법"]}</div>', unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
-            matched = True
+    for key in sorted(symptom_index.scan(symptom), key=symptom_order.__getitem__):
+        info = drug_data[key]
+        st.markdown('<div class="card">', unsafe_allow_html=True)
+        st.markdown(f'<div class="card-title">예상 질병: {info["질병"]}</div>', unsafe_allow_html=True)
+        st.image(image_cache().image_bytes(info["이미지"]), width=180, output_format="auto", caption=info["약물"], use_column_width=False)
+        st.markdown(f'<div class="highlight">추천 약물: {info["약물"]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="highlight">구입 경로: {info["구입경로"]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="highlight">체질/건강 상태 주의: {info["체질주의"]}</div>', unsafe_allow_html=True)
+        st.markdown(f'<div class="highlight">복용법: {info["복용법"]}</div>', unsafe_allow_html=True)
+        st.markdown('</div>', unsafe_allow_html=True)
+        matched = True
 
     if not matched:
         st.warning("해당 증상에 대한 정보가 없습니다. 의료 전문가 상담을 권장합니다.")
@@ -0,0 +1,85 @@
+# matcher.py — 다중 키워드 매칭 (Aho–Corasick)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 증상 키, 의심 질환 힌트, 빨간 깃발 문구를 하나의 오토마톤으로 컴파일해
+#     입력 문장을 한 번만 훑어서 모든 키워드를 찾는다.
+#   - 키워드 수가 수십 → 수만 개로 늘어나도 요청당 매칭 비용은 입력 길이에 비례.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Set, Tuple
+
+
+class KeywordMatcher:
+    """Aho–Corasick 오토마톤. add()로 패턴을 모은 뒤 build() 후 scan()."""
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]   # 상태별 전이
+        self._fail: List[int] = [0]               # 실패 링크 (build에서 계산)
+        self._own: List[List[Hashable]] = [[]]    # 상태별로 add()한 payload
+        self._out: List[List[Hashable]] = [[]]    # 상태별 출력(payload, build 후 접미사 상태 포함)
+        self._built = False
+
+    @classmethod
+    def from_patterns(cls, patterns: Iterable[str]) -> "KeywordMatcher":
+        m = cls()
+        for p in patterns:
+            m.add(p)
+        m.build()
+        return m
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+    def add(self, pattern: str, payload: Hashable | None = None) -> None:
+        """패턴 등록. payload 생략 시 패턴 문자열 자체가 결과로 나온다."""
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._own.append([])
+            state = nxt
+        self._own[state].append(pattern if payload is None else payload)
+        self._built = False
+
+    def build(self) -> None:
+        """BFS로 실패 링크를 계산하고 출력을 접미사 상태들과 합친다.
+        매번 add()한 출력에서 새로 계산 — KB 재로드 등으로 다시 불러도 출력이 중복되지 않는다."""
+        self._fail = [0] * len(self._goto)
+        self._out = [list(own) for own in self._own]
+        queue: deque[int] = deque()
+        queue.extend(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                if self._out[self._fail[nxt]]:
+                    self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, Any]]:
+        """(끝 위치, payload)를 등장 순서대로 생성."""
+        if not self._built:
+            self.build()
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for payload in out[state]:
+                yield i, payload
+
+    def scan(self, text: str) -> Set[Any]:
+        """입력에 등장한 payload 집합(중복 제거)."""
+        return {payload for _, payload in self.iter_matches(text)}
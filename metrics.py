@@ -0,0 +1,190 @@
+# metrics.py — 단계별 시간 측정 + 히스토그램 + Prometheus 텍스트 내보내기
+# -----------------------------------------------------------------------------
+# 목적:
+#   - p99 지연이 튈 때 KB 로드/질환 매칭/경고/내보내기/렌더링 중 어디서 시간이 갔는지 보기.
+#   - span("이름")으로 감싼 구간과 @timed 엔진 함수의 시간을 프로세스 내 히스토그램에 누적.
+#   - Prometheus 텍스트 형식으로 파일(textfile collector) 또는 로컬 포트(/metrics)에 노출.
+#   - 현재 rerun의 구간 목록은 스레드 로컬(Streamlit 세션 = 스크립트 스레드)에 남겨 디버그 패널에서 표시.
+# 켜기:
+#   METRICS=1 (기본 꺼짐 — 꺼져 있으면 span은 공유 no-op, @timed는 bool 확인 1번)
+#   METRICS_PORT=9464  /  METRICS_FILE=/var/lib/node_exporter/symptom_reco.prom
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import functools
+import os
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PREFIX = "symptom_reco"
+BUCKETS: Tuple[float, ...] = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_enabled = os.environ.get("METRICS", "") not in ("", "0")
+_NOOP = nullcontext()
+_local = threading.local()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+# =============================
+# 1) 히스토그램
+# =============================
+
+class Histogram:
+    """Prometheus 방식 누적 버킷 히스토그램 (라벨 = 구간 이름)."""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: Dict[str, List[float]] = {}  # 이름 → [버킷별 개수..., 합, 개수]
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            row = self._series.get(name)
+            if row is None:
+                row = self._series[name] = [0.0] * (len(self.buckets) + 2)
+            for i, le in enumerate(self.buckets):
+                if seconds <= le:
+                    row[i] += 1
+                    break
+            row[-2] += seconds
+            row[-1] += 1
+
+    def snapshot(self) -> Dict[str, List[float]]:
+        with self._lock:
+            return {k: list(v) for k, v in self._series.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+STAGES = Histogram()
+_gauges: Dict[str, Tuple[str, Callable[[], float]]] = {}
+
+
+def register_gauge(name: str, help_text: str, fn: Callable[[], float]) -> None:
+    """내보낼 때마다 fn()을 읽는 게이지 (예: 리포트 캐시 적중 수)."""
+    _gauges[name] = (help_text, fn)
+
+
+# =============================
+# 2) 구간 측정
+# =============================
+
+class _Span:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        record(self.name, time.perf_counter() - self.t0)
+
+
+def record(name: str, seconds: float) -> None:
+    STAGES.observe(name, seconds)
+    spans = getattr(_local, "spans", None)
+    if spans is not None:
+        spans.append((name, seconds))
+
+
+def span(name: str):
+    """with span("stage"): ... — 꺼져 있으면 공유 no-op 컨텍스트."""
+    return _Span(name) if _enabled else _NOOP
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """함수 호출 시간을 name으로 기록하는 데코레이터."""
+    def deco(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - t0)
+        return wrapper  # type: ignore[return-value]
+    return deco
+
+
+def begin_rerun() -> None:
+    """현재 스레드(=세션 rerun)의 구간 목록 초기화."""
+    _local.spans = [] if _enabled else None
+
+
+def rerun_spans() -> List[Tuple[str, float]]:
+    return list(getattr(_local, "spans", None) or ())
+
+
+# =============================
+# 3) 내보내기 (Prometheus 텍스트)
+# =============================
+
+def render_prometheus() -> str:
+    metric = f"{PREFIX}_stage_seconds"
+    lines = [
+        f"# HELP {metric} Time spent per pipeline stage / engine function.",
+        f"# TYPE {metric} histogram",
+    ]
+    for name, row in sorted(STAGES.snapshot().items()):
+        cumulative = 0.0
+        for le, n in zip(STAGES.buckets, row):
+            cumulative += n
+            lines.append(f'{metric}_bucket{{stage="{name}",le="{le}"}} {cumulative:g}')
+        lines.append(f'{metric}_bucket{{stage="{name}",le="+Inf"}} {row[-1]:g}')
+        lines.append(f'{metric}_sum{{stage="{name}"}} {row[-2]:.9f}')
+        lines.append(f'{metric}_count{{stage="{name}"}} {row[-1]:g}')
+    for name, (help_text, fn) in sorted(_gauges.items()):
+        lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} gauge", f"{PREFIX}_{name} {fn():g}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str | os.PathLike) -> None:
+    """node_exporter textfile collector용 — 임시 파일 후 교체."""
+    path = Path(path)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(render_prometheus(), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def serve(port: int, host: str = "127.0.0.1") -> Any:
+    """백그라운드 스레드에서 /metrics 제공. http.server는 여기서만 import (배치/워커 시작 시간 절약)."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args: Any) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
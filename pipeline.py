@@ -0,0 +1,69 @@
+# pipeline.py — 증분 리포트 (입력이 바뀐 단계만 다시 계산)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - Streamlit은 위젯 하나만 바뀌어도 스크립트 전체를 다시 실행한다. 리포트 캐시(reportcache)는
+#     입력 전체가 같을 때만 적중 — 체크박스 하나를 바꾸면 모든 단계를 다시 계산했다.
+#   - engine.REPORT_STAGES가 단계별 입력(selected/detail/tags/ctx/meds + KB 버전)을 선언한다.
+#     IncrementalReport는 단계마다 직전 입력 지문과 결과를 기억하고, 지문이 바뀐 단계만 다시 실행.
+#     예) 상세 입력 → alerts/conditions만, 복용 중인 약 → interactions만.
+#     앞 단계 결과를 입력으로 쓰는 단계(개인 주의/상호작용 ← 추천 순위)는 그 결과 값이 바뀔 때만 다시 계산.
+#   - 결과가 재사용되면 같은 객체 그대로 → test.py가 객체 동일성으로 카드 HTML도 재사용한다.
+#   - 세션(사용자)마다 1개 — 세션 간 공유는 ReportCache 몫. build()는 build_report와 같은
+#     시그니처라 report_cache().get_or_build(..., inc.build)로 그대로 끼울 수 있다.
+# 사용 예:
+#   inc = IncrementalReport()
+#   report = inc.build(kb, ["두통"], "", [], {"ulcer": True})
+#   inc.recomputed   # 직전 build에서 다시 계산한 단계 키
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Tuple
+
+from engine import REPORT_STAGES, KnowledgeBase, assemble_report, report_inputs
+from metrics import span
+from rules import ctx_mask
+
+# 입력 이름 → 비교용 지문 (ctx는 결과에 영향 있는 플래그 마스크만 — 나이/성별 변경은 무시).
+# 여기 없는 이름(앞 단계 결과)은 값 그대로 비교 — 재사용된 결과면 같은 객체라 비교 비용이 없다.
+FINGERPRINTS: Dict[str, Callable[[Any], Any]] = {
+    "selected": tuple,
+    "detail": str,
+    "tags": tuple,
+    "ctx": ctx_mask,
+    "meds": tuple,
+}
+
+
+class IncrementalReport:
+    """단계별 (입력 지문, 결과) 메모. 세션당 1개, 한 스레드에서만 호출."""
+
+    def __init__(self, stages=REPORT_STAGES) -> None:
+        self.stages = stages
+        self.recomputed: List[str] = []
+        self._memo: Dict[str, Tuple[Tuple[Any, ...], Any]] = {}
+
+    def build(
+        self,
+        kb: KnowledgeBase,
+        selected: List[str],
+        detail: str,
+        tags: List[str],
+        ctx: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        values = report_inputs(selected, detail, tags, ctx)
+        self.recomputed = []
+        for key, deps, fn in self.stages:
+            fingerprint = (kb.version, *(FINGERPRINTS[n](values[n]) if n in FINGERPRINTS else values[n] for n in deps))
+            memo = self._memo.get(key)
+            if memo is not None and memo[0] == fingerprint:
+                values[key] = memo[1]
+                continue
+            with span(f"stage.{key}"):
+                values[key] = fn(kb, *(values[n] for n in deps))
+            self._memo[key] = (fingerprint, values[key])
+            self.recomputed.append(key)
+        return assemble_report(kb, values, values)
+
+    def clear(self) -> None:
+        self._memo.clear()
+        self.recomputed = []
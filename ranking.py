@@ -0,0 +1,74 @@
+# ranking.py — 추천 약 순위 (증상 커버리지 − 금기/avoid_if 감점, 힙 top-k)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - recommend_drugs는 symptom_to_drugs 삽입 순서 그대로 전부 돌려준다 — 큰 카탈로그에서는
+#     카드/CSV가 후보 수만큼 커진다. 후보마다 점수를 매겨 상위 k개만 남긴다.
+#   - 점수 = coverage × (선택 증상 중 이 약이 커버하는 수)
+#            − contraindication × (개인 상황 규칙 주의 수, rules.py)
+#            − avoid_if × (avoid_if 항목 중 사용자 상황/추가 키워드에 걸리는 수)
+#     동점은 기존 순서(선택 증상 순서 → KB 순서).
+#   - heapq.nsmallest(k) — 후보를 전부 정렬하지 않고 O(n log k).
+#   - 가중치/k는 인자로, 기본값은 환경변수로 바꿀 수 있다.
+# 환경변수:
+#   RECOMMEND_TOP_K (기본 10), RANK_W_COVERAGE (기본 1.0),
+#   RANK_W_CONTRAINDICATION (기본 0.5), RANK_W_AVOID_IF (기본 0.5)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import heapq
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Drug
+
+DEFAULT_TOP_K = int(os.environ.get("RECOMMEND_TOP_K", 10))
+
+# 개인 상황 플래그 → avoid_if 문구에서 찾을 말 (예: ulcer → "소화성 궤양/위장 출혈")
+AVOID_IF_TERMS: Dict[str, Tuple[str, ...]] = {
+    "pregnant": ("임신",),
+    "liver": ("간질환",),
+    "kidney": ("신장",),
+    "ulcer": ("궤양", "출혈"),
+    "maoi": ("MAOI",),
+}
+
+# (약, 커버하는 선택 증상)
+Candidate = Tuple["Drug", Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class RankWeights:
+    coverage: float = float(os.environ.get("RANK_W_COVERAGE", 1.0))
+    contraindication: float = float(os.environ.get("RANK_W_CONTRAINDICATION", 0.5))
+    avoid_if: float = float(os.environ.get("RANK_W_AVOID_IF", 0.5))
+
+
+def avoid_terms(ctx: Dict[str, Any], tags: Iterable[str] = ()) -> Tuple[str, ...]:
+    """avoid_if 문구와 대조할 말 — 켜진 개인 상황 플래그의 말 + 사용자 추가 키워드(천식, 소아 등)."""
+    terms = [t for flag, words in AVOID_IF_TERMS.items() if ctx.get(flag) for t in words]
+    terms += [t.strip() for t in tags if t.strip()]
+    return tuple(dict.fromkeys(terms))
+
+
+def avoid_hits(drug: "Drug", terms: Sequence[str]) -> int:
+    return sum(1 for a in drug.avoid_if if any(t in a for t in terms)) if terms else 0
+
+
+def rank(
+    candidates: Iterable[Candidate],
+    contraindications: Callable[["Drug"], int],
+    terms: Sequence[str] = (),
+    k: int = DEFAULT_TOP_K,
+    weights: RankWeights = RankWeights(),
+) -> List[Candidate]:
+    """후보 → 점수 높은 순 상위 k개 (동점은 후보 순서)."""
+    def key(item: Tuple[int, Candidate]) -> Tuple[float, int]:
+        pos, (drug, covered) = item
+        score = (weights.coverage * len(covered)
+                 - weights.contraindication * contraindications(drug)
+                 - weights.avoid_if * avoid_hits(drug, terms))
+        return -score, pos
+
+    return [c for _, c in heapq.nsmallest(k, enumerate(candidates), key=key)]
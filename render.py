@@ -0,0 +1,137 @@
+# render.py — 결과 카드 HTML 조각 (이스케이프 + 템플릿 캐시)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - 카드 하나를 st.markdown 한 번(= 웹소켓 델타 1개)으로 보내도록 HTML 문자열을 미리 조립.
+#     기존엔 주의사항 pill 하나, <div> 열고 닫기마다 요소가 따로 생겼다.
+#   - KB/사용자 문자열은 전부 html.escape → unsafe_allow_html 주입 구멍 차단.
+#   - 약 카드 조각은 (약 내용, 개인 주의) 단위로 lru_cache — 같은 카드는 다시 조립하지 않음.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+from functools import lru_cache
+from html import escape
+from typing import Any, Dict, List, Sequence, Tuple
+
+from engine import Drug
+
+AVAILABILITY_TAG = {"처방전 필요": "red", "약국 + 일부 편의점 소포장": "yellow"}
+
+CARD = '<div class="app-card{cls}"><div class="section-title">{title}</div>{body}</div>'
+
+
+def _e(value: Any) -> str:
+    return escape(str(value), quote=True)
+
+
+def card(title: str, body: str, cls: str = "") -> str:
+    """섹션 카드 껍데기. title/body는 이미 안전한 HTML이어야 한다."""
+    return CARD.format(cls=f" {cls}" if cls else "", title=title, body=body)
+
+
+# =============================
+# 1) 의심 질환 / 빨간 깃발
+# =============================
+
+def conditions_html(conditions: List[Dict[str, Any]], limit: int = 6) -> str:
+    if not conditions:
+        body = "<p>선택한 증상으로 특정하기 어렵습니다. 증상 상세를 더 적어주세요.</p>"
+    else:
+        body = "".join(
+            f"<p><b>{_e(c['name'])}</b> · <span class='muted small'>({_e(c['symptom'])}, 점수 {_e(c['score'])})</span>"
+            f"<br><span class='small'>{_e(c['notes'])}</span></p>"
+            for c in conditions[:limit]
+        )
+    return card("🩺 의심 질환(참고)", body)
+
+
+def alerts_html(alerts: List[str]) -> str:
+    if not alerts:
+        return ""
+    body = "".join(f"<span class='tag red'>{_e(a)}</span>" for a in alerts)
+    return card("🚩 즉시 주의/진료 권고", body, cls="alert")
+
+
+# =============================
+# 2) 추천 약
+# =============================
+
+@lru_cache(maxsize=2048)
+def _drug_card(
+    name: str,
+    dclass: str,
+    indications: Tuple[str, ...],
+    dose_note: str,
+    cautions: Tuple[str, ...],
+    availability: str,
+    warnings: Tuple[str, ...],
+) -> str:
+    left = [
+        f"<p><b>{_e(name)}</b> · {_e(dclass)}</p>",
+        f"<ul><li>적응증: {_e(', '.join(indications))}</li><li>복용: {_e(dose_note)}</li></ul>",
+    ]
+    if cautions:
+        left.append("<p><b>주의사항:</b></p><div>" + "".join(f"<span class='pill'>{_e(c)}</span>" for c in cautions) + "</div>")
+    if warnings:
+        left.append("<p><b>개인 상황 주의:</b></p><div>" + "".join(f"<span class='pill'>{_e(w)}</span>" for w in warnings) + "</div>")
+    tag = AVAILABILITY_TAG.get(availability, "green")
+    right = (
+        f"<span class='tag {tag}'>가용성: {_e(availability)}</span><br>"
+        "<span class='muted small'><i>한국 기준: 일부 OTC는 편의점 소포장 판매</i></span>"
+    )
+    return f"<div class='drug-card'><div>{''.join(left)}</div><div>{right}</div></div>"
+
+
+def drug_card_html(drug: Drug, warnings: Sequence[str]) -> str:
+    return _drug_card(
+        drug.name, drug.dclass, tuple(drug.indications), drug.dose_note,
+        tuple(drug.cautions), drug.availability, tuple(warnings),
+    )
+
+
+def recommendations_html(
+    drugs: List[Drug],
+    personal: Dict[str, List[str]],
+    interactions: Sequence[str] = (),
+    combine_notes: Sequence[str] = (),
+) -> str:
+    if not drugs:
+        body = "<p>해당 증상에 대한 일반의약품 추천 정보가 부족합니다.</p>"
+    else:
+        body = "".join(drug_card_html(d, personal.get(d.name, ())) for d in drugs)
+    if combine_notes:  # 추천 약끼리 겹침 — 경고(red)가 아닌 안내(yellow)
+        body = (
+            "<p><b>함께 복용하지 말고 하나만 고르세요:</b></p><div>"
+            + "".join(f"<span class='tag yellow'>{_e(m)}</span>" for m in combine_notes)
+            + "</div>" + body
+        )
+    if interactions:
+        body = (
+            "<p><b>함께 복용 주의 (성분 중복/상호작용):</b></p><div>"
+            + "".join(f"<span class='tag red'>{_e(m)}</span>" for m in interactions)
+            + "</div>" + body
+        )
+    return card("💡 추천 일반의약품(OTC)", body)
+
+
+# =============================
+# 3) 고정 안내 카드
+# =============================
+
+PRESCRIPTION_EXAMPLES_HTML = card(
+    "🧠 처방전이 필요한 경우 예시",
+    "<ul>"
+    "<li><b>세균 감염 의심</b>(중이염/축농증/폐렴 등): 항생제는 <b>처방전 필요</b></li>"
+    "<li><b>역류/위염 장기치료 필요</b>: 고용량 PPI 등은 <b>처방전 필요</b></li>"
+    "<li><b>천식/만성기침</b>: 흡입제/장기치료는 <b>처방전 필요</b></li>"
+    "<li><b>심한 통증/염증</b>: 주사제/강력 진통제는 <b>처방전 필요</b></li>"
+    "</ul>",
+)
+
+SELFCARE_HTML = card(
+    "🌿 셀프케어 팁",
+    "<ul>"
+    "<li><b>수분/휴식</b>: 감기/발열/설사 시 수분과 휴식이 중요합니다.</li>"
+    "<li><b>카페인/야식 조절</b>: 두통·역류성 식도염 악화 요인일 수 있어요.</li>"
+    "<li><b>복약 간격/중복 성분 확인</b>: 종합감기약 + 해열제 동시 복용 시 성분 중복 주의.</li>"
+    "</ul>",
+)
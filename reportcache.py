@@ -0,0 +1,145 @@
+# reportcache.py — 정규화된 입력 기준 리포트 캐시 (세션 간 공유)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - Streamlit은 위젯이 바뀔 때마다 스크립트 전체를 다시 실행한다.
+#     입력이 직전/다른 세션과 같으면 엔진을 건너뛰고 저장된 리포트를 그대로 쓴다.
+#   - 키 = (KB 버전, 선택 증상, 상세, 태그, ctx 플래그 마스크, 복용 중인 약)
+#     → KB가 바뀌면 자동으로 다른 키. 나이/성별처럼 결과에 영향 없는 값은 키에서 제외.
+#   - 입력은 정규화 후 키로 쓰고 리포트도 정규화된 입력으로 만든다 (normalize_inputs):
+#     상세의 연속 공백, 태그/복용 약의 순서·앞뒤 공백·중복만 다른 입력은 같은 항목.
+#     리포트에 그대로 보이는 입력(detail/tags)은 요청한 값으로 돌려준다.
+#   - LRU + TTL, 항목 수/메모리(대략치) 상한, 적중/미스 카운터.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from rules import ctx_mask
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("REPORT_CACHE_MAX_ENTRIES", 4096))
+DEFAULT_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_BYTES", 32 * 1024 * 1024))
+DEFAULT_TTL = float(os.environ.get("REPORT_CACHE_TTL", 3600))
+
+
+def normalize_inputs(
+    selected: List[str],
+    detail: str,
+    tags: List[str],
+    ctx: Dict[str, Any],
+) -> Tuple[List[str], str, List[str], Dict[str, Any]]:
+    """결과가 같은 입력을 하나로. 증상 순서는 결과 순서에 영향이 있으므로 그대로 둔다."""
+    meds = sorted({m.strip() for m in ctx.get("meds", ()) if m.strip()})
+    return (
+        list(selected),
+        " ".join(detail.split()),
+        sorted({t.strip() for t in tags if t.strip()}),
+        {**ctx, "meds": meds},
+    )
+
+
+def report_key(
+    kb_version: str,
+    selected: List[str],
+    detail: str,
+    tags: List[str],
+    ctx: Dict[str, Any],
+) -> Tuple[Hashable, ...]:
+    """캐시 키 — normalize_inputs를 거친 값으로 만든다."""
+    return (kb_version, tuple(selected), detail, tuple(tags), ctx_mask(ctx), tuple(ctx.get("meds", ())))
+
+
+class ReportCache:
+    """스레드 안전 LRU/TTL 캐시. 값은 timestamp를 뺀 리포트 dict."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._bytes = 0
+        self._data: OrderedDict[Tuple[Hashable, ...], Tuple[float, int, Dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Tuple[Hashable, ...]) -> Dict[str, Any] | None:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and now - item[0] > self.ttl:
+                self._drop(key)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[2]
+
+    def put(self, key: Tuple[Hashable, ...], report: Dict[str, Any]) -> None:
+        value = {k: v for k, v in report.items() if k != "timestamp"}
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))  # 대략적인 메모리 크기
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (time.monotonic(), size, value)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def _drop(self, key: Tuple[Hashable, ...]) -> None:
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get_or_build(
+        self,
+        kb: Any,
+        selected: List[str],
+        detail: str,
+        tags: List[str],
+        ctx: Dict[str, Any],
+        build: Callable[..., Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """캐시 적중 시 저장된 리포트(새 timestamp), 아니면 정규화된 입력으로 build(kb, selected, detail, tags, ctx)."""
+        inputs = normalize_inputs(selected, detail, tags, ctx)
+        key = report_key(kb.version, *inputs)
+        report = self.get(key)
+        if report is not None:
+            report = {"timestamp": datetime.now().isoformat(), **report}
+        else:
+            report = build(kb, *inputs)
+            self.put(key, report)
+        return {**report, "detail": detail, "tags": tags}  # 보이는 입력은 요청 그대로
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,115 @@
+# rules.py — 개인 상황별 금기/주의 규칙 (선언형 테이블 + 비트마스크 컴파일)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - personalize_warnings의 하드코딩 if-체인을 (ctx 플래그, 대상, 메시지) 테이블로 대체.
+#   - KB 로드 시 약마다 "걸리는 규칙" 비트마스크를 미리 계산해 두고,
+#     요청 시에는 (약 마스크 & ctx 마스크로 켜진 규칙) AND 한 번 + 테이블 조회로 끝낸다.
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Drug
+
+# 사이드바에서 수집하는 개인 상황 플래그 (비트 순서 = 튜플 순서)
+CTX_FLAGS: Tuple[str, ...] = ("pregnant", "liver", "kidney", "ulcer", "anticoagulant", "ssri", "maoi")
+
+# 규칙 대상: ("class", 분류 부분문자열) | ("active", 성분 부분문자열) | ("name", 약명 부분문자열)
+Target = Tuple[str, str]
+
+NSAID: Tuple[Target, ...] = (("class", "NSAID"), ("name", "이부프로펜"), ("name", "나프록센"))
+ACETAMINOPHEN: Tuple[Target, ...] = (("active", "Acetaminophen"),)
+DEXTROMETHORPHAN: Tuple[Target, ...] = (("active", "Dextromethorphan"),)
+
+# (약, ctx 마스크)별 메모 상한 — 대형 카탈로그에서도 메모리 유지
+MEMO_LIMIT = 1 << 16
+
+# (ctx 플래그, 대상 중 하나라도 해당하면, 메시지) — 메시지 출력 순서 = 테이블 순서
+CONTRAINDICATION_RULES: Tuple[Tuple[str, Tuple[Target, ...], str], ...] = (
+    ("pregnant", NSAID, "임신 후기(NSAID 금기) 가능성 시 복용 금지. 전문가 상담 필요"),
+    ("liver", ACETAMINOPHEN, "간질환: 아세트아미노펜 용량 엄격 준수 또는 회피 고려"),
+    ("kidney", NSAID, "신장질환: NSAID는 악화 가능 — 전문가 상담"),
+    ("ulcer", NSAID, "위궤양/위장출혈 병력: NSAID는 출혈 재발 위험 — 전문가 상담"),
+    ("anticoagulant", NSAID, "항응고제 병용: 위장출혈 위험 증가"),
+    ("maoi", DEXTROMETHORPHAN, "MAOI 병용 금기(덱스트로메토르판)"),
+    ("ssri", DEXTROMETHORPHAN, "SSRI 등과 병용 시 세로토닌 증후군 위험"),
+)
+
+
+def ctx_mask(ctx: Dict[str, Any]) -> int:
+    """ctx dict → 플래그 비트마스크."""
+    mask = 0
+    for i, flag in enumerate(CTX_FLAGS):
+        if ctx.get(flag):
+            mask |= 1 << i
+    return mask
+
+
+def _matches(drug: "Drug", target: Target) -> bool:
+    kind, value = target
+    if kind == "class":
+        return value in drug.dclass
+    if kind == "active":
+        return any(value in a for a in drug.actives)
+    if kind == "name":
+        return value in drug.name
+    raise ValueError(f"알 수 없는 규칙 대상: {kind}")
+
+
+class CompiledRules:
+    """규칙 테이블을 약별/ctx별 비트마스크로 컴파일한 결과."""
+
+    def __init__(self, rules: Tuple[Tuple[str, Tuple[Target, ...], str], ...], drugs: List["Drug"]) -> None:
+        self.rules = rules
+        self.messages: Tuple[str, ...] = tuple(msg for _, _, msg in rules)
+        # ctx 마스크(2^플래그 수) → 그 ctx에서 켜지는 규칙 마스크
+        flag_rules = [0] * len(CTX_FLAGS)
+        for i, (flag, _, _) in enumerate(rules):
+            flag_rules[CTX_FLAGS.index(flag)] |= 1 << i
+        self.ctx_rules: List[int] = [0] * (1 << len(CTX_FLAGS))
+        for m in range(1, len(self.ctx_rules)):
+            low = m & -m
+            self.ctx_rules[m] = self.ctx_rules[m ^ low] | flag_rules[low.bit_length() - 1]
+        self.rule_flags: Tuple[int, ...] = tuple(1 << CTX_FLAGS.index(flag) for flag, _, _ in rules)
+        self.drug_masks: Dict[str, int] = {d.name: self.mask_for(d) for d in drugs}
+        self._memo: Dict[Tuple[str, int], Tuple[str, ...]] = {}
+
+    def mask_for(self, drug: "Drug") -> int:
+        """약 하나에 해당하는 규칙 비트마스크."""
+        mask = 0
+        for i, (_, targets, _) in enumerate(self.rules):
+            if any(_matches(drug, t) for t in targets):
+                mask |= 1 << i
+        return mask
+
+    def flags_for(self, drug: "Drug") -> int:
+        """약에 해당하는 규칙이 보는 ctx 플래그 마스크 — 나머지 플래그는 이 약의 주의에 영향 없음."""
+        dmask = self.drug_masks.get(drug.name)
+        if dmask is None:
+            dmask = self.mask_for(drug)
+        flags = 0
+        for i, bit in enumerate(self.rule_flags):
+            if dmask >> i & 1:
+                flags |= bit
+        return flags
+
+    def warnings(self, drug: "Drug", cmask: int) -> Tuple[str, ...]:
+        """(약, ctx 마스크)별 주의 메시지 — 결과는 메모이즈."""
+        key = (drug.name, cmask)
+        hit = self._memo.get(key)
+        if hit is not None:
+            return hit
+        dmask = self.drug_masks.get(drug.name)
+        if dmask is None:
+            dmask = self.mask_for(drug)
+        active = dmask & self.ctx_rules[cmask]
+        out = tuple(msg for i, msg in enumerate(self.messages) if active >> i & 1)
+        if len(self._memo) >= MEMO_LIMIT:
+            self._memo.clear()
+        self._memo[key] = out
+        return out
+
+
+def compile_rules(drugs: List["Drug"], rules=CONTRAINDICATION_RULES) -> CompiledRules:
+    return CompiledRules(rules, drugs)
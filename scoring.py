@@ -0,0 +1,169 @@
+# scoring.py — 의심 질환 점수 (규칙 × 힌트 희소 행렬, 규칙이 많으면 NumPy 벡터화)
+# -----------------------------------------------------------------------------
+# 목적:
+#   - match_conditions의 점수 = 1 + (규칙 힌트 중 상세 입력에서 찾은 힌트 수).
+#     증상 → 규칙 → 힌트 문자열 split/strip → 집합 조회의 중첩 루프를 없앤다.
+#   - KB 로드 시 힌트 문자열마다 열 번호를 주고, 증상별 규칙 블록을 CSR(열 번호/개수/규칙별 길이)로 컴파일.
+#     요청 시: 키워드 스캔 결과 → 힌트 존재 벡터 x, 선택 증상 블록을 이어 붙인 행렬 A에 대해
+#     점수 = 1 + A·x 를 한 번에 (gather + 누적합), 정렬은 안정 정렬 또는 argpartition top-k.
+#   - 결과(순서/동점 처리 포함)는 기존 중첩 루프와 같다 — 점수 내림차순, 동점은 선택/규칙 순서.
+#   - numpy는 무거운 선택 의존성이라 첫 렌더에 올리지 않는다: 선택 증상의 규칙이 VECTOR_MIN_RULES개
+#     이상일 때만 import하고, 없으면 같은 CSR로 파이썬 루프 (번들 KB는 규칙 11개 → 항상 파이썬).
+#   - 카탈로그 KB는 규칙을 SQLite에서 증상별로 읽으므로 블록을 첫 조회 시 컴파일(MEMO_LIMIT 상한).
+# 환경변수:
+#   SCORING_VECTOR_MIN — NumPy 경로로 바꾸는 규칙 수 (기본 64)
+# -----------------------------------------------------------------------------
+
+from __future__ import annotations
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Set, Tuple
+
+VECTOR_MIN_RULES = int(os.environ.get("SCORING_VECTOR_MIN", 64))
+
+# 컴파일해 둘 증상 블록 수 상한 (카탈로그용, rules.MEMO_LIMIT와 같은 이유)
+MEMO_LIMIT = 1 << 16
+
+
+class _Block:
+    """증상 1개의 규칙들 — 행 = 규칙, CSR (열 번호, 개수)."""
+
+    __slots__ = ("symptom", "rules", "indices", "counts", "lengths", "_np")
+
+    def __init__(self, symptom: str, rules: Sequence[Mapping[str, str]], vocab: Dict[str, int]) -> None:
+        self.symptom = symptom
+        self.rules: Tuple[Tuple[str, str], ...] = tuple((r["name"], r["notes"]) for r in rules)
+        self.indices = array("i")  # 힌트 열 번호
+        self.counts = array("i")   # 같은 규칙에 같은 힌트가 여러 번 있으면 그 횟수
+        self.lengths = array("i")  # 규칙별 (열 번호, 개수) 쌍 수
+        for r in rules:
+            per: Dict[int, int] = {}
+            for h in r["hints"].split("/"):
+                col = vocab.setdefault(h.strip(), len(vocab))
+                per[col] = per.get(col, 0) + 1
+            self.indices.extend(per)
+            self.counts.extend(per.values())
+            self.lengths.append(len(per))
+        self._np: Tuple[Any, Any, Any] | None = None
+
+    def arrays(self, np: Any) -> Tuple[Any, Any, Any]:
+        if self._np is None:
+            self._np = (
+                np.frombuffer(self.indices, dtype=np.int32),
+                np.frombuffer(self.counts, dtype=np.int32),
+                np.frombuffer(self.lengths, dtype=np.int32),
+            )
+        return self._np
+
+
+def _numpy() -> Any:
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+    return np
+
+
+class ConditionScorer:
+    """증상별 규칙 블록 + 힌트 열 번호. compile_conditions()로 만든다."""
+
+    def __init__(self, condition_rules: Mapping[str, Sequence[Mapping[str, str]]], precompile: bool = True) -> None:
+        self.condition_rules = condition_rules
+        self.vocab: Dict[str, int] = {}  # 힌트 → 열 번호 (늘어나기만 함)
+        self._blocks: Dict[str, _Block] = {}
+        self._lock = threading.Lock()  # 블록 컴파일(열 번호 부여)만 직렬화
+        if precompile:
+            for s in condition_rules:
+                self.block(s)
+
+    # 락은 피클할 수 없다 — KB를 프로세스 간에 넘길 때(kbshare 등) 빼고 보내고 받는 쪽에서 새로 만든다
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def block(self, symptom: str) -> _Block:
+        b = self._blocks.get(symptom)
+        if b is None:
+            rules = self.condition_rules.get(symptom, [])
+            with self._lock:
+                if len(self._blocks) >= MEMO_LIMIT:
+                    self._blocks.clear()
+                b = self._blocks[symptom] = _Block(symptom, rules, self.vocab)
+        return b
+
+    def score(self, selected: Sequence[str], hits: Iterable[Tuple[str, str]], limit: int | None = None) -> List[Dict[str, Any]]:
+        """선택 증상의 규칙 점수 → 점수 내림차순 dict 목록 (limit이면 상위 limit개만)."""
+        blocks = [self.block(s) for s in selected]
+        n_rules = sum(len(b.rules) for b in blocks)
+        if not n_rules:
+            return []
+        hit_cols = {self.vocab[h] for kind, h in hits if kind == "hint" and h in self.vocab}
+        np = _numpy() if n_rules >= VECTOR_MIN_RULES else None
+        if np is None:
+            return self._score_py(blocks, hit_cols, n_rules, limit)
+        return self._score_np(np, blocks, hit_cols, n_rules, limit)
+
+    @staticmethod
+    def _results(blocks: List[_Block], order: Iterable[int], scores: Sequence[int]) -> List[Dict[str, Any]]:
+        """위치(선택 블록을 이어 붙인 규칙 번호) 순서대로 결과 dict."""
+        starts = [0]
+        for b in blocks:
+            starts.append(starts[-1] + len(b.rules))
+        out: List[Dict[str, Any]] = []
+        for i in order:
+            b_i = bisect_right(starts, i) - 1
+            b = blocks[b_i]
+            name, notes = b.rules[i - starts[b_i]]
+            out.append({"name": name, "symptom": b.symptom, "score": scores[i], "notes": notes})
+        return out
+
+    def _score_py(self, blocks: List[_Block], hit_cols: Set[int], n_rules: int, limit: int | None) -> List[Dict[str, Any]]:
+        scores = [1] * n_rules
+        if hit_cols:
+            row = 0
+            for b in blocks:
+                pos = 0
+                for length in b.lengths:
+                    for k in range(pos, pos + length):
+                        if b.indices[k] in hit_cols:
+                            scores[row] += b.counts[k]
+                    pos += length
+                    row += 1
+        order = sorted(range(n_rules), key=scores.__getitem__, reverse=True)  # 안정 정렬 — 동점은 위치 순
+        return self._results(blocks, order if limit is None else order[:limit], scores)
+
+    def _score_np(self, np: Any, blocks: List[_Block], hit_cols: Set[int], n_rules: int, limit: int | None) -> List[Dict[str, Any]]:
+        parts = [b.arrays(np) for b in blocks]
+        indices = np.concatenate([p[0] for p in parts])
+        counts = np.concatenate([p[1] for p in parts])
+        lengths = np.concatenate([p[2] for p in parts])
+        # 힌트 존재 벡터 x → A·x: 비영 원소마다 x[열] × 개수, 규칙(행)별 합은 누적합 차이로
+        x = np.zeros(len(self.vocab), dtype=np.int32)
+        if hit_cols:
+            x[np.fromiter(hit_cols, dtype=np.int64, count=len(hit_cols))] = 1
+        csum = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts * x[indices], out=csum[1:])
+        ends = np.cumsum(lengths)
+        scores = 1 + csum[ends] - csum[ends - lengths]
+
+        # 안정 정렬과 같은 순서: 키 = (최고점 - 점수) × 규칙 수 + 위치 (모두 다른 정수)
+        key = (scores.max() - scores) * n_rules + np.arange(n_rules)
+        if limit is not None and limit < n_rules:
+            if limit <= 0:
+                return []
+            top = np.argpartition(key, limit - 1)[:limit]
+            order = top[np.argsort(key[top])]
+        else:
+            order = np.argsort(key)
+        return self._results(blocks, order.tolist(), scores.tolist())
+
+
+def compile_conditions(condition_rules: Mapping[str, Sequence[Mapping[str, str]]]) -> ConditionScorer:
+    return ConditionScorer(condition_rules)
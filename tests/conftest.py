@@ -0,0 +1,5 @@
+# 저장소 루트의 평면 모듈(engine, matcher, ...)을 테스트에서 import할 수 있게 한다.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
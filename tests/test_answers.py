@@ -0,0 +1,63 @@
+# 답 테이블 ↔ 직접 계산 동일성 (모든 증상 조합), UI 순서(가나다순) 선택도 테이블에서 조회
+from dataclasses import replace
+from itertools import combinations
+
+import pytest
+
+from answers import AnswerTable, ANSWERS_SCHEMA, compile_answers
+from engine import build_report, default_kb
+
+CTXS = ({}, {"ulcer": True, "kidney": True}, {"pregnant": True, "maoi": True, "anticoagulant": True})
+
+
+@pytest.fixture(scope="module")
+def kbs():
+    kb = default_kb()
+    table = compile_answers(kb, max_symptoms=len(kb.symptom_to_drugs))
+    return replace(kb, answers=table), replace(kb, answers=AnswerTable())
+
+
+def _report(kb, selected, detail, ctx):
+    report = build_report(kb, list(selected), detail, ["천식"], ctx)
+    report.pop("timestamp")
+    return report
+
+
+def test_table_matches_direct_for_every_subset(kbs):
+    table_kb, direct_kb = kbs
+    symptoms = list(table_kb.symptom_to_drugs)
+    for r in range(1, len(symptoms) + 1):
+        for combo in combinations(symptoms, r):
+            for i, ctx in enumerate(CTXS):
+                selected = combo if i % 2 else sorted(combo)  # 칩 순서 / UI 순서
+                assert _report(table_kb, selected, "", ctx) == _report(direct_kb, selected, "", ctx), (selected, ctx)
+
+
+def test_table_matches_direct_in_any_order(kbs):
+    table_kb, direct_kb = kbs
+    symptoms = list(table_kb.symptom_to_drugs)
+    for combo in combinations(symptoms, 3):
+        for selected in (combo[::-1], combo[1:] + combo[:1]):
+            for detail in ("", "한쪽 고열"):
+                assert _report(table_kb, selected, detail, CTXS[1]) == _report(direct_kb, selected, detail, CTXS[1])
+
+
+def test_ui_ordered_selections_hit_the_sidecar(monkeypatch):
+    kb = default_kb()
+    assert kb.answers.version == kb.version  # 번들 사이드카가 현재 KB와 맞아야 함
+    monkeypatch.setattr(AnswerTable, "_compute_selection", lambda *a: pytest.fail("테이블 미적중"))
+    monkeypatch.setattr(AnswerTable, "_compute_personal", lambda *a: pytest.fail("테이블 미적중"))
+    symptoms = list(kb.symptom_to_drugs)
+    for r in (1, 2, 3):
+        for combo in combinations(symptoms, r):
+            selected = sorted(combo)
+            assert kb.answers.mask_of(selected) is not None
+            build_report(kb, selected, "", [], {"ulcer": True})
+
+
+def test_sidecar_round_trip(kbs):
+    table = kbs[0].answers
+    data = table.to_dict()
+    assert data["schema"] == ANSWERS_SCHEMA
+    again = AnswerTable.from_dict(data)
+    assert again.selections == table.selections and again.personal == table.personal
@@ -0,0 +1,104 @@
+# HTTP API — 임의 포트에 uvicorn을 띄워 단건/여러 건(순서 유지)/잘못된 본문/과부하 503 확인
+import contextlib
+import json
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+pytest.importorskip("starlette")
+uvicorn = pytest.importorskip("uvicorn")
+
+from api import create_app
+from batch import normalize_case
+from engine import DEFAULT_KB_PATH, build_report, default_kb
+
+KB = default_kb()
+
+
+@contextlib.contextmanager
+def _serve(**options):
+    app = create_app(DEFAULT_KB_PATH, **options)
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        assert thread.is_alive() and time.monotonic() < deadline, "uvicorn이 뜨지 않음"
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        thread.join(10)
+        sock.close()
+
+
+@pytest.fixture(scope="module")
+def base_url():
+    with _serve() as url:
+        yield url
+
+
+def _post(url, body):
+    data = body if isinstance(body, bytes) else json.dumps(body, ensure_ascii=False).encode("utf-8")
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=30) as res:
+            return res.status, res.headers, json.loads(res.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, json.loads(e.read())
+
+
+def _expected(raw):
+    case = normalize_case(raw, raw.get("id"))
+    report = build_report(KB, case["symptoms"], case["detail"], case["tags"], case["ctx"])
+    report = json.loads(json.dumps(report, ensure_ascii=False))  # 튜플 → 리스트 (응답과 같은 모양)
+    report.pop("timestamp")
+    return report
+
+
+def _drop_time(report):
+    return {k: v for k, v in report.items() if k not in ("timestamp", "case_id")}
+
+
+def test_single_report(base_url):
+    raw = {"symptoms": ["두통", "발열"], "detail": "고열이 나요", "ctx": {"ulcer": True}}
+    status, _, body = _post(base_url + "/v1/report", raw)
+    assert status == 200
+    assert _drop_time(body) == _expected(raw)
+    assert body["kb_version"] == KB.version
+
+
+def test_batch_preserves_order(base_url):
+    cases = [{"id": f"c{i}", "symptoms": [s]} for i, s in enumerate(["설사", "두통", "기침", "콧물", "속쓰림"] * 10)]
+    status, _, body = _post(base_url + "/v1/reports", {"cases": cases})
+    assert status == 200
+    assert [r["case_id"] for r in body["reports"]] == [c["id"] for c in cases]
+    assert [_drop_time(r) for r in body["reports"]] == [_expected(c) for c in cases]
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/v1/report", b"{not json"),
+    ("/v1/report", b'["\xeb\x91\x90\xed\x86\xb5"]'),
+    ("/v1/report", b'"hello"'),
+    ("/v1/reports", b'{"cases": {"symptoms": []}}'),
+    ("/v1/reports", b'{"cases": [1, 2]}'),
+    ("/v1/reports", b'[{"symptoms": ["a"]}]'),
+])
+def test_bad_body_is_400(base_url, path, body):
+    status, _, out = _post(base_url + path, body)
+    assert status == 400 and out["error"]
+
+
+def test_overload_is_503_with_retry_after():
+    with _serve(max_pending=2) as url:
+        status, headers, out = _post(url + "/v1/reports", {"cases": [{"symptoms": ["두통"]}] * 3})
+        assert status == 503 and headers["Retry-After"] == "1" and out["error"]
+        status, _, _ = _post(url + "/v1/reports", {"cases": [{"symptoms": ["두통"]}] * 2})  # 상한 이내는 통과
+        assert status == 200
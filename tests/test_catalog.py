@@ -0,0 +1,75 @@
+# 카탈로그 KB 전문 검색 — 한글 부분 문자열 + 연결 정리
+import json
+import os
+import random
+
+from catalog import build_catalog, open_catalog
+
+KB_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "kb.json")
+
+EXTRA = {"name": "두통약X", "dclass": "해열진통제", "actives": ["Acetaminophen"],
+         "indications": ["편두통", "치통"], "avoid_if": [], "cautions": []}
+
+
+def _catalog(tmp_path):
+    db = tmp_path / "catalog.sqlite"
+    build_catalog(KB_JSON, db, [EXTRA])
+    return open_catalog(db)
+
+
+def test_partial_korean_words_match(tmp_path):
+    kb = _catalog(tmp_path)
+    assert "두통약X" in [d.name for d in kb.search("두통", column="indications")]  # "편두통" 안
+    assert [d.name for d in kb.search("두통약", column="name")] == ["두통약X"]
+    assert [d.name for d in kb.search("편두통", column="indications")] == ["두통약X"]
+    assert "두통약X" in [d.name for d in kb.by_symptom["두통"]]
+
+
+def test_short_query_uses_bigram_index(tmp_path):
+    kb = _catalog(tmp_path)
+    assert {d.name for d in kb.search("통")} >= {"두통약X", "타이레놀(아세트아미노펜)"}
+    assert kb.search("5%") == []
+
+
+def test_close_releases_connections(tmp_path):
+    kb = _catalog(tmp_path)
+    kb.search("두통")
+    assert kb._conns
+    kb.close()
+    assert kb._conns == []
+    assert kb.search("두통")  # 닫은 뒤 조회는 새 연결
+
+
+SYMPTOMS = ["두통", "편두통", "발열", "기침", "가래", "콧물", "인후통", "설사", "복통", "소화불량", "생리통", "치통"]
+CLASSES = ["해열진통제", "NSAID", "진해거담제", "항히스타민제", "지사제", "소화제"]
+ACTIVES = ["Acetaminophen", "Ibuprofen", "Naproxen", "Dextromethorphan", "Guaifenesin", "Loperamide"]
+
+
+def _products(n, seed=0):
+    rng = random.Random(seed)
+    for i in range(n):
+        yield {"name": f"제품{i}({rng.choice(SYMPTOMS)}약)", "dclass": rng.choice(CLASSES),
+               "actives": rng.sample(ACTIVES, rng.randint(1, 3)),
+               "indications": rng.sample(SYMPTOMS, rng.randint(1, 5)), "avoid_if": [], "cautions": []}
+
+
+def test_two_char_symptom_on_large_catalog_reads_index(tmp_path):
+    db = tmp_path / "big.sqlite"
+    products = list(_products(5000))
+    build_catalog(KB_JSON, db, products)
+    kb = open_catalog(db)
+
+    # 2글자 증상: 기본 키 범위를 순서대로 읽고 끝 — 테이블 스캔/임시 정렬 없음
+    plan = " | ".join(r[-1] for r in kb._query(
+        "EXPLAIN QUERY PLAN SELECT g.n, g.len, g.drug_id, d.name FROM drug_grams g JOIN drugs d ON d.id = g.drug_id "
+        "WHERE g.gram = ? AND g.col = ? ORDER BY g.n DESC, g.len, g.drug_id LIMIT ?", ("두통", 3, 20)))
+    assert "SEARCH g USING PRIMARY KEY" in plan
+    assert "SCAN" not in plan and "TEMP B-TREE" not in plan
+
+    # 순위는 전수 계산과 같다: 등장 횟수 많은 순 → 적응증 문자열 짧은 순 → 등록 순
+    with open(KB_JSON, encoding="utf-8") as f:
+        everything = json.load(f)["drugs"] + products
+    texts = [(d["name"], " / ".join(d["indications"])) for d in everything]
+    for q in ("두통", "기침", "설사"):
+        ranked = sorted((-t.count(q), len(t), i, name) for i, (name, t) in enumerate(texts) if q in t)
+        assert [d.name for d in kb.search(q, column="indications")] == [name for *_, name in ranked[:20]]
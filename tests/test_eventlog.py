@@ -0,0 +1,30 @@
+# 이벤트 로그 writer — 기록 실패 후에도 계속 동작
+import json
+import time
+
+from eventlog import CURRENT, EventLog
+
+
+def test_writer_survives_bad_events_and_write_errors(tmp_path):
+    log = EventLog(tmp_path, flush_interval=0.01)
+    log.log("ok", {"n": 1})
+    log.log("bad", {"n": object()})  # 직렬화 불가 — 이 이벤트만 버림
+    log.close()
+
+    log = EventLog(tmp_path, flush_interval=0.01)
+    write = log._write
+
+    def fail_once(fh, batch):
+        log._write = write
+        raise RuntimeError("boom")
+
+    log._write = fail_once
+    log.log("lost", {})
+    while log._write is not write:
+        time.sleep(0.001)
+    log.log("after", {})
+    log.close()
+
+    kinds = [json.loads(line)["kind"] for line in (tmp_path / CURRENT).read_text(encoding="utf-8").splitlines()]
+    assert kinds == ["ok", "after"]
+    assert log.dropped == 1 and isinstance(log.last_error, RuntimeError)
@@ -0,0 +1,71 @@
+# 내보내기 — 클릭 시에만 생성(+해시 캐시), 단건/대량 포맷 왕복
+import csv
+import io
+import json
+
+import pytest
+
+import export
+from engine import build_report, default_kb
+from export import BULK_CSV_FIELDS, ExportCache, write_csv, write_ndjson, write_parquet
+
+KB = default_kb()
+CASES = [(["두통", "발열"], "열이 나요", ["천식"], {"pregnant": True}), (["기침", "콧물"], "", [], {}), (["설사"], "", [], {})]
+
+
+def _reports():
+    return [{"case_id": f"c{i}", **build_report(KB, *case)} for i, case in enumerate(CASES)]
+
+
+def test_lazy_export_runs_only_when_called_and_caches(monkeypatch):
+    calls = []
+    real = dict(export.SINGLE)
+    monkeypatch.setitem(export.SINGLE, "json", lambda r: calls.append("json") or real["json"](r))
+    monkeypatch.setitem(export.SINGLE, "csv", lambda r: calls.append("csv") or real["csv"](r))
+    report = _reports()[0]
+    cache = ExportCache()
+    data_json, data_csv = cache.lazy(report, "json"), cache.lazy(report, "csv")
+    assert calls == []  # 재실행마다 만들지 않는다
+
+    assert json.loads(data_json()) == report
+    assert data_json() == data_json() and calls == ["json"]  # 같은 리포트는 캐시
+    rows = list(csv.DictReader(io.StringIO(data_csv())))
+    assert rows == [{k: str(v) for k, v in row.items()} for row in report["recommendations"]]
+    # timestamp만 다른 리포트(재실행)도 같은 항목
+    assert cache.lazy({**report, "timestamp": "later"}, "csv")() == data_csv() and calls == ["json", "csv"]
+
+
+def test_single_csv_matches_pandas_to_csv():
+    pd = pytest.importorskip("pandas")
+    report = _reports()[0]
+    expected = pd.DataFrame(report["recommendations"]).to_csv(index=False, lineterminator="\n")
+    assert export.recommendations_csv(report) == expected
+
+
+def test_bulk_ndjson_round_trip():
+    reports = _reports()
+    buf = io.StringIO()
+    assert write_ndjson(iter(reports), buf) == len(reports)  # 제너레이터도 한 번에 흘려 씀
+    assert [json.loads(line) for line in buf.getvalue().splitlines()] == reports
+
+
+def _flat_rows(reports):
+    return [{f: str({**r, **row}.get(f, "")) for f in BULK_CSV_FIELDS}
+            for r in reports for row in r["recommendations"]]
+
+
+def test_bulk_csv_round_trip():
+    reports = _reports()
+    buf = io.StringIO()
+    assert write_csv(iter(reports), buf) == len(reports)
+    assert list(csv.DictReader(io.StringIO(buf.getvalue()))) == _flat_rows(reports)
+
+
+def test_bulk_parquet_round_trip(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    reports = _reports()
+    path = tmp_path / "out.parquet"
+    assert write_parquet(iter(reports), str(path), batch_size=4) == len(reports)
+    f = pq.ParquetFile(path)
+    assert f.num_row_groups > 1
+    assert f.read().to_pylist() == _flat_rows(reports)
@@ -0,0 +1,62 @@
+# 오타/띄어쓰기 허용 매칭 — 낱말 경계, 짧은 키워드/빨간 깃발 정확 일치
+import random
+
+from engine import build_report, default_kb, keyword_hits
+from fuzzy import FuzzyIndex, _substring_distance, decompose, decompose_words, max_distance
+
+
+def test_typo_within_word_matches():
+    idx = FuzzyIndex.from_patterns(["편두통", "목 통증"])
+    assert idx.search("편두퉁이 심해요") == [("편두통", 1)]
+    assert idx.scan("목통증") == {"목 통증"}
+    assert idx.scan("목 통증이 있어요") == {"목 통증"}
+
+
+def test_fuzzy_window_does_not_cross_word_boundary():
+    idx = FuzzyIndex.from_patterns(["혈담", "가래 색"])
+    assert idx.scan("미열, 담배는 끊었어요") == set()
+    assert idx.scan("가래색이 노래요") == {"가래 색"}  # 공백 든 키워드는 경계 무관
+
+
+def test_two_syllable_and_exact_keywords_need_exact_match():
+    idx = FuzzyIndex()
+    idx.add("복통")
+    idx.add("호흡곤란", "rf", exact=True)
+    idx.add("호흡곤란", "hint")
+    idx.build()
+    assert idx.scan("보통 괜찮아요") == set()
+    assert idx.scan("복통") == {"복통"}
+    assert idx.scan("호흡곤난") == {"hint"}
+    assert idx.scan("호흡곤란") == {"rf", "hint"}
+
+
+def test_no_false_red_flag_for_split_words():
+    kb = default_kb()
+    detail = "기침하고 미열, 담배는 끊었어요"
+    assert not any(kind == "red_flag" for kind, _ in keyword_hits(kb, detail))
+    assert build_report(kb, ["기침"], detail, [], {})["alerts"] == []
+
+
+def test_no_false_hint_score_for_similar_word():
+    kb = default_kb()
+    assert ("hint", "복통") not in keyword_hits(kb, "보통 배가 아파요")
+    conditions = build_report(kb, ["설사"], "보통", [], {})["conditions"]
+    assert all(c["score"] == 1 for c in conditions)
+
+
+def test_matches_brute_force_per_word():
+    rng = random.Random(0)
+    syllables = "두통열기침가래콧물재채속쓰림소화곤란호흡"
+    terms = list({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 6))) for _ in range(100)})
+    idx = FuzzyIndex.from_patterns(terms)
+    for _ in range(100):
+        query = "".join(rng.choice(syllables + " ") for _ in range(rng.randint(3, 15)))
+        words = decompose_words(query)
+        expected = {}
+        for t in terms:
+            jamo = decompose(t)
+            k = max_distance(len(jamo), len(t))
+            dist = min([_substring_distance(jamo, w, k) for w in words] or [k + 1])
+            if dist <= k:
+                expected[t] = dist
+        assert dict(idx.search(query)) == expected
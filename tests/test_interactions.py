@@ -0,0 +1,54 @@
+# 성분 중복/병용 주의 — 복용 중인 약이 낀 쌍만 경고, 추천 약끼리는 "하나만" 안내, 영문 성분명 해석
+from engine import Drug, build_report, check_interactions, combine_notes, current_med_keys, default_kb, recommend_drugs
+
+KB = default_kb()
+
+
+def _drugs(names):
+    return [KB.by_name[n] for n in names]
+
+
+def test_alternatives_are_not_flagged_against_each_other():
+    for selected in (["두통"], ["기침", "콧물"], ["설사"]):
+        drugs = list({d.name: d for d in recommend_drugs(KB, selected)}.values())
+        assert check_interactions(KB, drugs) == []
+
+
+def test_recommended_drugs_of_one_class_get_combine_note():
+    drugs = list({d.name: d for d in recommend_drugs(KB, ["두통"])}.values())
+    assert combine_notes(KB, drugs) == [
+        "같은 계열 겹침(NSAID): 이부프로펜(브루펜 등), 나프록센(낙센 등) — 하나만 고르세요 (함께 복용하지 마세요)"
+    ]
+    assert combine_notes(KB, list(recommend_drugs(KB, ["설사"]))) == []
+
+
+def test_recommended_drugs_sharing_an_active_get_combine_note():
+    cold = Drug(name="종합감기약A", dclass="종합감기약", actives=["Acetaminophen", "Dextromethorphan"],
+                indications=["발열", "기침"])
+    drugs = _drugs(["타이레놀(아세트아미노펜)"]) + [cold]
+    assert combine_notes(KB, drugs) == [
+        "성분 겹침(Acetaminophen): 타이레놀(아세트아미노펜), 종합감기약A — 하나만 고르세요 (함께 복용하지 마세요)"
+    ]
+    assert check_interactions(KB, drugs) == []  # 경고(복용 중인 약과의 중복)는 아님
+
+
+def test_report_keeps_notes_apart_from_warnings():
+    report = build_report(KB, ["두통"], "", [], {"meds": ["와파린"]})
+    assert report["combine_notes"] and all("하나만 고르세요" in m for m in report["combine_notes"])
+    assert report["interactions"] and not any("하나만 고르세요" in m for m in report["interactions"])
+
+
+def test_pairs_with_current_medication_are_flagged():
+    drugs = _drugs(["이부프로펜(브루펜 등)", "나프록센(낙센 등)"])
+    out = check_interactions(KB, drugs, ["와파린"])
+    assert out == ["NSAID + 항응고제: 위장출혈 위험 증가 "
+                   "(이부프로펜(브루펜 등) + 와파린(복용 중), 나프록센(낙센 등) + 와파린(복용 중))"]
+
+
+def test_english_ingredient_and_brand_names_resolve():
+    assert current_med_keys(KB, "ibuprofen") == {("active", "ibuprofen"), ("class", "NSAID")}
+    assert current_med_keys(KB, "IBUPROFEN") == current_med_keys(KB, "ibuprofen")
+    assert ("active", "acetaminophen") in current_med_keys(KB, "Tylenol")
+    out = check_interactions(KB, _drugs(["타이레놀(아세트아미노펜)"]), ["Tylenol"])
+    assert out and out[0].startswith("성분 중복(Acetaminophen)")
+    assert current_med_keys(KB, "unknown-med") == frozenset()
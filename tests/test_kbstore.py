@@ -0,0 +1,78 @@
+# KB 핫 리로드 — 내용 변경 시 교체, touch만이면 유지, 깨진 파일이면 이전 KB 유지
+import gc
+import json
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from engine import DEFAULT_KB_PATH
+from kbstore import KBStore
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def _store(tmp_path):
+    path = tmp_path / "kb.json"
+    shutil.copy(DEFAULT_KB_PATH, path)
+    reloaded = []
+    return path, KBStore(path, check_interval=0, on_reload=reloaded.append), reloaded
+
+
+def test_content_change_triggers_reload(tmp_path):
+    path, store, reloaded = _store(tmp_path)
+    old = store.current()
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["version"] = "test-2"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    _bump_mtime(path)
+    assert store.check(wait=True)
+    assert store.reloads == 1 and reloaded == [store.current()]
+    assert store.version.startswith("test-2+") and store.version != old.version
+
+
+def test_touch_only_keeps_current_kb(tmp_path):
+    path, store, reloaded = _store(tmp_path)
+    old = store.current()
+    _bump_mtime(path)
+    assert store.check(wait=True)  # 변경이 보여 다시 읽지만
+    assert store.current() is old and store.reloads == 0 and reloaded == []  # 내용 해시가 같으면 교체 안 함
+    assert not store.check(wait=True)  # 같은 stamp는 다시 읽지 않음
+
+
+def test_corrupt_file_keeps_old_kb(tmp_path):
+    path, store, _ = _store(tmp_path)
+    old = store.current()
+    path.write_text("{not json", encoding="utf-8")
+    _bump_mtime(path)
+    store.check(wait=True)
+    assert store.current() is old
+    assert isinstance(store.last_error, ValueError)
+
+
+def test_replaced_catalog_stays_usable_until_released(tmp_path):
+    from catalog import build_catalog
+
+    path = tmp_path / "kb.sqlite"
+    build_catalog(DEFAULT_KB_PATH, path)
+    store = KBStore(path, check_interval=0)
+    old = store.current()  # 다른 스레드에서 조회 중인 세션이 들고 있는 KB
+    assert old.search("두통")
+    conns = list(old._conns)
+
+    extra = {"name": "두통약X", "dclass": "해열진통제", "actives": ["Acetaminophen"],
+             "indications": ["편두통"], "avoid_if": [], "cautions": []}
+    build_catalog(DEFAULT_KB_PATH, tmp_path / "next.sqlite", [extra])
+    os.replace(tmp_path / "next.sqlite", path)
+    _bump_mtime(path)
+    assert store.check(wait=True) and store.current() is not old
+
+    assert old.search("두통")  # 교체돼도 진행 중인 조회는 그대로
+    del old
+    gc.collect()
+    with pytest.raises(sqlite3.ProgrammingError):  # 마지막 참조가 사라지면 연결을 닫음
+        conns[0].execute("SELECT 1")
@@ -0,0 +1,46 @@
+# KeywordMatcher(Aho–Corasick) ↔ 부분문자열 검색 동일성
+import random
+
+from engine import compile_matcher, default_kb
+from matcher import KeywordMatcher
+
+
+def _naive(patterns, text):
+    return {p for p in patterns if p in text}
+
+
+def test_matches_substring_scan_on_random_text():
+    rng = random.Random(0)
+    alphabet = "가나다라ab"
+    patterns = {"".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)}
+    m = KeywordMatcher.from_patterns(patterns)
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        assert m.scan(text) == _naive(patterns, text)
+
+
+def test_iter_matches_reports_every_occurrence():
+    m = KeywordMatcher.from_patterns(["통", "두통", "편두통"])
+    ends = sorted(m.iter_matches("편두통 두통"))
+    assert ends == [(2, "두통"), (2, "통"), (2, "편두통"), (5, "두통"), (5, "통")]
+
+
+def test_kb_keywords_match_substring_scan():
+    kb = default_kb()
+    keywords = {("symptom", s) for s in kb.symptom_to_drugs}
+    keywords |= {("hint", h.strip()) for rules in kb.condition_rules.values() for r in rules
+                 for h in r["hints"].split("/") if h.strip() and " " not in h.strip()}
+    keywords |= {("red_flag", tok) for _, rf, _ in kb.red_flags for tok in rf.split("/")}
+    m = compile_matcher(kb.symptom_to_drugs, kb.condition_rules, kb.red_flags)
+    for text in ["두통이 심하고 고열", "마른기침 3주 이상 지속", "속쓰림과 흑변", "한쪽 머리가 아파요", "아무 증상 없음"]:
+        assert m.scan(text) == {(kind, kw) for kind, kw in keywords if kw in text}
+
+
+def test_rebuild_does_not_duplicate_outputs():
+    m = KeywordMatcher.from_patterns(["통", "두통"])
+    once = list(m.iter_matches("두통"))
+    m.build()
+    m.add("편두통")
+    m.build()
+    assert list(m.iter_matches("두통")) == once
+    assert sorted(m.iter_matches("편두통")) == [(2, "두통"), (2, "통"), (2, "편두통")]
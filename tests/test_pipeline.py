@@ -0,0 +1,74 @@
+# 증분 리포트 — 입력이 바뀐 단계만 다시 계산, 결과는 항상 build_report와 같음
+import random
+from dataclasses import replace
+
+from engine import REPORT_STAGES, build_report, default_kb
+from pipeline import FINGERPRINTS, IncrementalReport
+from rules import CTX_FLAGS
+
+KB = default_kb()
+ALL = [key for key, _, _ in REPORT_STAGES]
+
+
+def _drop_time(report):
+    return {k: v for k, v in report.items() if k != "timestamp"}
+
+
+def test_changing_one_input_recomputes_only_dependent_stages():
+    inc = IncrementalReport()
+    args = (["두통", "발열"], "", [], {"ulcer": False})
+    first = inc.build(KB, *args)
+    assert inc.recomputed == ALL
+
+    again = inc.build(KB, *args)
+    assert inc.recomputed == []
+    assert all(again[k] is first[k] for k in ALL)  # 같은 객체 → 카드 HTML도 재사용
+
+    inc.build(KB, ["두통", "발열"], "고열 오한", [], {"ulcer": False})
+    assert inc.recomputed == ["alerts", "conditions"]
+
+    inc.build(KB, ["두통", "발열"], "고열 오한", [], {"ulcer": False, "meds": ["와파린"]})
+    assert inc.recomputed == ["interactions"]
+
+    inc.build(KB, ["두통", "발열"], "고열 오한", [], {"ulcer": False, "meds": ["와파린"], "age": 70})
+    assert inc.recomputed == []  # 결과와 무관한 값
+
+    inc.build(KB, ["두통", "발열"], "고열 오한", [], {"ulcer": True, "meds": ["와파린"], "age": 70})
+    assert inc.recomputed[:2] == ["recommendations", "personal_warnings"]
+
+    inc.build(replace(KB, version="other"), ["두통", "발열"], "고열 오한", [], {"ulcer": True, "meds": ["와파린"]})
+    assert inc.recomputed == ALL  # KB가 바뀌면 전부
+
+
+def test_random_edits_match_build_report_and_dependencies():
+    rng = random.Random(0)
+    symptoms = list(KB.symptom_to_drugs)
+    details = ["", "고열", "한쪽 두통 구역", "혈변 흉통", "야간 악화 오한"]
+    inc = IncrementalReport()
+    selected, detail, tags, ctx = ["두통"], "", [], {}
+    prev = None
+    for _ in range(150):
+        what = rng.choice(["selected", "detail", "tags", "ctx", "meds", "none"])
+        if what == "selected":
+            selected = rng.sample(symptoms, rng.randint(1, 3))
+        elif what == "detail":
+            detail = rng.choice(details)
+        elif what == "tags":
+            tags = rng.sample(["천식", "카페인 민감", "소아"], rng.randint(0, 2))
+        elif what == "ctx":
+            ctx = {**ctx, rng.choice(CTX_FLAGS): rng.random() < 0.5}
+        elif what == "meds":
+            ctx = {**ctx, "meds": rng.sample(["와파린", "아스피린", "ibuprofen", "종합감기약"], rng.randint(0, 2))}
+        report = inc.build(KB, selected, detail, tags, ctx)
+        assert _drop_time(report) == _drop_time(build_report(KB, selected, detail, tags, ctx))
+
+        state = ({"selected": selected, "detail": detail, "tags": tags, "ctx": ctx, "meds": ctx.get("meds", ())}, report)
+        if prev is not None:  # 다시 계산한 단계 = 입력 지문이나 앞 단계 결과가 바뀐 단계
+            assert inc.recomputed == [key for key, deps, _ in REPORT_STAGES
+                                      if any(_dep(prev, n) != _dep(state, n) for n in deps)]
+        prev = state
+
+
+def _dep(state, name):
+    inputs, report = state
+    return FINGERPRINTS[name](inputs[name]) if name in FINGERPRINTS else report[name]
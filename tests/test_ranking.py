@@ -0,0 +1,42 @@
+# 추천 순위 — 힙 top-k ↔ 전체 정렬(동점은 후보 순서), 감점 방향
+import random
+
+from engine import default_kb, rank_drugs
+from ranking import RankWeights, avoid_hits, avoid_terms, rank
+
+
+class _Drug:
+    def __init__(self, name, avoid_if=()):
+        self.name = name
+        self.avoid_if = avoid_if
+
+
+def _full_sort(candidates, contraindications, terms, k, weights):
+    def score(c):
+        drug, covered = c
+        return (weights.coverage * len(covered) - weights.contraindication * contraindications(drug)
+                - weights.avoid_if * avoid_hits(drug, terms))
+
+    return sorted(candidates, key=score, reverse=True)[:k]  # 안정 정렬 — 동점은 후보 순서
+
+
+def test_heap_top_k_matches_full_sort_with_ties():
+    rng = random.Random(0)
+    for _ in range(200):
+        drugs = [_Drug(f"d{i}", tuple(rng.sample(["임신", "간질환", "천식", "궤양"], rng.randint(0, 2))))
+                 for i in range(rng.randint(0, 40))]
+        candidates = [(d, tuple(f"s{j}" for j in range(rng.randint(1, 3)))) for d in drugs]
+        contra = {d.name: rng.randint(0, 2) for d in drugs}
+        terms = avoid_terms({"pregnant": rng.random() < 0.5}, ["천식"] if rng.random() < 0.5 else [])
+        weights = RankWeights(1.0, rng.choice([0.0, 0.5, 1.0]), rng.choice([0.0, 0.5]))
+        for k in (0, 1, 5, 100):
+            expected = _full_sort(candidates, lambda d: contra[d.name], terms, k, weights)
+            assert rank(candidates, lambda d: contra[d.name], terms, k, weights) == expected
+
+
+def test_penalties_demote_and_k_bounds():
+    kb = default_kb()
+    base = [d.name for d, _ in rank_drugs(kb, ["두통"], {})]
+    asthma = [d.name for d, _ in rank_drugs(kb, ["두통"], {}, ["천식"])]
+    assert base.index("이부프로펜(브루펜 등)") < asthma.index("이부프로펜(브루펜 등)")
+    assert len(rank_drugs(kb, list(kb.symptom_to_drugs), {}, k=3)) == 3
@@ -0,0 +1,80 @@
+# 리포트 캐시 — 정규화된 입력 키, TTL 만료, LRU 축출
+import reportcache
+from engine import build_report, default_kb
+from reportcache import ReportCache
+
+KB = default_kb()
+
+
+def _counting_build():
+    calls = []
+
+    def build(kb, selected, detail, tags, ctx):
+        calls.append((selected, detail, tags, ctx))
+        return build_report(kb, selected, detail, tags, ctx)
+
+    return build, calls
+
+
+def _drop_time(report):
+    return {k: v for k, v in report.items() if k != "timestamp"}
+
+
+def test_order_and_whitespace_only_differences_hit():
+    cache = ReportCache()
+    build, calls = _counting_build()
+    ctx = {"pregnant": True, "meds": ["와파린", "아스피린"]}
+    first = cache.get_or_build(KB, ["두통", "발열"], "열이  나고\n목이 아파요", ["천식", "카페인 민감"], ctx, build)
+    ctx2 = {"pregnant": True, "meds": [" 아스피린", "와파린 ", "와파린"]}
+    second = cache.get_or_build(KB, ["두통", "발열"], " 열이 나고 목이 아파요 ", ["카페인 민감 ", "천식", ""], ctx2, build)
+    assert len(calls) == 1 and cache.stats()["hits"] == 1
+    assert second["detail"] == " 열이 나고 목이 아파요 " and second["tags"] == ["카페인 민감 ", "천식", ""]
+    assert _drop_time(second) == {**_drop_time(first), "detail": second["detail"], "tags": second["tags"]}
+    # 결과는 정규화된 입력으로 만든 것과 같다
+    assert _drop_time(first) == _drop_time({
+        **build_report(KB, ["두통", "발열"], "열이 나고 목이 아파요", ["천식", "카페인 민감"],
+                       {"pregnant": True, "meds": ["아스피린", "와파린"]}),
+        "detail": first["detail"], "tags": first["tags"],
+    })
+
+
+def test_symptom_order_and_flags_are_different_keys():
+    cache = ReportCache()
+    build, calls = _counting_build()
+    cache.get_or_build(KB, ["두통", "발열"], "", [], {}, build)
+    cache.get_or_build(KB, ["발열", "두통"], "", [], {}, build)  # 증상 순서 = 결과 순서
+    cache.get_or_build(KB, ["두통", "발열"], "", [], {"pregnant": True}, build)
+    cache.get_or_build(KB, ["두통", "발열"], "", [], {"age": 30}, build)  # 결과와 무관한 값은 키 밖
+    assert len(calls) == 3 and cache.stats()["hits"] == 1
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(reportcache.time, "monotonic", lambda: now[0])
+    cache = ReportCache(ttl=10)
+    cache.put(("k",), {"x": 1})
+    now[0] += 10
+    assert cache.get(("k",)) == {"x": 1}
+    now[0] += 0.5
+    assert cache.get(("k",)) is None
+    assert len(cache) == 0 and cache.stats()["bytes"] == 0
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ReportCache(max_entries=2)
+    cache.put(("a",), {"v": "a"})
+    cache.put(("b",), {"v": "b"})
+    assert cache.get(("a",)) is not None  # a가 최근 → b가 가장 오래됨
+    cache.put(("c",), {"v": "c"})
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) is not None and cache.get(("c",)) is not None
+    assert cache.stats()["evictions"] == 1
+
+    size = len('{"v": "xxxx"}'.encode("utf-8"))
+    cache = ReportCache(max_bytes=size * 2)
+    for k in ("a", "b", "c"):
+        cache.put((k,), {"v": k * 4})
+    assert [k for k in ("a", "b", "c") if cache.get((k,)) is not None] == ["b", "c"]
+    assert cache.stats()["bytes"] == size * 2
+    cache.put(("big",), {"v": "x" * 100})  # 상한보다 큰 값은 넣지 않는다
+    assert cache.get(("big",)) is None and len(cache) == 2
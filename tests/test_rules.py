@@ -0,0 +1,52 @@
+# 개인 상황 주의 — 비트마스크 컴파일 결과 ↔ 문자열 조건 if-체인 (모든 CTX_FLAGS 조합)
+from itertools import product
+
+from engine import Drug, default_kb, personalize_warnings
+from rules import CTX_FLAGS, compile_rules
+
+
+def _string_rules(drug, ctx):
+    """비트마스크 이전 personalize_warnings (위궤양 규칙 포함) — 비교 기준."""
+    out = []
+    is_nsaid = ("NSAID" in drug.dclass) or any(key in drug.name for key in ["이부프로펜", "나프록센"])
+    actives = ",".join(drug.actives)
+    if ctx.get("pregnant") and is_nsaid:
+        out.append("임신 후기(NSAID 금기) 가능성 시 복용 금지. 전문가 상담 필요")
+    if ctx.get("liver") and "Acetaminophen" in actives:
+        out.append("간질환: 아세트아미노펜 용량 엄격 준수 또는 회피 고려")
+    if ctx.get("kidney") and is_nsaid:
+        out.append("신장질환: NSAID는 악화 가능 — 전문가 상담")
+    if ctx.get("ulcer") and is_nsaid:
+        out.append("위궤양/위장출혈 병력: NSAID는 출혈 재발 위험 — 전문가 상담")
+    if ctx.get("anticoagulant") and is_nsaid:
+        out.append("항응고제 병용: 위장출혈 위험 증가")
+    if ctx.get("maoi") and "Dextromethorphan" in actives:
+        out.append("MAOI 병용 금기(덱스트로메토르판)")
+    if ctx.get("ssri") and "Dextromethorphan" in actives:
+        out.append("SSRI 등과 병용 시 세로토닌 증후군 위험")
+    return out
+
+
+EXTRA_DRUGS = [
+    Drug(name="이부프로펜 시럽", dclass="해열진통제", actives=["Ibuprofen"], indications=["발열"]),
+    Drug(name="종합감기약", dclass="감기약", actives=["Acetaminophen", "Dextromethorphan"], indications=["감기"]),
+    Drug(name="비타민", dclass="영양제", actives=["Vitamin C"], indications=[]),
+]
+
+
+def test_bitmask_matches_string_rules_for_every_ctx():
+    kb = default_kb()
+    extra = compile_rules(EXTRA_DRUGS)
+    for bits in product((False, True), repeat=len(CTX_FLAGS)):
+        ctx = dict(zip(CTX_FLAGS, bits))
+        for d in kb.drugs:
+            assert personalize_warnings(kb, d, ctx) == _string_rules(d, ctx), (d.name, ctx)
+        for d in EXTRA_DRUGS:
+            assert list(extra.warnings(d, sum(1 << i for i, b in enumerate(bits) if b))) == _string_rules(d, ctx)
+
+
+def test_drugs_unknown_at_compile_time_are_masked_on_demand():
+    rules = compile_rules([])
+    ctx_all = (1 << len(CTX_FLAGS)) - 1
+    for d in EXTRA_DRUGS:
+        assert list(rules.warnings(d, ctx_all)) == _string_rules(d, dict.fromkeys(CTX_FLAGS, True))
@@ -0,0 +1,65 @@
+# 의심 질환 점수 — CSR 희소 행렬(파이썬/NumPy) ↔ 규칙별 중첩 루프
+import pickle
+import random
+
+import pytest
+
+import scoring
+from engine import default_kb
+from scoring import ConditionScorer
+
+HINTS = [f"힌트{i}" for i in range(30)]
+
+
+def _rules(rng, symptoms=8, per_symptom=12):
+    return {
+        f"증상{s}": [
+            {"name": f"질환{s}-{r}", "notes": f"메모{r}",
+             "hints": " / ".join(rng.choice(HINTS) for _ in range(rng.randint(1, 5)))}
+            for r in range(rng.randint(0, per_symptom))
+        ]
+        for s in range(symptoms)
+    }
+
+
+def _nested(condition_rules, selected, hits, limit=None):
+    """이전 match_conditions — 증상 → 규칙 → 힌트 중첩 루프, 안정 정렬."""
+    results = []
+    for s in selected:
+        for rule in condition_rules.get(s, []):
+            hints = [h.strip() for h in rule["hints"].split("/")]
+            score = 1 + sum(1 for h in hints if ("hint", h) in hits)
+            results.append({"name": rule["name"], "symptom": s, "score": score, "notes": rule["notes"]})
+    results.sort(key=lambda x: x["score"], reverse=True)
+    return results if limit is None else results[:limit]
+
+
+@pytest.mark.parametrize("vector_min", [10**9, 1])  # 파이썬 경로 / NumPy 경로
+def test_matches_nested_loops(monkeypatch, vector_min):
+    if vector_min == 1:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(scoring, "VECTOR_MIN_RULES", vector_min)
+    rng = random.Random(0)
+    for _ in range(20):
+        rules = _rules(rng)
+        scorer = ConditionScorer(rules)
+        symptoms = list(rules) + ["없는 증상"]
+        for _ in range(20):
+            selected = rng.sample(symptoms, rng.randint(1, 4))
+            hits = {("hint", h) for h in rng.sample(HINTS, rng.randint(0, 8))} | {("symptom", "증상0")}
+            for limit in (None, 0, 1, 3, 100):
+                assert scorer.score(selected, hits, limit) == _nested(rules, selected, hits, limit)
+
+
+def test_bundled_kb_matches_nested_loops():
+    kb = default_kb()
+    all_hints = {("hint", h.strip()) for rules in kb.condition_rules.values() for r in rules for h in r["hints"].split("/")}
+    selected = list(kb.symptom_to_drugs)
+    for hits in (set(), all_hints, set(list(all_hints)[::3])):
+        assert kb.condition_scorer.score(selected, hits) == _nested(kb.condition_rules, selected, hits)
+
+
+def test_scorer_pickles_with_fresh_lock():
+    scorer = pickle.loads(pickle.dumps(ConditionScorer(_rules(random.Random(1)))))
+    scorer.block("새 증상")  # 락을 쓰는 경로
+    assert pickle.loads(pickle.dumps(default_kb())).condition_scorer.vocab == default_kb().condition_scorer.vocab